@@ -0,0 +1 @@
+# Shared library code for the numbered ASO-Cas13 pipeline scripts.
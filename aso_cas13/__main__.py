@@ -0,0 +1,3 @@
+from aso_cas13.cli import main
+
+raise SystemExit(main())
@@ -0,0 +1,75 @@
+"""Target-site accessibility from local-folding unpaired probabilities.
+
+For every target region written by 01_locus_windows.py, an RNAplfold-style
+profile (probability that each base is unpaired, local folding window W with
+max base-pair span L) is computed once with the ViennaRNA bindings and stored
+as a prefix-sum array. A window's accessibility is then the mean unpaired
+probability over its bases, an O(1) lookup. Profiles are cached on disk by
+region sequence and folding parameters.
+"""
+import csv, hashlib, os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+PLFOLD_W = 80
+PLFOLD_L = 40
+DEFAULT_CACHE = Path("outputs/cache/accessibility")
+
+
+def unpaired_profile(seq, W=PLFOLD_W, L=PLFOLD_L):
+    """Per-base unpaired probability of `seq` (RNAplfold -W W -L L -u 1)."""
+    import RNA
+    rna = seq.upper().replace("T", "U")
+    if not rna:
+        return np.zeros(0)
+    w = min(W, len(rna))
+    up = RNA.pfl_fold_up(rna, 1, w, min(L, w))
+    return np.array([up[i][1] for i in range(1, len(rna) + 1)], dtype=np.float64)
+
+
+def _profile_key(seq, W, L):
+    import RNA
+    h = hashlib.sha1(f"{RNA.__version__}|W={W}|L={L}|{seq.upper()}".encode())
+    return h.hexdigest()
+
+
+def _prefix_job(args):
+    seq, W, L, path = args
+    cs = np.concatenate(([0.0], np.cumsum(unpaired_profile(seq, W, L))))
+    tmp = path.with_name(path.stem + f".{os.getpid()}.tmp.npy")
+    np.save(tmp, cs)
+    os.replace(tmp, path)
+    return path
+
+
+class AccessibilityIndex:
+    def __init__(self, regions_tsv, cache_dir=DEFAULT_CACHE, W=PLFOLD_W, L=PLFOLD_L, workers=None):
+        with open(regions_tsv) as f:
+            regions = list(csv.DictReader(f, delimiter="\t"))
+        cache_dir = Path(cache_dir)
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        paths = [cache_dir / f"{_profile_key(r['sequence'], W, L)}.npy" for r in regions]
+        todo = {p: r["sequence"] for p, r in zip(paths, regions) if not p.exists()}
+        if todo:
+            with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as ex:
+                list(ex.map(_prefix_job, [(s, W, L, p) for p, s in todo.items()]))
+        self.by_tx = {}
+        for r, p in zip(regions, paths):
+            self.by_tx.setdefault(r["transcript_id"], []).append(
+                (int(r["start"]), int(r["end"]), r["sequence"].upper(), np.load(p)))
+
+    def window(self, transcript_id, win_start, win_end, seq=None):
+        """Mean unpaired probability over [win_start, win_end], or None if no region covers it.
+
+        Regions of one transcript can overlap (exon and UTR features) with different
+        sequences at the same offset, so with `seq` only a region holding it there counts.
+        """
+        for start, end, region, cs in self.by_tx.get(transcript_id, ()):
+            if start <= win_start and win_end <= end:
+                # same offset convention as the window table: offset = win_start - start
+                i, j = win_start - start, win_end - start + 1
+                if j < len(cs) and (seq is None or region[i:j] == seq.strip().upper()):
+                    return float((cs[j] - cs[i]) / (j - i))
+        return None
@@ -0,0 +1,278 @@
+"""Candidate annotation stages 07-11 as column functions over one in-memory frame.
+
+A candidate table is read once into a string-typed pandas frame. Each stage
+(RNAfold dG, repeats, accessibility, isoform conservation, final score) is a
+function that takes the frame plus its inputs and returns new columns,
+formatted exactly as the per-stage scripts write them (tables may be TSV or
+Parquet/Feather, see `aso_cas13.tables`). The numbered scripts
+07-11 apply one function between a read and a write; `run_fused()` applies
+all of them in order and writes only the final table (and, with `debug`, the
+usual intermediates).
+"""
+import io
+from pathlib import Path
+
+import numpy as np
+
+from aso_cas13.tables import FORMATS, read_text as read_frame, write_text as write_frame
+
+DESIGN_DIR = Path("outputs/design")
+PREFIX = {"ASO": "ASO_candidates", "Cas13": "Cas13_guides"}
+# stage -> suffix of the table it writes
+STAGE_SUFFIX = {
+    "input": "final_grch38",
+    "dG": "with_dG",
+    "repeats": "with_repeats",
+    "access": "with_access",
+    "conservation": "with_conservation",
+    "final": "final_integrated",
+}
+HOMOPOLYMER_COL = "has_homopolymer_5+"  # name kept even if homopolymer_k is configured
+
+
+def stage_path(typ, stage, design_dir=DESIGN_DIR, fmt="tsv"):
+    return Path(design_dir) / f"{PREFIX[typ]}_{STAGE_SUFFIX[stage]}{FORMATS[fmt]}"
+
+
+def safe_float(x, default=0.0):
+    try: return float(x)
+    except: return default
+
+
+def _num(frame, col, default):
+    if col not in frame:
+        return np.full(len(frame), default, dtype=np.float64)
+    return np.array([safe_float(x, default) for x in frame[col].tolist()], dtype=np.float64)
+
+
+# 07: RNAfold dG
+
+class RNAfoldStream:
+    """{qid: MFE} of RNAfold output fed as text lines (`add`) or newline-aligned bytes (`feed`)."""
+
+    def __init__(self):
+        self.energies = {}
+        self.lines = []
+
+    def add(self, lines):
+        self.lines.extend(l.rstrip() for l in lines if l.strip())
+        lines, i = self.lines, 0
+        while i < len(lines):
+            if lines[i].startswith(">"):
+                # Expect sequence at i+1 and structure+energy at i+2
+                if i + 2 >= len(lines):
+                    break
+                struct = lines[i+2]
+                try:
+                    energy_str = struct.split("(")[-1].split(")")[0].strip()
+                    self.energies[lines[i][1:]] = float(energy_str)
+                except:
+                    self.energies[lines[i][1:]] = None
+                i += 3
+            else:
+                i += 1
+        del lines[:i]
+
+    def feed(self, buf):
+        self.add(io.StringIO(buf.decode(), newline=None))
+
+    def result(self):
+        return self.energies
+
+
+def parse_rnafold(txt_path):
+    s = RNAfoldStream()
+    with Path(txt_path).open() as f:
+        s.add(f)
+    return s.result()
+
+
+def text_energies(rnafold, map_file=None, rnafold_cmd=None, query=None, concurrency=4, retries=1, timeout=None):
+    """{qid: dG} of RNAfold output (a path or glob of shards), or of `rnafold_cmd` run over
+    the `query` FASTA shards; {sequence: dG} instead when a sidecar map is given."""
+    from aso_cas13.blast6 import hit_files
+    from aso_cas13.shards import by_sequence, load_map
+    E = {}
+    if rnafold_cmd:
+        from aso_cas13.toolrun import run_tool
+        for part in run_tool(rnafold_cmd, hit_files(query), RNAfoldStream, concurrency, retries, timeout):
+            E.update(part)
+    else:
+        for path in hit_files(rnafold):
+            E.update(parse_rnafold(path))
+    return by_sequence(E, load_map(map_file)) if map_file else E
+
+
+def vienna_energies(frames, cache, workers=None, temperature=37.0, dangles=2, param_file=None):
+    """{window_seq: MFE} folding every unique window of `frames` once."""
+    from aso_cas13.fold import fold_many
+    seqs = set()
+    for frame in frames:
+        seqs.update(frame["window_seq"].tolist())
+    folds = fold_many(seqs, cache, workers, temperature, dangles, param_file)
+    return {s: v[0] for s, v in folds.items()}
+
+
+def rnafold_dG(frame, energies, typ, by_seq=False):
+    if by_seq:
+        keys = [s.strip().upper() for s in frame["window_seq"].tolist()]
+    else:
+        keys = [f"{typ}_{t}_{s}_{e}" for t, s, e in
+                zip(frame["transcript_id"].tolist(), frame["win_start"].tolist(), frame["win_end"].tolist())]
+    out = []
+    for k in keys:
+        dG = energies.get(k, None)
+        out.append("" if dG is None else f"{dG:.2f}")
+    return {"rnafold_dG": out}
+
+
+# 08: repeats
+
+def repeat_columns(frame, scanner, low_complexity=False):
+    from aso_cas13.seqindex import intern
+    ids, uniq = intern(frame["window_seq"].tolist())
+    scans = [scanner.scan(seq, low_complexity) for seq in uniq]  # once per unique sequence
+    homo, rep, dust, ent = [], [], [], []
+    for i in ids:
+        res = scans[i]
+        homo.append("yes" if res["has_homopolymer"] else "no")
+        rep.append(str(res["simple_repeat_score"]))
+        if low_complexity:
+            dust.append(f"{res['dust']:.2f}")
+            ent.append(f"{res['entropy']:.3f}")
+    cols = {HOMOPOLYMER_COL: homo, "simple_repeat_score": rep}
+    if low_complexity:
+        cols["dust_score"], cols["entropy"] = dust, ent
+    return cols
+
+
+# 09: accessibility
+
+def proxy_accessibility(gc, homopolymer_flag):
+    # Heuristic: start from 1.0, penalize GC>70 and homopolymers
+    score = 1.0
+    try:
+        gc_val = float(gc)
+    except:
+        gc_val = None
+    if gc_val is not None:
+        if gc_val > 70: score -= 0.3
+        if gc_val > 80: score -= 0.2
+    if homopolymer_flag == "yes":
+        score -= 0.3
+    return max(0.0, round(score, 2))
+
+
+def accessibility_column(frame, index=None):
+    """({accessibility_score: ...}, number of windows that fell back to the proxy)."""
+    n = len(frame)
+    gc = frame["gc"].tolist() if "gc" in frame else [None] * n
+    homo = frame[HOMOPOLYMER_COL].tolist() if HOMOPOLYMER_COL in frame else ["no"] * n
+    out, fallback = [], 0
+    for i in range(n):
+        acc = None
+        if index is not None:
+            acc = index.window(frame["transcript_id"].iat[i], int(frame["win_start"].iat[i]), int(frame["win_end"].iat[i]),
+                               frame["window_seq"].iat[i])
+            if acc is None:
+                fallback += 1
+        out.append(str(proxy_accessibility(gc[i], homo[i]) if acc is None else round(acc, 2)))
+    return {"accessibility_score": out}, fallback
+
+
+# 10: isoform conservation
+
+def table_coverage(frame):
+    # key by window sequence; count unique transcripts among the table's rows
+    return frame.groupby("window_seq", sort=False)["transcript_id"].nunique().to_dict()
+
+
+def index_coverage(frame, gtf, ref_fa, mismatches=0, cache_dir="outputs/cache/isoforms"):
+    # transcripts of the rows' genes whose spliced sequence contains each window
+    from aso_cas13.gtf_index import open_index
+    from aso_cas13.isoform_index import open_isoform_index
+    from aso_cas13.refstore import open_reference
+    with open_index(gtf) as ann, open_reference(ref_fa) as ref:
+        genes = sorted({g for g in ann.genes_of(frame["transcript_id"].tolist()).values() if g})
+        index = open_isoform_index(ann, ref, gtf, ref_fa, genes, cache_dir)
+    raw = frame["window_seq"].unique().tolist()
+    seqs = sorted({s.strip().upper() for s in raw})
+    by_seq = {s: len(t) for s, t in zip(seqs, index.transcripts_for(seqs, mismatches))}
+    return {s: by_seq[s.strip().upper()] for s in raw}
+
+
+def window_coverage(frame, results_dir="outputs/results"):
+    # transcripts of the window table (all target regions) that contain each window
+    from aso_cas13.seqindex import open_sequence_index
+    index = open_sequence_index(results_dir)
+    counts = index.transcript_counts()
+    raw = frame["window_seq"].unique().tolist()
+    ids = index.lookup([s.strip() for s in raw])
+    return {s: int(counts[i]) for s, i in zip(raw, ids.tolist()) if i >= 0}
+
+
+def isoform_conservation(frame, coverage):
+    return {"isoform_conservation": [str(coverage.get(s, 1)) for s in frame["window_seq"].tolist()]}
+
+
+# 11: final score
+
+def final_integrated_score(frame, w):
+    """`w`: the weights, as WEIGHTS in 11_final_integration.py."""
+    base = _num(frame, "score_final", 0.0)
+    dG = _num(frame, "rnafold_dG", 0.0)
+    homo = (frame[HOMOPOLYMER_COL] == "yes").to_numpy() if HOMOPOLYMER_COL in frame else np.zeros(len(frame), bool)
+    rep = _num(frame, "simple_repeat_score", 0.0)
+    acc = _num(frame, "accessibility_score", 1.0)
+    iso = np.array([int(x) for x in frame["isoform_conservation"].tolist()] if "isoform_conservation" in frame
+                   else np.ones(len(frame)), dtype=np.int64)
+
+    score = base.copy()
+    # Homopolymer penalty
+    score[homo] -= w["homopolymer_penalty"]
+    # Repeat penalty
+    score -= w["repeat_penalty"] * rep
+    # Accessibility multiplier
+    score = np.where(acc < w["min_accessibility"], score * w["low_accessibility_factor"], score)
+    # RNAfold penalty if extremely stable
+    score[dG < w["stable_dG"]] -= w["stable_dG_penalty"]
+    # Bonus for isoform conservation
+    score[iso >= 2] += w["isoform_bonus_2"]
+    score[iso >= 3] += w["isoform_bonus_3"]
+    # Penalty for a weak duplex (nearest-neighbor Tm; only in tables scored with 02 --thermo)
+    if "tm_nn" in frame:
+        score[_num(frame, "tm_nn", np.nan) < w["min_tm_nn"]] -= w["low_tm_nn_penalty"]
+    return {"final_integrated_score": [f"{s:.2f}" for s in score.tolist()]}
+
+
+def add_columns(frame, cols):
+    for name, values in cols.items():
+        frame[name] = values
+    return frame
+
+
+def run_fused(energies, by_seq, scanner, weights, low_complexity=False, access_index=None,
+              coverage=None, debug=False, design_dir=DESIGN_DIR, fmt="tsv", frames=None):
+    """Stages 07-11 for both candidate tables, one read and one final write each.
+
+    `energies`: {typ: {qid or seq: dG}}; `by_seq`: {typ: whether energies are
+    keyed by sequence}; `coverage`: None for the per-table count, else a function
+    frame -> {window_seq: n}; `frames`: {typ: frame} already read. Returns
+    {typ: output path}.
+    """
+    out = {}
+    for typ in PREFIX:
+        frame = frames[typ] if frames else read_frame(stage_path(typ, "input", design_dir, fmt))
+        steps = [
+            ("dG", lambda f: rnafold_dG(f, energies[typ], typ, by_seq[typ])),
+            ("repeats", lambda f: repeat_columns(f, scanner, low_complexity)),
+            ("access", lambda f: accessibility_column(f, access_index)[0]),
+            ("conservation", lambda f: isoform_conservation(f, table_coverage(f) if coverage is None else coverage(f))),
+            ("final", lambda f: final_integrated_score(f, weights)),
+        ]
+        for stage, fn in steps:
+            add_columns(frame, fn(frame))
+            if debug or stage == "final":
+                write_frame(frame, stage_path(typ, stage, design_dir, fmt))
+        out[typ] = stage_path(typ, "final", design_dir, fmt)
+    return out
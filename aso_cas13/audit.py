@@ -0,0 +1,221 @@
+"""Single-pass file checks for 00_audit_inputs.py.
+
+Each file is read once through a tap that hashes it (SHA-1) and counts its
+bytes and lines while the type-specific check consumes the same stream:
+- FASTA: headers and non-ACGTN characters, in newline-aligned blocks (the
+  common all-valid block is settled by one `bytes.translate`);
+- TSV: header columns, a preview and per-column counts of non-numeric cells,
+  through the csv module;
+- text: keyword presence;
+- images: the PNG signature.
+
+Results are cached by (size, mtime_ns, check spec) so `fast` runs skip
+unchanged files.
+"""
+import csv, hashlib, io, json, math, os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+BLOCK = 8 << 20
+PREVIEW_LINES = 5
+CACHE = Path("outputs/cache/audit_inputs.json")
+ACGTN = b"ACGTNacgtn"
+# cells pandas.read_csv reads as NaN by default
+NA_VALUES = {"", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+             "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null"}
+
+
+class _Tap(io.RawIOBase):
+    """Binary reader that hashes and counts lines of everything read through it."""
+
+    def __init__(self, f):
+        self.f = f
+        self.sha1 = hashlib.sha1()
+        self.size = self.newlines = 0
+        self.last = b""
+
+    def readable(self):
+        return True
+
+    def _see(self, data):
+        if data:
+            self.sha1.update(data)
+            self.size += len(data)
+            self.newlines += data.count(b"\n")
+            self.last = data[-1:]
+
+    def read(self, n=-1):
+        data = self.f.read(n)
+        self._see(data)
+        return data
+
+    def readinto(self, b):
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+    def drain(self):
+        while self.read(BLOCK):
+            pass
+
+    @property
+    def lines(self):
+        # as iterating the file in binary mode counts them
+        return self.newlines + (1 if self.size and self.last != b"\n" else 0)
+
+
+def _preview(head):
+    # the first lines as text mode returns them; "" when the file is shorter
+    try:
+        lines = io.StringIO(head.decode(), newline=None).readlines()
+    except UnicodeDecodeError:
+        return ""
+    return "".join(lines[:PREVIEW_LINES]) if len(lines) >= PREVIEW_LINES else ""
+
+
+def _fasta_lines(buf):
+    # (headers, non-ACGTN characters) of complete lines
+    if b">" not in buf and not buf.translate(None, ACGTN + b"\r\n"):
+        return 0, 0
+    headers = bad = 0
+    for line in buf.split(b"\n"):
+        if line.startswith(b">"):
+            headers += 1
+        else:
+            bad += len(line.strip().translate(None, ACGTN))
+    return headers, bad
+
+
+def check_fasta(tap):
+    res = {"type": "FASTA", "headers": 0, "non_iupac": 0}
+    head, rest = b"", []
+    while True:
+        block = tap.read(BLOCK)
+        if not block:
+            break
+        if head.count(b"\n") < PREVIEW_LINES:
+            head += block[:1 << 16]
+        cut = block.rfind(b"\n") + 1
+        if cut == 0:
+            rest.append(block)
+            continue
+        h, n = _fasta_lines(b"".join(rest) + block[:cut - 1])
+        res["headers"] += h
+        res["non_iupac"] += n
+        rest = [block[cut:]]
+    if any(rest):
+        h, n = _fasta_lines(b"".join(rest))
+        res["headers"] += h
+        res["non_iupac"] += n
+    res["preview"] = _preview(head)
+    return res
+
+
+def _invalid_number(v):
+    if v is None or v in NA_VALUES:
+        return True
+    try:
+        return math.isnan(float(v))
+    except ValueError:
+        return True
+
+
+def check_tsv(tap, expected_cols=None, numeric_checks=None):
+    res = {"type": "TSV", "columns": [], "missing_cols": [], "numeric_invalid": {}}
+    text = io.TextIOWrapper(io.BufferedReader(tap, BLOCK))
+    r = csv.DictReader(text, delimiter="\t")
+    res["columns"] = r.fieldnames or []
+    if expected_cols:
+        res["missing_cols"] = [c for c in expected_cols if c not in res["columns"]]
+    cols = [c for c in (numeric_checks or {}) if c in res["columns"]]
+    invalid = dict.fromkeys(cols, 0)
+    rows = []
+    for i, row in enumerate(r):
+        if i < 3:
+            rows.append(row)
+        for c in cols:
+            if _invalid_number(row[c]):
+                invalid[c] += 1
+    res["preview_rows"] = rows
+    if numeric_checks:
+        res["numeric_invalid"] = invalid
+    return res
+
+
+def check_text(tap, grep_keywords=None):
+    res = {"type": "TEXT", "contains": {}}
+    found = dict.fromkeys(grep_keywords or [], False)
+    lines = []
+    for line in io.TextIOWrapper(io.BufferedReader(tap, BLOCK), errors="ignore"):
+        if len(lines) < PREVIEW_LINES:
+            lines.append(line)
+        for k in found:
+            if not found[k] and k in line:
+                found[k] = True
+    res["contains"] = found
+    res["preview"] = "".join(lines) if len(lines) == PREVIEW_LINES else ""
+    return res
+
+
+def check_image(tap):
+    return {"type": "IMAGE", "png_sig_ok": tap.read(8) == b"\x89PNG\r\n\x1a\n"}
+
+
+CHECKS = {"fasta": check_fasta, "tsv": check_tsv, "text": check_text, "image": check_image}
+EMPTY = {
+    "fasta": {"type": "FASTA", "headers": 0, "non_iupac": 0},
+    "tsv": {"type": "TSV", "columns": [], "missing_cols": [], "numeric_invalid": {}},
+    "text": {"type": "TEXT", "contains": {}},
+    "image": {"type": "IMAGE", "png_sig_ok": None},
+}
+
+
+def audit_file(path, kind=None, **spec):
+    """{path, exists, bytes, lines, sha1[, detail]} from one read of `path`."""
+    p = Path(path)
+    entry = {"path": str(p), "exists": p.exists(), "bytes": 0, "lines": 0, "sha1": None}
+    if not entry["exists"]:
+        if kind:
+            entry["detail"] = dict(EMPTY[kind])
+        return entry
+    with p.open("rb") as f:
+        tap = _Tap(f)
+        detail = CHECKS[kind](tap, **spec) if kind and p.stat().st_size else dict(EMPTY.get(kind, {}))
+        tap.drain()
+    entry.update(bytes=tap.size, lines=tap.lines, sha1=tap.sha1.hexdigest())
+    if kind:
+        entry["detail"] = detail
+    return entry
+
+
+def audit_files(jobs, workers=None, cache=CACHE, fast=False):
+    """[entry] for `jobs` = [(path, kind, spec)], concurrently; reuses cached entries when `fast`."""
+    cache = Path(cache)
+    try:
+        memo = json.loads(cache.read_text()) if cache.exists() else {}
+    except ValueError:
+        memo = {}
+
+    def one(job):
+        path, kind, spec = job
+        stamp = None
+        if os.path.exists(path):
+            st = os.stat(path)
+            stamp = [st.st_size, st.st_mtime_ns, json.dumps([kind, spec], sort_keys=True)]
+            m = memo.get(path)
+            if fast and m and m["stamp"] == stamp:
+                return m["entry"], stamp
+        return audit_file(path, kind, **spec), stamp
+
+    with ThreadPoolExecutor(max_workers=workers or min(8, os.cpu_count() or 1)) as ex:
+        results = list(ex.map(one, jobs))
+    for (path, _, _), (entry, stamp) in zip(jobs, results):
+        if stamp:
+            memo[path] = {"stamp": stamp, "entry": entry}
+        else:
+            memo.pop(path, None)
+    cache.parent.mkdir(parents=True, exist_ok=True)
+    tmp = cache.with_name(cache.name + ".tmp")
+    tmp.write_text(json.dumps(memo))
+    os.replace(tmp, cache)
+    return [entry for entry, _ in results]
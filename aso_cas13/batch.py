@@ -0,0 +1,158 @@
+"""Multi-locus / multi-gene batch design.
+
+Loci come from a multi-line BED and/or a gene list. They are joined against the
+annotation's exon/3' UTR features with a sort-based sweep line, then each locus
+is windowed and scored in a process pool. Every locus gets its own partition:
+
+    <results_dir>/<locus_id>/01_target_regions.tsv + 01_target_windows.npy
+    <design_dir>/<locus_id>/ASO_candidates_top.tsv
+    <design_dir>/<locus_id>/Cas13_guides_top.tsv
+
+plus `<results_dir>/manifest.tsv`, so later stages can run per locus in parallel.
+"""
+import heapq, os, re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from aso_cas13.gtf_index import open_index
+from aso_cas13.refstore import ReferenceStore, norm_chr, open_reference
+from aso_cas13.scoring import top_windows, write_top
+from aso_cas13.windows import WindowTable, overlap_targets, write_compact
+
+FEATURES = ("three_prime_utr", "exon")
+MANIFEST_COLS = ["locus_id","chr","start","end","n_targets","n_windows","windows_dir","aso_top","cas_top"]
+
+
+def locus_id(name, chrom, start, end):
+    if name:
+        return re.sub(r"[^A-Za-z0-9._-]+", "_", name)
+    return f"{chrom}_{start}_{end}"
+
+
+def read_bed(path):
+    """Loci as (locus_id, chr, start, end); every non-header line is used."""
+    loci, seen = [], {}
+    with open(path) as f:
+        for line in f:
+            if not line.strip() or line.startswith(("#", "track", "browser")):
+                continue
+            b = line.rstrip("\n").split("\t")
+            chrom, start, end = norm_chr(b[0]), int(b[1]), int(b[2])
+            lid = locus_id(b[3] if len(b) > 3 else "", chrom, start, end)
+            seen[lid] = seen.get(lid, 0) + 1
+            if seen[lid] > 1:
+                lid = f"{lid}_{seen[lid]}"  # keep partitions unique for repeated names
+            loci.append((lid, chrom, start, end))
+    return loci
+
+
+def read_genes(spec):
+    # Comma-separated names, or a file with one gene per line
+    p = Path(spec)
+    if p.is_file():
+        names = [l.split("#", 1)[0].strip() for l in p.read_text().splitlines()]
+    else:
+        names = [g.strip() for g in spec.split(",")]
+    return [g for g in names if g]
+
+
+def sweep_join(loci, features):
+    """Assign each feature to every locus it overlaps.
+
+    Both inputs are sorted by (chr, start) and swept once; features enter an
+    end-keyed heap when they start before the locus ends and leave it once they
+    end before the next locus starts. Returns {locus_id: [feature, ...]} with
+    features as (chr, start, end, strand, transcript_id), in input order.
+    """
+    feats = sorted(enumerate(features), key=lambda x: (x[1][0], x[1][1]))
+    out = {lid: [] for lid, *_ in loci}
+    active, fi, cur_chr = [], 0, None
+    for lid, chrom, start, end in sorted(loci, key=lambda l: (l[1], l[2])):
+        if chrom != cur_chr:
+            active, cur_chr = [], chrom
+            while fi < len(feats) and feats[fi][1][0] < chrom:
+                fi += 1
+        while fi < len(feats) and feats[fi][1][0] == chrom and feats[fi][1][1] < end:
+            order, f = feats[fi]
+            heapq.heappush(active, (f[2], order, f))
+            fi += 1
+        while active and active[0][0] <= start:
+            heapq.heappop(active)
+        # same strict overlap test as the single-locus intersection
+        hits = [(order, f) for _, order, f in active if max(f[1], start) < min(f[2], end)]
+        out[lid] = [f for _, f in sorted(hits)]
+    return out
+
+
+def by_chromosome(feats):
+    """{chr: [feature, ...]} in first-seen order, features in input order."""
+    out = {}
+    for f in feats:
+        out.setdefault(f[0], []).append(f)
+    return out
+
+
+def gene_loci(ann, genes):
+    # One locus per gene and chromosome spanning its exon/UTR features there;
+    # genes on several contigs (PAR, alt haplotypes) get <gene>_<chr> partitions
+    loci, regions = [], {}
+    for g in genes:
+        feats = ann.features(g, FEATURES)
+        if not feats:
+            print(f"[batch] gene {g} not found in annotation; skipped")
+            continue
+        by_chr = by_chromosome(feats)
+        for chrom, fs in by_chr.items():
+            lid = locus_id(g if len(by_chr) == 1 else f"{g}_{chrom}", chrom, 0, 0)
+            loci.append((lid, chrom, min(f[1] for f in fs), max(f[2] for f in fs)))
+            regions[lid] = fs
+    return loci, regions
+
+
+_ref = None
+
+
+def _init_worker(ref_fa):
+    global _ref
+    _ref = ReferenceStore(ref_fa)
+
+
+def run_locus(locus, regions, results_dir, design_dir):
+    lid, chrom, start, end = locus
+    targets = overlap_targets(regions, chrom, start, end, _ref)
+    win_dir = Path(results_dir) / lid
+    _, _, n_windows = write_compact(win_dir, targets)
+    aso_top, cas_top = top_windows(WindowTable(win_dir))
+    aso_out = Path(design_dir) / lid / "ASO_candidates_top.tsv"
+    cas_out = Path(design_dir) / lid / "Cas13_guides_top.tsv"
+    write_top(aso_out, aso_top)
+    write_top(cas_out, cas_top)
+    return [lid, chrom, start, end, len(targets), n_windows, str(win_dir), str(aso_out), str(cas_out)]
+
+
+def run_batch(ref_fa, gtf, bed=None, genes=None, results_dir="outputs/results/loci",
+              design_dir="outputs/design/loci", workers=None):
+    open_reference(ref_fa).close()  # build the packed store once, before forking
+    with open_index(gtf) as ann:
+        loci, regions = [], {}
+        gene_list = read_genes(genes) if genes else []
+        if bed:
+            loci = read_bed(bed)
+            if gene_list:
+                feats = [f for g in gene_list for f in ann.features(g, FEATURES)]
+            else:
+                feats = ann.features_on({c for _, c, _, _ in loci}, FEATURES)
+            regions = sweep_join(loci, feats)
+        else:
+            loci, regions = gene_loci(ann, gene_list)
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(str(ref_fa),)) as ex:
+        futs = [ex.submit(run_locus, l, regions[l[0]], results_dir, design_dir) for l in loci]
+        summary = [fu.result() for fu in futs]
+    manifest = Path(results_dir) / "manifest.tsv"
+    manifest.parent.mkdir(parents=True, exist_ok=True)
+    with manifest.open("w") as f:
+        f.write("\t".join(MANIFEST_COLS) + "\n")
+        for row in summary:
+            f.write("\t".join(map(str, row)) + "\n")
+    return manifest, summary
@@ -0,0 +1,199 @@
+"""Scaling benchmark: run every stage on synthetic inputs of increasing size.
+
+For each scale point a fresh project tree is generated (aso_cas13.synthetic)
+and the stages of aso_cas13.pipeline run in order as subprocesses. BLAST and
+RNAfold text files are generated just before the first stage that needs
+them. Per stage it records wall and CPU time (from wait4), peak RSS (the
+stage's own VmHWM, from its metrics record; wait4's ru_maxrss would include
+the harness's, inherited across fork+exec), the bytes of its inputs and the
+rows of its outputs. Per stage it also fits the exponents of wall time and
+peak RSS against input size across points (wall ~ input_bytes ** k).
+"""
+import argparse, json, os, platform, shutil, subprocess, tempfile, time, uuid
+from pathlib import Path
+
+import numpy as np
+
+from aso_cas13 import metrics, synthetic
+from aso_cas13.pipeline import PREFIX, STAGES, Stage, stage_command, stage_env, stage_inputs, stage_outputs
+
+# loci, windows in the DMPK locus, MB of outfmt6 hits per file
+PRESETS = {
+    "quick": [(1, 1_000, 1), (10, 10_000, 4), (100, 100_000, 16)],
+    "default": [(1, 1_000, 1), (10, 10_000, 8), (100, 100_000, 64), (1_000, 1_000_000, 256)],
+    "full": [(1, 1_000, 1), (100, 100_000, 32), (1_000, 1_000_000, 256),
+             (10_000, 10_000_000, 1024), (10_000, 100_000_000, 3072)],
+}
+TRANSCRIPTS = 4
+EXTRA_STAGES = [
+    # not part of the runner's default graph, benchmarked anyway
+    Stage("01_locus_windows:batch", "01_locus_windows.py", ["--batch"], [], ["outputs/results/loci/manifest.tsv"]),
+    Stage("05_merge_offtargets", "05_merge_offtargets.py",
+          ["outputs/design/ASO_candidates_final_grch38.tsv", "outputs/results/ASO_offtargets_summary.tsv",
+           "outputs/design/ASO_candidates_merged.tsv"],
+          ["outputs/design/ASO_candidates_final_grch38.tsv", "outputs/results/ASO_offtargets_summary.tsv"],
+          ["outputs/design/ASO_candidates_merged.tsv"]),
+]
+
+
+def benchmark_stages():
+    order = [s for s in STAGES if s.name != "00_audit_inputs"]
+    out = []
+    for s in order:
+        out.append(s)
+        if s.name == "01_locus_windows":
+            out.append(EXTRA_STAGES[0])
+        if s.name == "04_summarize_offtargets:Cas13":
+            out.append(EXTRA_STAGES[1])
+    return out + [s for s in STAGES if s.name == "00_audit_inputs"]
+
+
+def _prepare(root, stage, hits_bytes, seed):
+    # generate the external-tool outputs a stage reads, once the candidate tables exist
+    for inp in stage_inputs(stage, stage.args):
+        path = root / inp
+        if path.exists():
+            continue
+        name = path.name
+        typ = name.split("_")[0]
+        prefix = PREFIX.get(typ, typ)
+        if name.endswith(("_offtargets.txt", "_offtargets_grch38.txt")):
+            synthetic.write_outfmt6(path, root / f"outputs/design/{prefix}_top.tsv", typ, hits_bytes, seed)
+        elif name.endswith("_rnafold.txt"):
+            synthetic.write_rnafold(path, root / f"outputs/design/{prefix}_final_grch38.tsv", typ, seed)
+
+
+def _rows(path):
+    if not path.exists():
+        return 0
+    if path.suffix == ".npy":
+        return int(np.load(path, mmap_mode="r").shape[0])
+    if path.suffix in (".png", ".log"):
+        return 0
+    with path.open("rb") as f:
+        return sum(block.count(b"\n") for block in iter(lambda: f.read(1 << 20), b""))
+
+
+def run_stage(root, stage):
+    run_id = uuid.uuid4().hex
+    records = root / "outputs/logs/benchmark_metrics.jsonl"
+    env = stage_env(MPLBACKEND="Agg", ASO_CAS13_METRICS=str(records), ASO_CAS13_STAGE=stage.name,
+                    ASO_CAS13_RUN_ID=run_id)
+    log = root / "outputs/logs" / f"{stage.name.replace(':', '_')}.log"
+    log.parent.mkdir(parents=True, exist_ok=True)
+    in_bytes = sum((root / i).stat().st_size for i in stage_inputs(stage, stage.args) if (root / i).exists())
+    with log.open("w") as f:
+        t0 = time.perf_counter()
+        proc = subprocess.Popen(stage_command(stage, stage.args),
+                                cwd=root, env=env, stdout=f, stderr=subprocess.STDOUT)
+        _, status, ru = os.wait4(proc.pid, 0)
+        wall = time.perf_counter() - t0
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    rows_out = sum(_rows(root / o) for o in stage_outputs(stage, stage.args))
+    rec = metrics.load(records, run_id).get(stage.name)  # none if the stage died before recording
+    return {
+        "ok": proc.returncode == 0,
+        "wall_s": round(wall, 4),
+        "cpu_s": round(ru.ru_utime + ru.ru_stime, 4),
+        "peak_rss_mb": rec["total"]["peak_rss_mb"] if rec else None,
+        "input_bytes": in_bytes,
+        "output_rows": rows_out,
+        "input_mb_per_s": round(in_bytes / 1e6 / wall, 3) if wall > 0 else None,
+        "output_rows_per_s": round(rows_out / wall, 1) if wall > 0 else None,
+    }
+
+
+def run_point(root, n_loci, windows, hits_mb, seed=0, stages=None, report=print):
+    root = Path(root)
+    t0 = time.perf_counter()
+    meta = synthetic.generate_inputs(root, n_loci, windows, TRANSCRIPTS, seed)
+    point = {"loci": n_loci, "windows_target": windows, "hits_mb": hits_mb,
+             "reference_bp": meta["reference_bp"], "generate_s": round(time.perf_counter() - t0, 3), "stages": {}}
+    for stage in stages or benchmark_stages():
+        _prepare(root, stage, hits_mb << 20, seed)
+        res = run_stage(root, stage)
+        point["stages"][stage.name] = res
+        peak = "" if res["peak_rss_mb"] is None else f"{res['peak_rss_mb']:8.1f} MB"
+        report(f"  {stage.name:34s} {res['wall_s']:9.3f}s {peak:>11s}"
+               + ("" if res["ok"] else "  FAILED"))
+        if stage.name == "01_locus_windows":
+            point["windows"] = res["output_rows"]
+    return point
+
+
+def _exponent(x, y):
+    # k of y ~ x ** k; only fit when the input size actually spans a range, noise dominates otherwise
+    ok = [(a, b) for a, b in zip(x, y) if b is not None]
+    x, y = np.array([a for a, _ in ok], dtype=float), np.array([b for _, b in ok], dtype=float)
+    if len(x) >= 2 and (x > 0).all() and (y > 0).all() and x.max() >= 2 * x.min():
+        return round(float(np.polyfit(np.log(x), np.log(y), 1)[0]), 3)
+    return None
+
+
+def scaling(points):
+    """{stage: {input_bytes, wall_s, peak_rss_mb, exponent, rss_exponent}} across points."""
+    out = {}
+    names = {n for p in points for n in p["stages"]}
+    for name in sorted(names):
+        rs = [p["stages"][name] for p in points if name in p["stages"] and p["stages"][name]["ok"]]
+        x = [r["input_bytes"] for r in rs]
+        wall, peak = [r["wall_s"] for r in rs], [r["peak_rss_mb"] for r in rs]
+        out[name] = {"input_bytes": x, "wall_s": wall, "peak_rss_mb": peak,
+                     "exponent": _exponent(x, wall), "rss_exponent": _exponent(x, peak)}
+    return out
+
+
+def run(points, workdir=None, keep=False, seed=0, stages=None, report=print):
+    """Benchmark every (loci, windows, hits_mb) point; returns the JSON-ready report."""
+    results = []
+    for n_loci, windows, hits_mb in points:
+        root = Path(tempfile.mkdtemp(prefix="aso_cas13_bench_", dir=workdir))
+        report(f"point loci={n_loci} windows={windows} hits={hits_mb}MB in {root}")
+        try:
+            results.append(run_point(root, n_loci, windows, hits_mb, seed, stages, report))
+        finally:
+            if not keep:
+                shutil.rmtree(root, ignore_errors=True)
+    return {
+        "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                    "cpus": os.cpu_count()},
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "points": results,
+        "scaling": scaling(results),
+    }
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Time every stage on synthetic inputs of increasing size.")
+    p.add_argument("--preset", choices=sorted(PRESETS), default="quick")
+    p.add_argument("--loci", default=None, help="comma-separated loci per point (overrides the preset, with --windows and --hits-mb)")
+    p.add_argument("--windows", default=None, help="comma-separated windows per point")
+    p.add_argument("--hits-mb", default=None, help="comma-separated MB of outfmt6 hits per BLAST file per point")
+    p.add_argument("--stages", default=None, help="comma-separated stage names to time (default: all)")
+    p.add_argument("--workdir", default=None, help="where to create the synthetic project trees (default: system temp)")
+    p.add_argument("--keep", action="store_true", help="keep the generated trees")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--out", default="outputs/benchmarks/benchmark.json")
+    a = p.parse_args(argv)
+
+    points = PRESETS[a.preset]
+    if a.loci or a.windows or a.hits_mb:
+        # a single value (or the default) is used for every point
+        cols = [[int(x) for x in v.split(",")] if v else [d] for v, d in zip((a.loci, a.windows, a.hits_mb), (1, 1000, 1))]
+        n = max(len(c) for c in cols)
+        if any(len(c) not in (1, n) for c in cols):
+            p.error("--loci, --windows and --hits-mb must list the same number of points")
+        points = list(zip(*[c * n if len(c) == 1 else c for c in cols]))
+
+    stages = None
+    if a.stages:
+        wanted = set(a.stages.split(","))
+        stages = [s for s in benchmark_stages() if s.name in wanted]
+
+    report = run(points, a.workdir, a.keep, a.seed, stages)
+    out = Path(a.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=1))
+    for name, s in report["scaling"].items():
+        print(f"{name:34s} wall ~ input^{s['exponent']}  peak RSS ~ input^{s['rss_exponent']}")
+    print(f"Wrote {out}")
@@ -0,0 +1,228 @@
+"""Streaming BLAST tabular (outfmt 6) hit counter shared by the parse stages.
+
+Files (plain or .gz) are read in large newline-aligned blocks; each block is
+parsed by pandas' C reader, filtered with vectorized column tests and reduced
+to per-query counts. Plain files can be split into byte ranges counted by
+separate processes; gzip streams are read sequentially. A path may also be a
+glob or a list of them (per-shard outputs); the files are counted
+concurrently and their counts summed. `HitCounter` and `HitCollector` do the
+same for outfmt6 text as it streams from a running blastn (aso_cas13.toolrun).
+"""
+import glob, gzip, io, os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+OUTFMT6 = ["qseqid","sseqid","pident","length","mismatch","gapopen",
+           "qstart","qend","sstart","send","evalue","bitscore"]
+CHUNK_BYTES = 64 << 20
+# filter name -> (column index, comparison)
+FILTERS = {
+    "min_pident": (2, "ge"),
+    "min_length": (3, "ge"),
+    "max_mismatch": (4, "le"),
+    "max_evalue": (10, "le"),
+}
+
+
+def hit_files(path):
+    """Sorted files of a path, a glob or a list of either."""
+    specs = [path] if isinstance(path, (str, os.PathLike)) else list(path)
+    files = []
+    for spec in map(str, specs):
+        if glob.has_magic(spec):
+            found = sorted(glob.glob(spec))
+            if not found:
+                raise FileNotFoundError(f"no files match {spec}")
+            files.extend(found)
+        else:
+            files.append(spec)
+    return files
+
+
+def _blocks(fh, limit=None):
+    # newline-aligned byte blocks; stops after `limit` bytes (range mode)
+    rest, remaining = b"", limit
+    while True:
+        n = CHUNK_BYTES if remaining is None else min(CHUNK_BYTES, remaining)
+        buf = fh.read(n) if n > 0 else b""
+        if remaining is not None:
+            remaining -= len(buf)
+        if not buf:
+            if rest:
+                yield rest
+            return
+        buf = rest + buf
+        cut = buf.rfind(b"\n") + 1
+        if cut == 0:
+            rest = buf
+            continue
+        rest = buf[cut:]
+        yield buf[:cut]
+
+
+def _parse_block(buf, filters, extra_cols=()):
+    # filtered DataFrame of one block: column 0 (stripped qseqid) plus requested columns
+    import pandas as pd
+    active = {k: v for k, v in filters.items() if v is not None}
+    cols = sorted({0, *extra_cols, *(FILTERS[k][0] for k in active)})
+    # fixed outfmt6 width: short lines are padded with NaN (failing any filter on
+    # a missing column) and extra fields ignored, so every non-blank line is
+    # still counted by its first field, as the line-by-line parsers did
+    df = pd.read_csv(io.BytesIO(buf), sep="\t", header=None, names=range(len(OUTFMT6)), usecols=cols,
+                     index_col=False, dtype={0: str}, keep_default_na=False,
+                     na_values={c: [""] for c in cols if c}, skip_blank_lines=True, engine="c")
+    keep = None
+    for k, thr in active.items():
+        col, op = FILTERS[k]
+        vals = pd.to_numeric(df[col], errors="coerce")
+        ok = vals >= thr if op == "ge" else vals <= thr
+        keep = ok if keep is None else keep & ok
+    if keep is not None:
+        df = df.loc[keep]
+    df[0] = df[0].str.strip()
+    return df
+
+
+def _count_block(buf, filters):
+    return Counter(_parse_block(buf, filters)[0].value_counts(sort=False).to_dict())
+
+
+def _count_range(path, start, end, filters):
+    counts = Counter()
+    with open(path, "rb") as fh:
+        fh.seek(start)
+        for buf in _blocks(fh, end - start):
+            if buf.strip():
+                counts.update(_count_block(buf, filters))
+    return counts
+
+
+def _split_ranges(path, n):
+    # byte ranges ending on line boundaries
+    size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, "rb") as fh:
+        for i in range(1, n):
+            fh.seek(max(bounds[-1], size * i // n))
+            fh.readline()
+            pos = fh.tell()
+            if pos >= size:
+                break
+            if pos > bounds[-1]:
+                bounds.append(pos)
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _read_blocks(path):
+    opener = gzip.open if str(path).endswith(".gz") else open
+    with opener(path, "rb") as fh:
+        for buf in _blocks(fh):
+            if buf.strip():
+                yield buf
+
+
+def collect_hits(path, qids=None, min_pident=None, min_length=None, max_evalue=None, max_mismatch=None):
+    """{qseqid: [[sseqid, pident, length, mismatch, sstart, send, evalue], ...]}, optionally for `qids` only."""
+    c = HitCollector(qids, min_pident=min_pident, min_length=min_length,
+                     max_evalue=max_evalue, max_mismatch=max_mismatch)
+    for f in hit_files(path):
+        for buf in _read_blocks(f):
+            c.feed(buf)
+    return c.result()
+
+
+class HitCounter:
+    """count_hits() of newline-aligned outfmt6 blocks fed one at a time."""
+
+    def __init__(self, **filters):
+        self.filters = {k: filters.get(k) for k in FILTERS}
+        self.counts = Counter()
+
+    def feed(self, buf):
+        if buf.strip():
+            self.counts.update(_count_block(buf, self.filters))
+
+    def result(self):
+        return dict(self.counts)
+
+
+class HitCollector:
+    """collect_hits() of newline-aligned outfmt6 blocks fed one at a time."""
+
+    def __init__(self, qids=None, **filters):
+        self.qids = qids
+        self.filters = {k: filters.get(k) for k in FILTERS}
+        self.hits = {}
+
+    def feed(self, buf):
+        if not buf.strip():
+            return
+        cols = [1, 2, 3, 4, 8, 9, 10]
+        df = _parse_block(buf, self.filters, cols)
+        if self.qids is not None:
+            df = df[df[0].isin(self.qids)]
+        for rec in df[[0] + cols].itertuples(index=False, name=None):
+            self.hits.setdefault(rec[0], []).append(list(rec[1:]))
+
+    def result(self):
+        return self.hits
+
+
+def merge_counts(parts):
+    """Sum of per-shard {qseqid: count} dicts."""
+    counts = Counter()
+    for c in parts:
+        counts.update(c)
+    return dict(counts)
+
+
+def merge_hits(parts):
+    """Union of per-shard {qseqid: [hits]} dicts."""
+    hits = {}
+    for part in parts:
+        for q, h in part.items():
+            hits.setdefault(q, []).extend(h)
+    return hits
+
+
+def _count_file(path, filters):
+    if path.endswith(".gz"):
+        counts = Counter()
+        for buf in _read_blocks(path):
+            counts.update(_count_block(buf, filters))
+        return counts
+    return _count_range(path, 0, os.path.getsize(path), filters)
+
+
+def count_hits(path, min_pident=None, min_length=None, max_evalue=None, max_mismatch=None, workers=1):
+    """{qseqid: number of hit lines passing the filters}; missing filters are not applied."""
+    filters = {"min_pident": min_pident, "min_length": min_length,
+               "max_evalue": max_evalue, "max_mismatch": max_mismatch}
+    files = hit_files(path)
+    if len(files) > 1:
+        # fan shard files back in, one file per task
+        counts = Counter()
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(files))) as ex:
+                for c in ex.map(_count_file, files, [filters] * len(files)):
+                    counts.update(c)
+        else:
+            for f in files:
+                counts.update(_count_file(f, filters))
+        return dict(counts)
+    path = files[0]
+    if path.endswith(".gz"):
+        counts = Counter()
+        for buf in _read_blocks(path):
+            counts.update(_count_block(buf, filters))
+        return dict(counts)
+    ranges = _split_ranges(path, max(1, workers))
+    if len(ranges) == 1:
+        return dict(_count_range(path, *ranges[0], filters))
+    counts = Counter()
+    with ProcessPoolExecutor(max_workers=len(ranges)) as ex:
+        for c in ex.map(_count_range, [path] * len(ranges), [s for s, _ in ranges],
+                        [e for _, e in ranges], [filters] * len(ranges)):
+            counts.update(c)
+    return dict(counts)
@@ -0,0 +1,60 @@
+"""`aso-cas13`: one command line for every pipeline stage.
+
+    aso-cas13 filter-candidates --dedup
+    aso-cas13 locus-windows + filter-candidates + parse-blast-genome --engine kmer
+    aso-cas13 run 12_stringent_final_sets     # run_pipeline.py
+    aso-cas13 bench --preset quick            # run_benchmarks.py
+
+A command is a script name without its number, with hyphens (the numbered
+name, e.g. 02_filter_candidates, works too), followed by that script's own
+options. Stages joined by `+` run one after the other in this process, so
+Python, numpy and any library a stage loaded (pandas, ViennaRNA) start
+once; the chain stops at the first stage that fails. Only the modules of the
+requested commands are imported.
+"""
+import importlib, sys
+
+from aso_cas13.stages import COMMANDS, resolve, run
+
+TOOLS = {
+    "run": ("aso_cas13.pipeline", "run the stages in dependency order, skipping up-to-date ones (run_pipeline.py)"),
+    "bench": ("aso_cas13.benchmark", "time every stage on synthetic inputs (run_benchmarks.py)"),
+}
+
+
+def usage():
+    lines = ["usage: aso-cas13 <command> [options] [+ <command> [options] ...]", "", "stages:"]
+    lines += [f"  {c:26s}{s}.py" for c, s in COMMANDS.items()]
+    lines += ["", "other commands:"] + [f"  {c:26s}{help}" for c, (_, help) in TOOLS.items()]
+    return "\n".join(lines)
+
+
+def split_chain(argv):
+    """[[command, *options], ...] of arguments joined by `+`."""
+    chain = [[]]
+    for x in argv:
+        if x == "+":
+            chain.append([])
+        else:
+            chain[-1].append(x)
+    return [c for c in chain if c]
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] in ("-h", "--help"):
+        print(usage(), file=sys.stdout if argv else sys.stderr)
+        return 0 if argv else 2
+    if argv[0] in TOOLS:
+        sys.argv = [f"aso-cas13 {argv[0]}", *argv[1:]]
+        return importlib.import_module(TOOLS[argv[0]][0]).main(argv[1:])
+    chain = split_chain(argv)
+    for cmd, *_ in chain:
+        try:
+            resolve(cmd)
+        except KeyError:
+            print(f"aso-cas13: unknown command {cmd!r}\n\n{usage()}", file=sys.stderr)
+            return 2
+    for cmd, *options in chain:
+        run(cmd, options)
+    return 0
@@ -0,0 +1,165 @@
+"""Figure rendering for 05_visualize_candidates.py and 13_visualize_integrated.py.
+
+A script loads its tables once and describes each figure as a `Figure`: the
+output name, a render function of this module, the small frames it plots
+and the plot options. `render_all()` hashes each figure's frames, options
+and this module's source. Figures whose hash and PNG are unchanged since
+the last run (`outputs/cache/figures.json`) are skipped. The rest are
+rendered concurrently in worker processes with the Agg backend; matplotlib
+and seaborn are imported only there.
+
+Scatter plots of more than `max_points` rows per group are drawn as hexbin
+density panels (or a random sample of the points), so millions of windows
+render in about the time of a histogram.
+"""
+import hashlib, json, os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+CACHE = Path("outputs/cache/figures.json")
+COLORS = {"ASO": "#1f77b4", "Cas13": "#d62728"}
+MAX_POINTS = 50_000
+
+Figure = namedtuple("Figure", "name render frames options")
+
+
+def _agg():
+    import matplotlib
+    matplotlib.use("Agg")
+
+
+def _save(plt, out, dpi):
+    plt.tight_layout()
+    plt.savefig(out, dpi=dpi)
+    plt.close()
+
+
+def hist_pair(out, dpi, frames, col, bins, xlabel, title):
+    """Overlaid histograms of `col` for ASO and Cas13."""
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    plt.figure(figsize=(8,5))
+    for typ, df in frames.items():
+        sns.histplot(df[col], color=COLORS[typ], bins=bins, alpha=0.5, kde=False, label=typ)
+    plt.xlabel(xlabel)
+    plt.ylabel("Count")
+    plt.title(title)
+    plt.legend()
+    _save(plt, out, dpi)
+
+
+def scatter_pair(out, dpi, frames, x, y, xlabel, ylabel, title, mode="auto", max_points=MAX_POINTS):
+    """`y` vs `x` for ASO and Cas13; `mode` auto|points|hexbin|sample."""
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    n = max(len(df) for df in frames.values())
+    if mode == "auto":
+        mode = "points" if n <= max_points else "hexbin"
+    if mode == "hexbin":
+        fig, axes = plt.subplots(1, len(frames), figsize=(9,5), sharex=True, sharey=True, squeeze=False)
+        for ax, (typ, df) in zip(axes[0], frames.items()):
+            d = df[[x, y]].dropna()
+            hb = ax.hexbin(d[x], d[y], gridsize=60, bins="log", mincnt=1, cmap="Blues" if typ == "ASO" else "Reds")
+            fig.colorbar(hb, ax=ax, label="Windows (log)")
+            ax.set_title(f"{typ} (n={len(d):,})")
+            ax.set_xlabel(xlabel)
+        axes[0][0].set_ylabel(ylabel)
+        fig.suptitle(title)
+        _save(plt, out, dpi)
+        return
+    plt.figure(figsize=(9,5))
+    for typ, df in frames.items():
+        if mode == "sample" and len(df) > max_points:
+            df = df.sample(max_points, random_state=0)
+        sns.scatterplot(x=x, y=y, data=df, color=COLORS[typ], s=40, label=typ)
+    plt.xlabel(xlabel)
+    plt.ylabel(ylabel)
+    plt.title(title if mode == "points" or n <= max_points else f"{title} (sample of {max_points:,} per type)")
+    plt.legend()
+    _save(plt, out, dpi)
+
+
+def top_bar(out, dpi, frames, y, ylabel, title):
+    """Grouped bars of the `combo` frame (label, `y`, group)."""
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    plt.figure(figsize=(12,6))
+    sns.barplot(data=frames["combo"], x="label", y=y, hue="group", palette=[COLORS["ASO"], COLORS["Cas13"]])
+    plt.xticks(rotation=60, ha="right")
+    plt.xlabel("Candidate (type_transcript_win_start_win_end)")
+    plt.ylabel(ylabel)
+    plt.title(title)
+    _save(plt, out, dpi)
+
+
+def ensure_numeric(frame, cols):
+    """Coerce `cols` that did not load as numbers (stray text becomes NaN)."""
+    import pandas as pd
+    for col in cols:
+        if frame[col].dtype == object:
+            frame[col] = pd.to_numeric(frame[col], errors="coerce")
+    return frame
+
+
+def top10_combo(frames, score):
+    """Top 10 of each type by `score`, labelled type_transcript_win_start_win_end."""
+    import pandas as pd
+    parts = []
+    for typ, df in frames.items():
+        top = df.sort_values(score, ascending=False).head(10).copy()
+        # type/transcript_id load as categoricals from Parquet/Feather
+        top["label"] = (top["type"].astype(str) + "_" + top["transcript_id"].astype(str) + "_"
+                        + top["win_start"].astype(str) + "_" + top["win_end"].astype(str))
+        parts.append(top[["label", score]].assign(group=typ))
+    return pd.concat(parts, ignore_index=True)
+
+
+def _render(fig, out, dpi):
+    _agg()
+    globals()[fig.render](out, dpi, fig.frames, **fig.options)
+    return fig.name
+
+
+def figure_key(fig, dpi):
+    import pandas as pd
+    h = hashlib.sha1(Path(__file__).read_bytes())
+    h.update(json.dumps([fig.name, fig.render, fig.options, dpi], sort_keys=True).encode())
+    for key, df in fig.frames.items():
+        h.update(json.dumps([key, [str(c) for c in df.columns], [str(t) for t in df.dtypes]]).encode())
+        h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def render_all(figs, fig_dir="outputs/figures", dpi=300, workers=None, cache=CACHE, force=False):
+    """Render stale `figs` into `fig_dir`; returns {name: 'rendered' | 'cached'}."""
+    fig_dir, cache = Path(fig_dir), Path(cache)
+    fig_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        memo = json.loads(cache.read_text()) if cache.exists() else {}
+    except ValueError:
+        memo = {}
+    status, todo = {}, []
+    for fig in figs:
+        out = fig_dir / fig.name
+        key = figure_key(fig, dpi)
+        m = memo.get(str(out))
+        if not force and m and m["key"] == key and out.exists() and out.stat().st_size == m["bytes"]:
+            status[fig.name] = "cached"
+        else:
+            todo.append((fig, out, key))
+    workers = min(len(todo), workers or os.cpu_count() or 1)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_agg) as ex:
+            list(ex.map(_render, *zip(*((f, o, dpi) for f, o, _ in todo))))
+    else:
+        for fig, out, _ in todo:
+            _render(fig, out, dpi)
+    for fig, out, key in todo:
+        memo[str(out)] = {"key": key, "bytes": out.stat().st_size}
+        status[fig.name] = "rendered"
+    cache.parent.mkdir(parents=True, exist_ok=True)
+    tmp = cache.with_name(cache.name + ".tmp")
+    tmp.write_text(json.dumps(memo, indent=1))
+    os.replace(tmp, cache)
+    return status
@@ -0,0 +1,102 @@
+"""In-process RNA folding through the ViennaRNA Python bindings.
+
+Each unique sequence is folded once (MFE, MFE structure and ensemble free
+energy) in a process pool. Results are memoized in an SQLite cache keyed by
+sequence and the ViennaRNA parameter set (version, temperature, dangles,
+parameter file), so re-runs only fold sequences they have not seen.
+"""
+import json, os, sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+DEFAULT_CACHE = Path("outputs/cache/rnafold.sqlite")
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS folds (
+    seq TEXT NOT NULL, params TEXT NOT NULL,
+    mfe REAL, structure TEXT, ensemble REAL,
+    PRIMARY KEY (seq, params)
+) WITHOUT ROWID;
+"""
+QUERY_BATCH = 500
+
+
+def param_key(temperature=37.0, dangles=2, param_file=None):
+    import RNA
+    return json.dumps({"vienna": RNA.__version__, "temperature": temperature, "dangles": dangles,
+                       "param_file": str(param_file) if param_file else None}, sort_keys=True)
+
+
+_md = None
+
+
+def _init_worker(temperature, dangles, param_file):
+    global _md
+    import RNA
+    if param_file:
+        RNA.params_load(str(param_file))
+    _md = RNA.md()
+    _md.temperature = temperature
+    _md.dangles = dangles
+
+
+def _fold(seq):
+    import RNA
+    fc = RNA.fold_compound(seq.upper().replace("T", "U"), _md)
+    structure, mfe = fc.mfe()
+    fc.exp_params_rescale(mfe)
+    _, ensemble = fc.pf()
+    return seq, mfe, structure, ensemble
+
+
+class FoldCache:
+    def __init__(self, path=DEFAULT_CACHE, params=""):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.params = params
+        self.con = sqlite3.connect(self.path)
+        self.con.executescript(SCHEMA)
+
+    def close(self):
+        self.con.commit()
+        self.con.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def get_many(self, seqs):
+        seqs = sorted(set(seqs))
+        out = {}
+        for i in range(0, len(seqs), QUERY_BATCH):
+            part = seqs[i:i + QUERY_BATCH]
+            marks = ",".join("?" * len(part))
+            for seq, mfe, structure, ens in self.con.execute(
+                    f"SELECT seq, mfe, structure, ensemble FROM folds WHERE params = ? AND seq IN ({marks})",
+                    (self.params, *part)):
+                out[seq] = (mfe, structure, ens)
+        return out
+
+    def put_many(self, results):
+        self.con.executemany("INSERT OR REPLACE INTO folds VALUES (?,?,?,?,?)",
+                             [(s, self.params, *v) for s, v in results.items()])
+        self.con.commit()
+
+
+def fold_many(seqs, cache_path=DEFAULT_CACHE, workers=None, temperature=37.0, dangles=2, param_file=None):
+    """{seq: (mfe, structure, ensemble_energy)}; each unique sequence is folded at most once."""
+    seqs = {s.strip().upper() for s in seqs if s and s.strip()}
+    with FoldCache(cache_path, param_key(temperature, dangles, param_file)) as cache:
+        results = cache.get_many(seqs)
+        todo = sorted(seqs - results.keys())
+        if todo:
+            workers = workers or os.cpu_count() or 1
+            fresh = {}
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(temperature, dangles, param_file)) as ex:
+                for seq, mfe, structure, ens in ex.map(_fold, todo, chunksize=max(1, len(todo) // (4 * workers))):
+                    fresh[seq] = (mfe, structure, ens)
+            cache.put_many(fresh)
+            results.update(fresh)
+    return results
@@ -0,0 +1,187 @@
+"""Persistent compiled GTF annotation index.
+
+The GTF is parsed once into `<gtf>.idx.sqlite` (one row per feature, B-tree
+indexes on gene and transcript), stamped with the GTF's size and mtime. Later
+runs query any gene's transcripts/features in O(log n) without re-parsing
+attribute strings.
+"""
+import os, sqlite3
+from pathlib import Path
+
+from aso_cas13.refstore import norm_chr
+
+FORMAT_VERSION = 1
+BATCH = 50000
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE features (
+    gene_name TEXT, gene_id TEXT, transcript_id TEXT, chr TEXT,
+    feature TEXT, start INTEGER, end INTEGER, strand TEXT
+);
+"""
+INDEXES = """
+CREATE INDEX ix_gene ON features (gene_name, feature);
+CREATE INDEX ix_tx ON features (transcript_id, feature);
+CREATE INDEX ix_pos ON features (chr, start);
+"""
+
+
+def index_path(gtf):
+    gtf = Path(gtf)
+    return gtf.with_name(gtf.name + ".idx.sqlite")
+
+
+def _source_stamp(gtf):
+    st = Path(gtf).stat()
+    return {"version": str(FORMAT_VERSION), "size": str(st.st_size), "mtime_ns": str(st.st_mtime_ns)}
+
+
+def parse_attrs(attrs):
+    at = {}
+    for kv in attrs.split(";"):
+        kv = kv.strip()
+        if not kv: continue
+        if " " in kv:
+            k, v = kv.split(" ", 1)
+            at[k] = v.strip().strip('"')
+    return at
+
+
+def iter_gtf(gtf):
+    with open(gtf) as f:
+        for line in f:
+            if line.startswith("#"): continue
+            parts = line.rstrip("\n").split("\t")
+            if len(parts) < 9: continue
+            chrom, src, feature, start, end, score, strand, frame, attrs = parts
+            at = parse_attrs(attrs)
+            yield (at.get("gene_name") or at.get("gene"), at.get("gene_id"), at.get("transcript_id"),
+                   norm_chr(chrom), feature, int(start), int(end), strand)
+
+
+def build(gtf):
+    """Compile `gtf` into its SQLite index; returns the index path."""
+    out = index_path(gtf)
+    tmp = out.with_name(out.name + ".tmp")
+    if tmp.exists():
+        tmp.unlink()
+    con = sqlite3.connect(tmp)
+    try:
+        con.executescript("PRAGMA journal_mode=OFF; PRAGMA synchronous=OFF;" + SCHEMA)
+        batch = []
+        for rec in iter_gtf(gtf):
+            batch.append(rec)
+            if len(batch) >= BATCH:
+                con.executemany("INSERT INTO features VALUES (?,?,?,?,?,?,?,?)", batch)
+                batch = []
+        if batch:
+            con.executemany("INSERT INTO features VALUES (?,?,?,?,?,?,?,?)", batch)
+        con.executescript(INDEXES)
+        con.executemany("INSERT INTO meta VALUES (?,?)", _source_stamp(gtf).items())
+        con.commit()
+    finally:
+        con.close()
+    os.replace(tmp, out)
+    return out
+
+
+def is_current(gtf):
+    out = index_path(gtf)
+    if not out.exists():
+        return False
+    try:
+        con = sqlite3.connect(f"file:{out}?mode=ro", uri=True)
+        try:
+            meta = dict(con.execute("SELECT key, value FROM meta"))
+        finally:
+            con.close()
+    except sqlite3.Error:
+        return False
+    return meta == _source_stamp(gtf)
+
+
+class GtfIndex:
+    def __init__(self, gtf):
+        self.path = index_path(gtf)
+        self.con = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+
+    def close(self):
+        self.con.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def genes(self):
+        return [g for (g,) in self.con.execute(
+            "SELECT DISTINCT gene_name FROM features WHERE gene_name IS NOT NULL ORDER BY gene_name")]
+
+    def transcripts(self, gene):
+        return [t for (t,) in self.con.execute(
+            "SELECT DISTINCT transcript_id FROM features WHERE gene_name = ? AND transcript_id IS NOT NULL "
+            "ORDER BY transcript_id", (gene,))]
+
+    def genes_of(self, transcript_ids):
+        """{transcript_id: gene_name} for the given transcripts."""
+        out = {}
+        tids = sorted(set(transcript_ids))
+        for i in range(0, len(tids), 500):
+            part = tids[i:i + 500]
+            marks = ",".join("?" * len(part))
+            out.update(self.con.execute(
+                f"SELECT DISTINCT transcript_id, gene_name FROM features WHERE transcript_id IN ({marks})", part))
+        return out
+
+    def features(self, gene, feature_types=("three_prime_utr", "exon")):
+        """(chr, start, end, strand, transcript_id) for a gene's features, in GTF order."""
+        marks = ",".join("?" * len(feature_types))
+        return self.con.execute(
+            f"SELECT chr, start, end, strand, transcript_id FROM features "
+            f"WHERE gene_name = ? AND feature IN ({marks}) AND transcript_id IS NOT NULL ORDER BY rowid",
+            (gene, *feature_types)).fetchall()
+
+    def features_on(self, chroms, feature_types=("three_prime_utr", "exon")):
+        """(chr, start, end, strand, transcript_id) for all features on `chroms`, in GTF order."""
+        chroms, marks = sorted(chroms), ",".join("?" * len(feature_types))
+        cmarks = ",".join("?" * len(chroms))
+        return self.con.execute(
+            f"SELECT chr, start, end, strand, transcript_id FROM features "
+            f"WHERE chr IN ({cmarks}) AND feature IN ({marks}) AND transcript_id IS NOT NULL "
+            f"ORDER BY rowid",
+            (*chroms, *feature_types)).fetchall()
+
+    def iter_genes(self, feature_types=("three_prime_utr", "exon")):
+        """(gene_name, [(chr, start, end, strand, transcript_id), ...]) for every gene, by name.
+
+        Streams from one cursor, so only one gene's features are in memory at a time.
+        """
+        marks = ",".join("?" * len(feature_types))
+        cur = self.con.execute(
+            f"SELECT gene_name, chr, start, end, strand, transcript_id FROM features "
+            f"WHERE gene_name IS NOT NULL AND feature IN ({marks}) AND transcript_id IS NOT NULL "
+            f"ORDER BY gene_name, rowid", feature_types)
+        gene, feats = None, []
+        for g, *f in cur:
+            if g != gene:
+                if feats:
+                    yield gene, feats
+                gene, feats = g, []
+            feats.append(tuple(f))
+        if feats:
+            yield gene, feats
+
+    def transcript_features(self, transcript_id, feature_types=("exon",)):
+        marks = ",".join("?" * len(feature_types))
+        return self.con.execute(
+            f"SELECT chr, start, end, strand, feature FROM features "
+            f"WHERE transcript_id = ? AND feature IN ({marks}) ORDER BY start",
+            (transcript_id, *feature_types)).fetchall()
+
+
+def open_index(gtf):
+    """Open the compiled index for `gtf`, (re)building it if missing or stale."""
+    if not is_current(gtf):
+        build(gtf)
+    return GtfIndex(gtf)
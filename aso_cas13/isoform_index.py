@@ -0,0 +1,136 @@
+"""Isoform conservation index over spliced transcript sequences.
+
+For a set of genes, every transcript is spliced from its GTF exons and the
+reference, and all of its windows of the design lengths are 2-bit encoded into
+sorted k-mer arrays (k-mer -> transcript). A candidate window is then answered
+by binary search, for all windows at once; with `max_mm=1` the 3 * w
+single-base variants of each query are looked up the same way. Indexes are
+cached under `outputs/cache/isoforms/`, keyed by the GTF and reference stamps,
+the gene set and the window lengths.
+"""
+import hashlib, json, os
+from pathlib import Path
+
+import numpy as np
+
+from aso_cas13.refstore import rc
+from aso_cas13.windows import WINDOW_TYPES
+
+DEFAULT_CACHE = Path("outputs/cache/isoforms")
+_ENC = np.full(256, 4, dtype=np.uint64)
+for _i, _b in enumerate("ACGT"):
+    _ENC[ord(_b)] = _i
+    _ENC[ord(_b.lower())] = _i
+
+
+def _encode_windows(seq, w):
+    # (k-mer codes, valid mask) of every length-w window of seq; w <= 32
+    codes = _ENC[np.frombuffer(seq.upper().encode("ascii"), dtype=np.uint8)]
+    n = len(codes) - w + 1
+    if n <= 0:
+        return np.empty(0, np.uint64), np.empty(0, bool)
+    val = np.zeros(n, dtype=np.uint64)
+    bad = np.zeros(n, dtype=bool)
+    for j in range(w):
+        c = codes[j:j + n]
+        bad |= c == 4
+        val = (val << np.uint64(2)) | (c & np.uint64(3))
+    return val, ~bad
+
+
+def spliced_transcripts(ann, ref, genes):
+    """{transcript_id: spliced sequence in transcript orientation} for `genes`."""
+    out = {}
+    for g in genes:
+        for tid in ann.transcripts(g):
+            exons = ann.transcript_features(tid, ("exon",))
+            if not exons:
+                continue
+            seq = "".join(ref.fetch(ch, s, e, "+") for ch, s, e, strand, _ in exons)
+            out[tid] = rc(seq) if exons[0][3] == "-" else seq
+    return out
+
+
+def _stamp(path):
+    st = Path(path).stat()
+    return [str(path), st.st_size, st.st_mtime_ns]
+
+
+class IsoformIndex:
+    def __init__(self, transcripts, kmers):
+        self.transcripts = transcripts  # index -> transcript id
+        self.kmers = kmers  # w -> (sorted codes, transcript index per code)
+
+    @classmethod
+    def build(cls, ann, ref, genes, widths=tuple(w for _, w in WINDOW_TYPES)):
+        seqs = spliced_transcripts(ann, ref, genes)
+        tids = sorted(seqs)
+        kmers = {}
+        for w in widths:
+            codes, owners = [], []
+            for ti, tid in enumerate(tids):
+                val, ok = _encode_windows(seqs[tid], w)
+                val = np.unique(val[ok])  # a transcript counts once per window sequence
+                codes.append(val)
+                owners.append(np.full(len(val), ti, dtype=np.int32))
+            c = np.concatenate(codes) if codes else np.empty(0, np.uint64)
+            o = np.concatenate(owners) if owners else np.empty(0, np.int32)
+            order = np.argsort(c, kind="stable")
+            kmers[w] = (c[order], o[order])
+        return cls(tids, kmers)
+
+    def save(self, path):
+        arrays = {}
+        for w, (c, o) in self.kmers.items():
+            arrays[f"codes_{w}"], arrays[f"owners_{w}"] = c, o
+        tmp = Path(path).with_name(Path(path).stem + f".{os.getpid()}.tmp.npz")
+        np.savez(tmp, transcripts=np.array(self.transcripts, dtype=object).astype(str), **arrays)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        z = np.load(path)
+        kmers = {int(k.split("_")[1]): (z[k], z["owners_" + k.split("_")[1]]) for k in z.files if k.startswith("codes_")}
+        return cls(z["transcripts"].tolist(), kmers)
+
+    def transcripts_for(self, seqs, max_mm=0):
+        """[set of transcript ids containing each sequence (<= max_mm mismatches)]."""
+        out = [set() for _ in seqs]
+        by_w = {}
+        for i, s in enumerate(seqs):
+            by_w.setdefault(len(s), []).append(i)
+        for w, idx in by_w.items():
+            if w not in self.kmers or max_mm > 1:
+                raise ValueError(f"no index for length {w} / max_mm {max_mm} (supports 0 or 1)")
+            codes, owners = self.kmers[w]
+            q, ok = zip(*[_encode_windows(seqs[i], w) for i in idx])
+            q = np.array([v[0] if len(v) else 0 for v in q], dtype=np.uint64)
+            valid = np.array([len(v) > 0 and v[0] for v in ok], dtype=bool)
+            qs, qi = [q], [np.arange(len(q))]
+            if max_mm == 1:
+                shifts = np.uint64(2) * np.arange(w, dtype=np.uint64)
+                for d in (1, 2, 3):
+                    var = q[:, None] ^ (np.uint64(d) << shifts)[None, :]
+                    qs.append(var.ravel())
+                    qi.append(np.repeat(np.arange(len(q)), w))
+            qs, qi = np.concatenate(qs), np.concatenate(qi)
+            lo = np.searchsorted(codes, qs, side="left")
+            hi = np.searchsorted(codes, qs, side="right")
+            for j in np.flatnonzero(hi > lo).tolist():
+                k = int(qi[j])
+                if valid[k]:
+                    out[idx[k]].update(self.transcripts[t] for t in owners[lo[j]:hi[j]].tolist())
+        return out
+
+
+def open_isoform_index(ann, ref, gtf, ref_fa, genes, cache_dir=DEFAULT_CACHE):
+    """Cached IsoformIndex for `genes` under the current annotation and reference."""
+    widths = [w for _, w in WINDOW_TYPES]
+    key = json.dumps({"gtf": _stamp(gtf), "ref": _stamp(ref_fa), "genes": sorted(genes), "widths": widths})
+    path = Path(cache_dir) / f"{hashlib.sha1(key.encode()).hexdigest()}.npz"
+    if path.exists():
+        return IsoformIndex.load(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    index = IsoformIndex.build(ann, ref, genes, widths)
+    index.save(path)
+    return index
@@ -0,0 +1,191 @@
+"""Per-stage performance metrics as JSON lines.
+
+A stage script creates one `StageMetrics` after its imports and marks its
+phases (`load`, `compute`, `write`) as it goes. Each phase records wall and CPU
+time, resident and peak RSS, bytes read and written (psutil I/O counters)
+and the rows the script reports for it. When the script exits, one JSON
+line per run is appended to `outputs/logs/metrics.jsonl`.
+
+Environment:
+  ASO_CAS13_METRICS   path of the JSON-lines file, or 0 to disable
+  ASO_CAS13_PROFILE   1: also run cProfile over the stage, writing
+                      outputs/logs/<stage>.prof and a top-30 text summary
+  ASO_CAS13_RUN_ID    groups the stages of one pipeline run (set by run_pipeline.py)
+  ASO_CAS13_STAGE     stage name to record instead of the script's own (set by run_pipeline.py)
+
+    python -m aso_cas13.metrics [metrics.jsonl]   # latest record per stage as a table
+"""
+import atexit, json, os, resource, sys, time
+from pathlib import Path
+
+DEFAULT_PATH = Path("outputs/logs/metrics.jsonl")
+LOG_DIR = Path("outputs/logs")
+
+
+def _io(proc):
+    try:
+        c = proc.io_counters()
+    except (AttributeError, OSError):
+        return 0, 0
+    # read_chars/write_chars (Linux) include page-cache hits, which is what a stage actually moves
+    return getattr(c, "read_chars", c.read_bytes), getattr(c, "write_chars", c.write_bytes)
+
+
+def vm_hwm_mb(pid="self"):
+    """Peak RSS (VmHWM) of a process from /proc, or None off Linux.
+
+    Unlike ru_maxrss, which a fork+exec child inherits from its parent, VmHWM
+    starts again at exec, so a stage launched by the runner, the benchmark or a
+    pool reports its own peak.
+    """
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024  # kB
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def _peak_rss_mb(who=resource.RUSAGE_SELF):
+    if who == resource.RUSAGE_SELF:
+        hwm = vm_hwm_mb()
+        if hwm is not None:
+            return hwm
+    peak = resource.getrusage(who).ru_maxrss
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024  # bytes on macOS, KiB elsewhere
+
+
+class StageMetrics:
+    _started_before = False  # a stage already ran in this process (aso-cas13 a + b)
+
+    def __init__(self, stage, path=None):
+        import psutil
+        setting = os.environ.get("ASO_CAS13_METRICS", "")
+        self.enabled = setting != "0"
+        self.path = Path(path or setting or DEFAULT_PATH)
+        self.stage = os.environ.get("ASO_CAS13_STAGE") or stage
+        self.proc = psutil.Process()
+        self.started = time.time()
+        # interpreter and imports; later stages of a chained run do not pay them again
+        self.startup_s = 0.0 if StageMetrics._started_before else round(self.started - self.proc.create_time(), 3)
+        StageMetrics._started_before = True
+        self.phases = []
+        self._current = None
+        self._profiler = None
+        if os.environ.get("ASO_CAS13_PROFILE", "") not in ("", "0"):
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        atexit.register(self.done)
+
+    def _snapshot(self):
+        cpu = self.proc.cpu_times()
+        rd, wr = _io(self.proc)
+        # children_* cover worker processes once they have been joined
+        cpu_s = cpu.user + cpu.system + getattr(cpu, "children_user", 0) + getattr(cpu, "children_system", 0)
+        return time.perf_counter(), cpu_s, rd, wr
+
+    def _close(self):
+        if self._current is None:
+            return
+        name, t0, c0, r0, w0 = self._current
+        t1, c1, r1, w1 = self._snapshot()
+        rec = self.phases[-1]
+        rec.update(wall_s=round(t1 - t0, 4), cpu_s=round(c1 - c0, 4),
+                   rss_mb=round(self.proc.memory_info().rss / (1 << 20), 1),
+                   peak_rss_mb=round(_peak_rss_mb(), 1),
+                   read_bytes=r1 - r0, write_bytes=w1 - w0)
+        self._current = None
+
+    def phase(self, name, rows_in=None, rows_out=None):
+        """End the current phase and start `name`."""
+        self._close()
+        self.phases.append({"phase": name, "rows_in": rows_in, "rows_out": rows_out})
+        self._current = (name, *self._snapshot())
+        return self
+
+    def rows(self, rows_in=None, rows_out=None):
+        """Add row counts to the current phase."""
+        rec = self.phases[-1]
+        if rows_in is not None:
+            rec["rows_in"] = (rec["rows_in"] or 0) + rows_in
+        if rows_out is not None:
+            rec["rows_out"] = (rec["rows_out"] or 0) + rows_out
+        return self
+
+    def record(self):
+        tot = {k: sum(p.get(k) or 0 for p in self.phases) for k in ("wall_s", "cpu_s", "read_bytes", "write_bytes")}
+        tot["wall_s"], tot["cpu_s"] = round(tot["wall_s"], 4), round(tot["cpu_s"], 4)
+        tot["peak_rss_mb"] = max((p.get("peak_rss_mb") or 0 for p in self.phases), default=0)
+        for k in ("rows_in", "rows_out"):
+            vals = [p[k] for p in self.phases if p.get(k) is not None]
+            tot[k] = sum(vals) if vals else None
+        tot["children_peak_rss_mb"] = round(_peak_rss_mb(resource.RUSAGE_CHILDREN), 1)
+        return {"stage": self.stage, "run_id": os.environ.get("ASO_CAS13_RUN_ID"), "pid": os.getpid(),
+                "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+                "startup_s": self.startup_s,
+                "argv": sys.argv[1:], "phases": self.phases, "total": tot}
+
+    def done(self):
+        if self._current is None and not self.phases:
+            return
+        self._close()
+        if self._profiler is not None:
+            self._dump_profile()
+        if self.enabled:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a") as f:  # one short append per run; safe across concurrent stages
+                f.write(json.dumps(self.record()) + "\n")
+        self.phases = []
+
+    def _dump_profile(self):
+        self._profiler.disable()
+        import io, pstats
+        LOG_DIR.mkdir(parents=True, exist_ok=True)
+        base = LOG_DIR / self.stage.replace(":", "_")
+        self._profiler.dump_stats(f"{base}.prof")
+        s = io.StringIO()
+        pstats.Stats(self._profiler, stream=s).sort_stats("cumulative").print_stats(30)
+        Path(f"{base}.prof.txt").write_text(s.getvalue())
+        self._profiler = None
+
+
+def load(path=DEFAULT_PATH, run_id=None):
+    """Latest record per stage (of `run_id`, if given)."""
+    latest = {}
+    path = Path(path)
+    if not path.exists():
+        return latest
+    with path.open() as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            if run_id is None or rec.get("run_id") == run_id:
+                latest[rec["stage"]] = rec
+    return latest
+
+
+def summarize(path=DEFAULT_PATH, run_id=None, out=None):
+    """{stage: totals}, optionally written as a run-summary JSON file."""
+    summary = {}
+    for stage, rec in sorted(load(path, run_id).items()):
+        phases = {}
+        for p in rec["phases"]:  # per-table loops repeat phase names; report their sum
+            phases[p["phase"]] = round(phases.get(p["phase"], 0) + (p.get("wall_s") or 0), 4)
+        summary[stage] = {**rec["total"], "started": rec["started"], "run_id": rec.get("run_id"), "phases": phases}
+    if out:
+        Path(out).parent.mkdir(parents=True, exist_ok=True)
+        Path(out).write_text(json.dumps(summary, indent=1))
+    return summary
+
+
+if __name__ == "__main__":
+    summary = summarize(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_PATH)
+    print(f"{'stage':32s} {'wall_s':>8s} {'cpu_s':>8s} {'peak_MB':>8s} {'read_MB':>8s} {'write_MB':>8s} {'rows_in':>9s} {'rows_out':>9s}")
+    for stage, t in summary.items():
+        print(f"{stage:32s} {t['wall_s']:8.3f} {t['cpu_s']:8.3f} {t['peak_rss_mb']:8.1f} "
+              f"{t['read_bytes'] / 1e6:8.2f} {t['write_bytes'] / 1e6:8.2f} {t['rows_in'] or '':>9} {t['rows_out'] or '':>9}")
@@ -0,0 +1,266 @@
+"""In-process genome-wide off-target search with a k-mer seed index.
+
+The index is built once from the packed reference store (see refstore):
+
+    <fasta>.kmer<k>.offsets.npy   4**k + 1 bucket offsets (counting sort by k-mer)
+    <fasta>.kmer<k>.pos.npy       genome positions sorted by k-mer
+    <fasta>.kmer<k>.json          source stamp and record layout
+
+Positions are "global" coordinates into the packed file (record byte offset * 4
++ position in record), so a hit is verified straight from the 2-bit mmap.
+
+Search is pigeonhole seed-and-extend: a query with at most `mm` mismatches has
+an exact seed among `mm + 1` non-overlapping pieces of length
+`min(k, len // (mm + 1))`. Because buckets are sorted by k-mer, every seed
+shorter than k maps to one contiguous block of buckets. The index holds only
+full k-mers, so the starts within k - 1 bases before an N block or a record
+end are kept apart (`SeedIndex.edge_pos`) and seeds are also matched against
+them directly. Both strands are covered by searching the query and its
+reverse complement against the forward index; a locus matched on both
+strands (a palindrome) is one hit. Candidates are verified against the
+reference (N counts as a mismatch).
+"""
+import json, os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from aso_cas13.refstore import is_current as ref_is_current
+from aso_cas13.refstore import build as ref_build
+from aso_cas13.refstore import rc, store_paths
+
+FORMAT_VERSION = 1
+K = 12
+BUILD_CHUNK = 1 << 25  # bases per k-mer pass while building
+VERIFY_CHUNK = 1 << 16  # candidate sites verified per vectorized step
+_ENC = np.full(256, 255, dtype=np.uint8)
+for _i, _b in enumerate("ACGT"):
+    _ENC[ord(_b)] = _i
+    _ENC[ord(_b.lower())] = _i
+
+
+def index_paths(fasta, k=K):
+    fasta = Path(fasta)
+    stem = f"{fasta.name}.kmer{k}"
+    return (fasta.with_name(stem + ".offsets.npy"), fasta.with_name(stem + ".pos.npy"),
+            fasta.with_name(stem + ".json"))
+
+
+def _layout(fasta):
+    _, idx_path = store_paths(fasta)
+    index = json.loads(idx_path.read_text())
+    return index["source"], [(n, index["seqs"][n]) for n in index["order"]]
+
+
+def _unpack(packed, g0, g1):
+    # 2-bit codes for global positions [g0, g1)
+    b = np.asarray(packed[g0 // 4:(g1 + 3) // 4])
+    codes = np.stack([(b >> 6) & 3, (b >> 4) & 3, (b >> 2) & 3, b & 3], axis=1).ravel()
+    return codes[g0 % 4:g0 % 4 + (g1 - g0)]
+
+
+def _record_chunks(records, k):
+    # (global base, record, chunk start, chunk end) covering all k-mer start positions
+    for name, meta in records:
+        n_kmers = meta["length"] - k + 1
+        for a in range(0, max(0, n_kmers), BUILD_CHUNK):
+            yield meta["offset"] * 4, meta, a, min(a + BUILD_CHUNK, n_kmers)
+
+
+def _edge_starts(packed, records, k):
+    """(global starts, codes) of the positions whose k-mer runs into an N block or the record end.
+
+    codes[:, j] is the base j after the start, 4 past the boundary; k - 1 columns,
+    so any seed shorter than k that starts there can be matched.
+    """
+    starts, codes = [np.zeros(0, np.int64)], [np.zeros((0, max(k - 1, 0)), np.uint8)]
+    for _, meta in records:
+        gbase, clean = meta["offset"] * 4, 0
+        for s, e in [*meta["n_blocks"], (meta["length"], meta["length"])]:
+            lo = max(s - k + 1, clean)
+            if lo < s:
+                c = np.full((s - lo, k - 1), 4, dtype=np.uint8)
+                seg = _unpack(packed, gbase + lo, gbase + s)
+                for j in range(min(k - 1, s - lo)):
+                    c[:s - lo - j, j] = seg[j:]
+                starts.append(np.arange(gbase + lo, gbase + s, dtype=np.int64))
+                codes.append(c)
+            clean = max(clean, e)
+    return np.concatenate(starts), np.concatenate(codes)
+
+
+def _chunk_kmers(packed, gbase, meta, a, b, k):
+    codes = _unpack(packed, gbase + a, gbase + b + k - 1).astype(np.uint32)
+    vals = np.zeros(b - a, dtype=np.uint32)
+    for j in range(k):
+        vals = (vals << 2) | codes[j:j + b - a]
+    ok = np.ones(b - a, dtype=bool)
+    for s, e in meta["n_blocks"]:
+        # k-mers starting in [s - k + 1, e) touch the N block
+        lo, hi = max(s - k + 1, a), min(e, b)
+        if lo < hi:
+            ok[lo - a:hi - a] = False
+    pos = np.arange(gbase + a, gbase + b, dtype=np.int64)
+    return vals[ok], pos[ok]
+
+
+def build(fasta, k=K):
+    """Build the k-mer seed index for `fasta` (and its packed store if needed)."""
+    if not ref_is_current(fasta):
+        ref_build(fasta)
+    off_path, pos_path, meta_path = index_paths(fasta, k)
+    data_path, _ = store_paths(fasta)
+    source, records = _layout(fasta)
+    packed = np.memmap(data_path, dtype=np.uint8, mode="r") if data_path.stat().st_size else np.zeros(0, np.uint8)
+    # pass 1: bucket sizes
+    counts = np.zeros(4 ** k, dtype=np.int64)
+    for gbase, meta, a, b in _record_chunks(records, k):
+        vals, _ = _chunk_kmers(packed, gbase, meta, a, b, k)
+        counts += np.bincount(vals, minlength=4 ** k)
+    offsets = np.zeros(4 ** k + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    total_bases = max((m["offset"] * 4 + m["length"] for _, m in records), default=0)
+    pos_dtype = np.uint32 if total_bases < 2 ** 32 else np.uint64
+    # pass 2: scatter positions into their buckets, keeping genome order within a bucket
+    tmp_pos = pos_path.with_name(pos_path.name + ".tmp.npy")
+    pos_out = np.lib.format.open_memmap(tmp_pos, mode="w+", dtype=pos_dtype, shape=(int(offsets[-1]),))
+    cursor = offsets[:-1].copy()
+    for gbase, meta, a, b in _record_chunks(records, k):
+        vals, pos = _chunk_kmers(packed, gbase, meta, a, b, k)
+        order = np.argsort(vals, kind="stable")
+        vals, pos = vals[order], pos[order]
+        first = np.searchsorted(vals, vals, side="left")
+        dest = cursor[vals] + (np.arange(len(vals)) - first)
+        pos_out[dest] = pos
+        uniq, n = np.unique(vals, return_counts=True)
+        cursor[uniq] += n
+    pos_out.flush()
+    del pos_out
+    os.replace(tmp_pos, pos_path)
+    np.save(off_path, offsets)
+    meta_path.write_text(json.dumps({"version": FORMAT_VERSION, "k": k, "source": source}))
+    return meta_path
+
+
+def is_current(fasta, k=K):
+    off_path, pos_path, meta_path = index_paths(fasta, k)
+    if not (off_path.exists() and pos_path.exists() and meta_path.exists() and ref_is_current(fasta)):
+        return False
+    try:
+        meta = json.loads(meta_path.read_text())
+    except (OSError, ValueError):
+        return False
+    source, _ = _layout(fasta)
+    return meta.get("version") == FORMAT_VERSION and meta.get("k") == k and meta.get("source") == source
+
+
+class SeedIndex:
+    def __init__(self, fasta, k=K):
+        off_path, pos_path, _ = index_paths(fasta, k)
+        data_path, _ = store_paths(fasta)
+        self.k = k
+        self.offsets = np.load(off_path, mmap_mode="r")
+        self.pos = np.load(pos_path, mmap_mode="r")
+        self.packed = (np.memmap(data_path, dtype=np.uint8, mode="r")
+                       if data_path.stat().st_size else np.zeros(0, np.uint8))
+        _, records = _layout(fasta)
+        self.names = [n for n, _ in records]
+        self.rec_start = np.array([m["offset"] * 4 for _, m in records], dtype=np.int64)
+        self.rec_end = np.array([m["offset"] * 4 + m["length"] for _, m in records], dtype=np.int64)
+        nb = [(m["offset"] * 4 + s, m["offset"] * 4 + e) for _, m in records for s, e in m["n_blocks"]]
+        self.n_start = np.array([s for s, _ in nb] or [np.iinfo(np.int64).max], dtype=np.int64)
+        self.n_end = np.array([e for _, e in nb] or [np.iinfo(np.int64).max], dtype=np.int64)
+        self.edge_pos, self.edge_codes = _edge_starts(self.packed, records, k)
+
+    def _seed_positions(self, codes):
+        s = len(codes)
+        val = 0
+        for c in codes.tolist():
+            val = (val << 2) | c
+        shift = 2 * (self.k - s)
+        lo, hi = self.offsets[val << shift], self.offsets[(val + 1) << shift]
+        found = np.asarray(self.pos[lo:hi], dtype=np.int64)
+        if s >= self.k or not len(self.edge_pos):
+            return found
+        # starts next to an N block or a record end have no full k-mer in the index
+        edge = self.edge_pos[(self.edge_codes[:, :s] == codes).all(axis=1)]
+        return np.concatenate([found, edge])
+
+    def _verify(self, q, starts, max_mm):
+        # mismatches of q against the reference at each global start
+        L = len(q)
+        rec = np.searchsorted(self.rec_start, starts, side="right") - 1
+        ok = (rec >= 0) & (starts >= self.rec_start[rec]) & (starts + L <= self.rec_end[rec])
+        starts, rec = starts[ok], rec[ok]
+        keep_s, keep_r, keep_m = [], [], []
+        for c0 in range(0, len(starts), VERIFY_CHUNK):
+            st = starts[c0:c0 + VERIFY_CHUNK]
+            g = st[:, None] + np.arange(L)
+            codes = (np.asarray(self.packed)[g // 4] >> (6 - 2 * (g % 4))) & 3
+            nb = np.searchsorted(self.n_start, g, side="right") - 1
+            in_n = (nb >= 0) & (g < self.n_end[np.maximum(nb, 0)])
+            mm = ((codes != q) | in_n).sum(axis=1)
+            sel = mm <= max_mm
+            keep_s.append(st[sel]); keep_r.append(rec[c0:c0 + VERIFY_CHUNK][sel]); keep_m.append(mm[sel])
+        if not keep_s:
+            return starts[:0], rec[:0], starts[:0]
+        return np.concatenate(keep_s), np.concatenate(keep_r), np.concatenate(keep_m)
+
+    def search(self, seq, max_mm):
+        """Hits of `seq` with <= max_mm mismatches as (chrom, start, strand, mismatches).
+
+        `start` is 1-based on the forward strand; strand "-" means the reverse
+        complement of `seq` matches there.
+        """
+        hits = {}  # (chrom, start) -> hit; a locus matched on both strands counts once
+        for strand, s in (("+", seq.upper()), ("-", rc(seq.upper()))):
+            q = _ENC[np.frombuffer(s.encode("ascii"), dtype=np.uint8)]
+            if (q == 255).any() or len(q) == 0:
+                continue  # ambiguous query bases never match exactly; skip like BLAST's N
+            seed = min(self.k, len(q) // (max_mm + 1))
+            if seed < 1:
+                continue
+            cand = [self._seed_positions(q[i * seed:(i + 1) * seed]) - i * seed for i in range(max_mm + 1)]
+            starts = np.unique(np.concatenate(cand))
+            starts, rec, mm = self._verify(q, starts, max_mm)
+            for st, r, m in zip(starts.tolist(), rec.tolist(), mm.tolist()):
+                locus = (self.names[r], st - int(self.rec_start[r]) + 1)
+                if locus not in hits or m < hits[locus][3]:
+                    hits[locus] = (*locus, strand, m)
+        return list(hits.values())
+
+
+def open_index(fasta, k=K):
+    if not is_current(fasta, k):
+        build(fasta, k)
+    return SeedIndex(fasta, k)
+
+
+_index = None
+
+
+def _init_worker(fasta, k):
+    global _index
+    _index = SeedIndex(fasta, k)
+
+
+def _count_batch(items, max_mm):
+    return {qid: len(_index.search(seq, max_mm)) for qid, seq in items}
+
+
+def count_offtargets(fasta, queries, max_mm, k=K, workers=None, batch=16):
+    """{query id: number of genomic hits with <= max_mm mismatches}.
+
+    `queries` maps id -> sequence. Counts include the intended target site, the
+    same way a BLAST hit list does; queries are searched in parallel batches.
+    """
+    open_index(fasta, k)
+    items = list(queries.items())
+    workers = workers or os.cpu_count() or 1
+    counts = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(str(fasta), k)) as ex:
+        futs = [ex.submit(_count_batch, items[i:i + batch], max_mm) for i in range(0, len(items), batch)]
+        for fu in futs:
+            counts.update(fu.result())
+    return counts
@@ -0,0 +1,112 @@
+"""Content-addressed off-target result cache.
+
+Results are keyed by (candidate sequence, reference build hash, search
+parameters) in one SQLite file, so a re-run with new windows or weights only
+searches sequences that were never searched against the same reference with the
+same settings. Each entry stores the hit count and, when known, the hit list.
+"""
+import hashlib, json, sqlite3
+from pathlib import Path
+
+DEFAULT_PATH = Path("outputs/cache/offtargets.sqlite")
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS offtargets (
+    seq TEXT NOT NULL, ref TEXT NOT NULL, params TEXT NOT NULL,
+    n_hits INTEGER NOT NULL, hits TEXT,
+    PRIMARY KEY (seq, ref, params)
+) WITHOUT ROWID;
+"""
+HASH_CHUNK = 16 << 20
+QUERY_BATCH = 500
+
+
+def reference_hash(fasta):
+    """SHA-1 of the reference FASTA, memoized next to it by size and mtime."""
+    fasta = Path(fasta)
+    memo = fasta.with_name(fasta.name + ".sha1.json")
+    st = fasta.stat()
+    stamp = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    if memo.exists():
+        try:
+            m = json.loads(memo.read_text())
+            if m.get("stamp") == stamp:
+                return m["sha1"]
+        except (OSError, ValueError, KeyError):
+            pass
+    h = hashlib.sha1()
+    with fasta.open("rb") as f:
+        for block in iter(lambda: f.read(HASH_CHUNK), b""):
+            h.update(block)
+    memo.write_text(json.dumps({"stamp": stamp, "sha1": h.hexdigest()}))
+    return h.hexdigest()
+
+
+def reference_key(ref=None, ref_build=None):
+    # An explicit build label wins (e.g. when BLAST ran against a remote db)
+    if ref_build:
+        return ref_build
+    if ref is None or not Path(ref).exists():
+        raise FileNotFoundError(f"reference {ref} not found; pass a reference build label instead")
+    return "sha1:" + reference_hash(ref)
+
+
+def params_key(params):
+    """Canonical key for search settings given as a dict or a free-form string."""
+    if isinstance(params, dict):
+        return json.dumps(params, sort_keys=True, separators=(",", ":"))
+    return str(params).strip()
+
+
+def blast_params(search_params, min_pident=None, min_length=None):
+    """Cache params of counts derived from BLAST output: every hit line (stage 04),
+    or summary counts of hits passing min_pident/min_length (04_summarize + 05).
+    The two are different numbers for the same search, so they never share entries."""
+    if min_pident is None and min_length is None:
+        return {"search": params_key(search_params), "count": "hit_lines"}
+    return {"search": params_key(search_params), "count": "filtered", "min_pident": min_pident, "min_length": min_length}
+
+
+class OffTargetCache:
+    def __init__(self, path=DEFAULT_PATH, ref="", params=""):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ref, self.params = ref, params_key(params)
+        self.con = sqlite3.connect(self.path)
+        self.con.executescript(SCHEMA)
+
+    def close(self):
+        self.con.commit()
+        self.con.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def get_many(self, seqs):
+        """{seq: (n_hits, hits or None)} for the cached subset of `seqs`."""
+        seqs = sorted({s.upper() for s in seqs})
+        out = {}
+        for i in range(0, len(seqs), QUERY_BATCH):
+            part = seqs[i:i + QUERY_BATCH]
+            marks = ",".join("?" * len(part))
+            for seq, n, hits in self.con.execute(
+                    f"SELECT seq, n_hits, hits FROM offtargets WHERE ref = ? AND params = ? AND seq IN ({marks})",
+                    (self.ref, self.params, *part)):
+                out[seq] = (n, json.loads(hits) if hits is not None else None)
+        return out
+
+    def misses(self, seqs):
+        cached = self.get_many(seqs)
+        return [s for s in seqs if s.upper() not in cached]
+
+    def put_many(self, results):
+        """Store {seq: n_hits} or {seq: (n_hits, hits)}; existing entries are replaced."""
+        rows = []
+        for seq, val in results.items():
+            n, hits = val if isinstance(val, tuple) else (val, None)
+            rows.append((seq.upper(), self.ref, self.params, int(n),
+                         json.dumps(hits) if hits is not None else None))
+        self.con.executemany("INSERT OR REPLACE INTO offtargets VALUES (?,?,?,?,?)", rows)
+        self.con.commit()
@@ -0,0 +1,445 @@
+"""Incremental runner for the numbered pipeline stages.
+
+Each stage declares the script it stands for, its arguments and the files it
+reads and writes (the paths hard-coded in the stages, plus those its
+arguments select: ARG_INPUTS, ARG_OUTPUTS). Stages form a DAG through those
+files and run as `python -m aso_cas13 <command>`, so an
+installed package needs no numbered scripts. A stage's key hashes its
+aso_cas13.stages module together with the aso_cas13 modules it imports, its
+arguments and the content of every input.
+A stage is skipped when the key is unchanged and its outputs still have the
+recorded hashes. Otherwise it runs, and only the stages downstream of an
+output that actually changed run after it. Independent stages run
+concurrently.
+
+Content hashes are memoized by size and mtime in the state file
+(`outputs/cache/pipeline_state.json`), so unchanged large inputs are not
+re-read. Stages run with a shared ASO_CAS13_RUN_ID, and the per-stage
+metrics they record (aso_cas13.metrics) are collected into
+`outputs/logs/run_summary.json`.
+"""
+import argparse, fnmatch, glob, hashlib, json, os, re, shlex, subprocess, sys, time, uuid
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from aso_cas13.stages import command, resolve
+
+Stage = namedtuple("Stage", "name script args inputs outputs")
+
+REF = "inputs/reference/chr19.fa"
+GTF = "inputs/reference/annotation.gtf"
+BED = "inputs/reference/DMPK_CTGrepeat_GRCh38.bed"
+GENOME = "inputs/reference/GRCh38.fa"  # default --ref of the off-target stages
+R, D, F = "outputs/results", "outputs/design", "outputs/figures"
+LOG_DIR = Path("outputs/logs")
+STATE = Path("outputs/cache/pipeline_state.json")
+RUN_SUMMARY = LOG_DIR / "run_summary.json"
+PKG_DIR = Path(__file__).resolve().parent
+PKG_ROOT = PKG_DIR.parent  # holds the aso_cas13 package; stages run as `python -m aso_cas13` from the project root
+HASH_CHUNK = 16 << 20
+PREFIX = {"ASO": "ASO_candidates", "Cas13": "Cas13_guides"}
+SHARD_GLOB = "[0-9][0-9][0-9]"  # <stem>.000<suffix>, ... of a sharded export (aso_cas13.shards)
+
+
+def _both(pattern):
+    return [pattern.format(typ=t, prefix=p) for t, p in PREFIX.items()]
+
+
+def _audit_targets():
+    # the files 00_audit_inputs.py reports on (its TARGETS list)
+    return ["outputs/reference/DMPK_ref_GRCh38.fasta",
+            *_both(D + "/{prefix}_final_grch38.tsv"), *_both(D + "/{prefix}_with_conservation.tsv"),
+            *_both(D + "/{prefix}_final_integrated.tsv"), *_both(D + "/{prefix}_final_stringent.tsv"),
+            *_both(R + "/{typ}_rnafold.txt"),
+            *(f"{F}/{n}.png" for n in ("integrated_score_vs_offtargets", "dG_distribution",
+                                       "accessibility_distribution", "top_candidates_integrated_barplot"))]
+
+
+def _option(argv, name, default=None):
+    # value of `name X` / `name=X` in a stage's arguments; the last one wins, as in argparse
+    val = default
+    for i, x in enumerate(argv):
+        if x == name and i + 1 < len(argv):
+            val = argv[i + 1]
+        elif x.startswith(name + "="):
+            val = x[len(name) + 1:]
+    return val
+
+
+def _genome_ref(argv):
+    # --engine kmer searches --ref; --cache hashes it unless --ref-build names the build
+    if _option(argv, "--engine") == "kmer" or (_option(argv, "--cache") and not _option(argv, "--ref-build")):
+        return [_option(argv, "--ref", GENOME)]
+    return []
+
+
+def _locus_inputs(argv):
+    # 01: --ref/--gtf, and the BED locus unless --screen (or --batch of --genes only) leaves it out
+    out = [_option(argv, "--ref", REF), _option(argv, "--gtf", GTF)]
+    bed = _option(argv, "--bed")
+    if bed or ("--screen" not in argv and not ("--batch" in argv and _option(argv, "--genes"))):
+        out.append(bed or BED)
+    return out
+
+
+def _export_outputs(argv):
+    # 03: <out>, or its shards; the sidecar map of a dedup/sharded export
+    out = _option(argv, "--out")
+    sharded = any(_option(argv, o) for o in ("--shards", "--seqs-per-shard", "--bases-per-shard"))
+    p = Path(out)
+    paths = [str(p.with_name(f"{p.stem}.{SHARD_GLOB}{p.suffix}")) if sharded else out]
+    if sharded or "--dedup" in argv or _option(argv, "--map"):
+        paths.append(_option(argv, "--map", f"{out}.ids.tsv"))
+    return paths
+
+
+def _tool_inputs(argv, results, cmd):
+    # per type: the tool's text output, or with `cmd` the query FASTA (or shards) it runs on; the sidecar map
+    out = []
+    for t, p in PREFIX.items():
+        k = "aso" if t == "ASO" else "cas"
+        if _option(argv, cmd):
+            out.append(_option(argv, f"--{k}-query", f"{R}/{p}.fa"))
+        else:
+            out.append(_option(argv, f"--{k}-{results[0]}", f"{R}/{t}_{results[1]}"))
+        if _option(argv, f"--{k}-map"):
+            out.append(_option(argv, f"--{k}-map"))
+    return out
+
+
+def _genome_inputs(argv):
+    # 04: BLAST hits (or the queries --blast-cmd runs on; --cache records them as searched), unless --engine kmer
+    out = []
+    if _option(argv, "--engine", "blast") == "blast":
+        out = _tool_inputs(argv, ("hits", "offtargets_grch38.txt"), "--blast-cmd")
+        if _option(argv, "--cache") and not _option(argv, "--blast-cmd"):
+            out += [_option(argv, f"--{k}-query", f"{R}/{p}.fa") for k, p in zip(("aso", "cas"), PREFIX.values())]
+    return out + _genome_ref(argv)
+
+
+def _fold_inputs(argv):
+    # 07: RNAfold text output, or the queries --rnafold-cmd runs on; --engine vienna folds in-process
+    if _option(argv, "--engine", "text") != "text":
+        return []
+    return _tool_inputs(argv, ("rnafold", "rnafold.txt"), "--rnafold-cmd")
+
+
+def _access_inputs(argv):
+    # 09: --engine plfold folds the target regions
+    return [_option(argv, "--regions", f"{R}/01_target_regions.tsv")] if _option(argv, "--engine") == "plfold" else []
+
+
+def _isoform_inputs(argv):
+    # 10: --engine index reads the reference and annotation, --engine windows the 01 window table
+    engine = _option(argv, "--engine")
+    if engine == "index":
+        return [_option(argv, "--ref", REF), _option(argv, "--gtf", GTF)]
+    if engine == "windows":
+        d = _option(argv, "--windows", R)
+        return [f"{d}/01_target_regions.tsv", f"{d}/01_target_windows.npy"]
+    return []
+
+
+# files that depend on a stage's arguments: stage (without :variant) -> fn(argv) -> paths or globs
+ARG_INPUTS = {"01_locus_windows": _locus_inputs, "03_export_candidates_fasta": _genome_ref,
+              "04_parse_blast_genome": _genome_inputs, "07_rnafold_energy": _fold_inputs,
+              "09_accessibility_proxy": _access_inputs, "10_isoform_conservation": _isoform_inputs}
+ARG_OUTPUTS = {"03_export_candidates_fasta": _export_outputs}
+
+
+STAGES = [
+    Stage("01_locus_windows", "01_locus_windows.py", [], [],
+          [f"{R}/01_target_regions.tsv", f"{R}/01_target_windows.npy"]),
+    Stage("02_filter_candidates", "02_filter_candidates.py", [],
+          [f"{R}/01_target_regions.tsv", f"{R}/01_target_windows.npy"], _both(D + "/{prefix}_top.tsv")),
+    *(Stage(f"03_export_candidates_fasta:{t}", "03_export_candidates_fasta.py",
+            ["--input", f"{D}/{p}_top.tsv", "--out", f"{R}/{p}.fa"], [f"{D}/{p}_top.tsv"], [])
+      for t, p in PREFIX.items()),
+    Stage("03_parse_blast", "03_parse_blast.py", [],
+          _both(D + "/{prefix}_top.tsv") + _both(R + "/{typ}_offtargets.txt"), _both(D + "/{prefix}_final.tsv")),
+    Stage("04_parse_blast_genome", "04_parse_blast_genome.py", [], _both(D + "/{prefix}_top.tsv"),
+          _both(D + "/{prefix}_final_grch38.tsv")),
+    *(Stage(f"04_summarize_offtargets:{t}", "04_summarize_offtargets.py",
+            [f"{R}/{t}_offtargets_grch38.txt", f"{R}/{t}_offtargets_summary.tsv"],
+            [f"{R}/{t}_offtargets_grch38.txt"], [f"{R}/{t}_offtargets_summary.tsv"])
+      for t in PREFIX),
+    Stage("05_visualize_candidates", "05_visualize_candidates.py", [], _both(D + "/{prefix}_final_grch38.tsv"),
+          [f"{F}/{n}.png" for n in ("gc_distribution", "score_vs_offtargets", "top_candidates_barplot")]),
+    Stage("07_rnafold_energy", "07_rnafold_energy.py", [], _both(D + "/{prefix}_final_grch38.tsv"),
+          _both(D + "/{prefix}_with_dG.tsv")),
+    Stage("08_repeat_filters", "08_repeat_filters.py", [], _both(D + "/{prefix}_with_dG.tsv"),
+          _both(D + "/{prefix}_with_repeats.tsv")),
+    Stage("09_accessibility_proxy", "09_accessibility_proxy.py", [], _both(D + "/{prefix}_with_repeats.tsv"),
+          _both(D + "/{prefix}_with_access.tsv")),
+    Stage("10_isoform_conservation", "10_isoform_conservation.py", [], _both(D + "/{prefix}_with_access.tsv"),
+          _both(D + "/{prefix}_with_conservation.tsv")),
+    Stage("11_final_integration", "11_final_integration.py", [], _both(D + "/{prefix}_with_conservation.tsv"),
+          _both(D + "/{prefix}_final_integrated.tsv")),
+    Stage("12_stringent_final_sets", "12_stringent_final_sets.py", [], _both(D + "/{prefix}_final_integrated.tsv"),
+          _both(D + "/{prefix}_final_stringent.tsv")),
+    Stage("13_visualize_integrated", "13_visualize_integrated.py", [], _both(D + "/{prefix}_final_integrated.tsv"),
+          [f"{F}/{n}.png" for n in ("integrated_score_vs_offtargets", "dG_distribution",
+                                    "accessibility_distribution", "top_candidates_integrated_barplot")]),
+    # report on the finished outputs; its stdout is the output
+    Stage("00_audit_inputs", "00_audit_inputs.py", [], _audit_targets(), [str(LOG_DIR / "00_audit_inputs.log")]),
+]
+AUDIT = "00_audit_inputs"  # reports on whatever exists, so missing inputs are not an error
+
+
+class FileHasher:
+    """SHA-1 of files, memoized by (size, mtime_ns)."""
+
+    def __init__(self, memo=None):
+        self.memo = memo if memo is not None else {}
+
+    def __call__(self, path):
+        path = Path(path)
+        if not path.exists():
+            return None
+        st = path.stat()
+        m = self.memo.get(str(path))
+        if m and m[0] == st.st_size and m[1] == st.st_mtime_ns:
+            return m[2]
+        h = hashlib.sha1()
+        with path.open("rb") as f:
+            for block in iter(lambda: f.read(HASH_CHUNK), b""):
+                h.update(block)
+        self.memo[str(path)] = [st.st_size, st.st_mtime_ns, h.hexdigest()]
+        return h.hexdigest()
+
+
+def _module_file(name):
+    # file of aso_cas13.<name>: the longest dotted prefix that is a module or package
+    parts = name.strip(". ").split(".")
+    for n in range(len(parts), 0, -1):
+        base = PKG_DIR.joinpath(*parts[:n])
+        for path in (base.with_suffix(".py"), base / "__init__.py"):
+            if path.exists():
+                return path
+    return None
+
+
+def code_files(script):
+    """The script plus every aso_cas13 module it (transitively) imports."""
+    seen, todo, out = set(), [Path(script)], []
+    while todo:
+        p = todo.pop()
+        if p is None or p in seen or not p.exists():
+            continue
+        seen.add(p)
+        out.append(p)
+        text = p.read_text()
+        for mod in re.findall(r"aso_cas13\.([\w.]+)", text) + \
+                [m for line in re.findall(r"from aso_cas13 import ([\w, ]+)", text) for m in line.split(",")]:
+            todo.append(_module_file(mod))
+    return sorted(out)
+
+
+def stage_module(stage):
+    """Source of the aso_cas13.stages module a stage runs (its numbered script is only a wrapper)."""
+    return PKG_DIR / "stages" / f"{resolve(stage.script)[3:]}.py"
+
+
+def stage_command(stage, args, python=sys.executable):
+    """argv running a stage through the aso-cas13 CLI, so an installed package needs no numbered scripts."""
+    return [python, "-m", "aso_cas13", command(stage.script), *args]
+
+
+def stage_env(**extra):
+    """Environment of a stage subprocess, with this aso_cas13 importable."""
+    path = os.pathsep.join(filter(None, [str(PKG_ROOT), os.environ.get("PYTHONPATH")]))
+    return dict(os.environ, PYTHONPATH=path, **extra)
+
+
+def stage_inputs(stage, argv):
+    """Declared inputs of a stage plus those its arguments add (ARG_INPUTS)."""
+    extra = ARG_INPUTS.get(stage.name.split(":")[0])
+    return [*stage.inputs, *(extra(argv) if extra else [])]
+
+
+def stage_outputs(stage, argv):
+    """Declared outputs of a stage plus those its arguments add (ARG_OUTPUTS)."""
+    extra = ARG_OUTPUTS.get(stage.name.split(":")[0])
+    return [*stage.outputs, *(extra(argv) if extra else [])]
+
+
+def files(path):
+    """The files of a declared path: the glob's matches, or the path itself if it exists."""
+    if glob.has_magic(path):
+        return sorted(glob.glob(path))
+    return [path] if Path(path).exists() else []
+
+
+def _example(path):
+    # a file name a glob output stands for, to match inputs against
+    return path.replace(SHARD_GLOB, "000")
+
+
+def dependencies(stages, extra=None):
+    """{stage name: set of upstream stage names} through declared files, with `extra` {name: args}."""
+    extra = extra or {}
+    argv = {s.name: [*s.args, *extra.get(s.name, [])] for s in stages}
+    producer = {_example(o): s.name for s in stages for o in stage_outputs(s, argv[s.name])}
+
+    def producers(i):
+        if glob.has_magic(i):
+            return {n for o, n in producer.items() if fnmatch.fnmatch(o, i)}
+        return {producer[i]} if i in producer else set()
+
+    return {s.name: set().union(*map(producers, stage_inputs(s, argv[s.name]))) - {s.name} for s in stages}
+
+
+def select(stages, targets=None, audit=False, extra=None):
+    """Stages needed for `targets` (names; default: everything but the audit)."""
+    deps = dependencies(stages, extra)
+    names = [s.name for s in stages]
+    if not targets:
+        targets = [n for n in names if audit or n != AUDIT]
+    want, todo = set(), list(targets)
+    while todo:
+        n = todo.pop()
+        if n not in deps:
+            raise KeyError(f"unknown stage {n}; stages: {', '.join(names)}")
+        if n not in want:
+            want.add(n)
+            todo.extend(deps[n])
+    return [s for s in stages if s.name in want]
+
+
+class Runner:
+    def __init__(self, stages, extra_args=None, state_path=STATE, jobs=None, force=(), python=sys.executable):
+        self.stages = stages
+        self.extra = extra_args or {}
+        self.state_path = Path(state_path)
+        self.jobs = jobs or os.cpu_count() or 1
+        self.force = set(force)
+        self.python = python
+        self.run_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        state = json.loads(self.state_path.read_text()) if self.state_path.exists() else {}
+        self.hash = FileHasher(state.get("files", {}))
+        self.done = state.get("stages", {})
+
+    def save(self):
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_path.with_name(self.state_path.name + ".tmp")
+        tmp.write_text(json.dumps({"files": self.hash.memo, "stages": self.done}, indent=1, sort_keys=True))
+        os.replace(tmp, self.state_path)
+
+    def argv(self, stage):
+        return [*stage.args, *self.extra.get(stage.name, [])]
+
+    def inputs(self, stage):
+        return stage_inputs(stage, self.argv(stage))
+
+    def outputs(self, stage):
+        return stage_outputs(stage, self.argv(stage))
+
+    def key(self, stage):
+        code = {str(p): self.hash(p) for p in code_files(stage_module(stage))}
+        inputs = {f: self.hash(f) for i in self.inputs(stage) for f in files(i)}
+        blob = json.dumps({"code": code, "args": self.argv(stage), "inputs": inputs}, sort_keys=True)
+        return hashlib.sha1(blob.encode()).hexdigest()
+
+    def up_to_date(self, stage, key):
+        rec = self.done.get(stage.name)
+        if stage.name in self.force or not rec or rec["key"] != key:
+            return False
+        return all(self.hash(o) == h for o, h in rec["outputs"].items())
+
+    def _execute(self, stage):
+        LOG_DIR.mkdir(parents=True, exist_ok=True)
+        log = LOG_DIR / f"{stage.name.replace(':', '_')}.log"
+        t0 = time.time()
+        with log.open("w") as f:
+            rc = subprocess.call(stage_command(stage, self.argv(stage), self.python), stdout=f, stderr=subprocess.STDOUT,
+                                 env=stage_env(ASO_CAS13_RUN_ID=self.run_id, ASO_CAS13_STAGE=stage.name))
+        return rc, time.time() - t0, log
+
+    def run(self, dry_run=False, report=print):
+        """Run stale stages; returns {stage name: 'skipped' | 'ran' | 'failed' | 'blocked' | 'stale'}."""
+        deps = dependencies(self.stages, self.extra)
+        status = {}
+        pending = {s.name: s for s in self.stages}
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.jobs) as ex:
+            while pending or running:
+                for name, stage in list(pending.items()):
+                    up = deps[name] & {s.name for s in self.stages}
+                    if any(status.get(u) in ("failed", "blocked") for u in up):
+                        status[name] = "blocked"
+                        del pending[name]
+                        report(f"[blocked] {name}")
+                        continue
+                    if dry_run and any(status.get(u) == "stale" for u in up):
+                        status[name] = "stale"
+                        del pending[name]
+                        report(f"[stale]   {name}")
+                        continue
+                    if not all(u in status for u in up):
+                        continue
+                    del pending[name]
+                    missing = [] if name == AUDIT else [i for i in self.inputs(stage) if not files(i)]
+                    key = None if missing else self.key(stage)
+                    if key and self.up_to_date(stage, key):
+                        status[name] = "skipped"
+                        report(f"[ok]      {name}")
+                    elif dry_run:
+                        status[name] = "stale"
+                        report(f"[stale]   {name}" + (f" (missing {', '.join(missing)})" if missing else ""))
+                    elif missing:
+                        status[name] = "failed"
+                        report(f"[missing] {name}: {', '.join(missing)}")
+                    else:
+                        running[ex.submit(self._execute, stage)] = (stage, key)
+                        report(f"[run]     {name}")
+                if not running:
+                    continue
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    stage, key = running.pop(fut)
+                    rc, secs, log = fut.result()
+                    outs = {f: self.hash(f) for o in self.outputs(stage) for f in files(o) or [o]}
+                    if rc != 0 or None in outs.values():
+                        status[stage.name] = "failed"
+                        self.done.pop(stage.name, None)
+                        report(f"[failed]  {stage.name} (exit {rc}, see {log})")
+                    else:
+                        status[stage.name] = "ran"
+                        self.done[stage.name] = {"key": key, "outputs": outs}
+                        report(f"[done]    {stage.name} in {secs:.1f}s")
+                    self.save()
+        self.save()
+        if "ran" in status.values():
+            from aso_cas13 import metrics
+            metrics.summarize(run_id=self.run_id, out=RUN_SUMMARY)
+        return status
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Run the numbered scripts in dependency order, skipping up-to-date stages.")
+    p.add_argument("targets", nargs="*", help="stages to bring up to date (with everything upstream); default: all but 00_audit_inputs")
+    p.add_argument("--audit", action="store_true", help="also run 00_audit_inputs on the finished outputs")
+    p.add_argument("-j", "--jobs", type=int, default=None, help="stages run concurrently (default: CPU count)")
+    p.add_argument("--args", action="append", default=[], metavar="STAGE=ARGS",
+                   help="extra arguments for a stage, e.g. --args '07_rnafold_energy=--engine vienna' (part of its key)")
+    p.add_argument("--force", action="append", default=[], metavar="STAGE", help="rerun a stage even if it is up to date")
+    p.add_argument("--dry-run", action="store_true", help="only list which stages are up to date or stale")
+    p.add_argument("--list", action="store_true", help="list stages with their inputs and outputs")
+    a = p.parse_args(argv)
+
+    extra = {}
+    for spec in a.args:
+        name, _, args = spec.partition("=")
+        extra.setdefault(name, []).extend(shlex.split(args))
+    stages = select(STAGES, a.targets, a.audit, extra)
+    if a.list:
+        for s in stages:
+            argv = [*s.args, *extra.get(s.name, [])]
+            print(f"{s.name}\n  in:  {' '.join(stage_inputs(s, argv))}\n  out: {' '.join(stage_outputs(s, argv))}")
+        return 0
+
+    status = Runner(stages, extra, jobs=a.jobs, force=a.force).run(dry_run=a.dry_run)
+    counts = {k: sum(v == k for v in status.values()) for k in ("ran", "skipped", "stale", "failed", "blocked")}
+    print(", ".join(f"{v} {k}" for k, v in counts.items() if v))
+    return 1 if counts["failed"] or counts["blocked"] else 0
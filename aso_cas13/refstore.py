@@ -0,0 +1,232 @@
+"""2-bit packed, memory-mapped reference store.
+
+A FASTA is converted once into `<fasta>.r2b` (4 bases per byte, each record
+byte-aligned) plus a JSON index `<fasta>.r2b.json` holding per-record offsets,
+lengths and N blocks. Later runs mmap the packed file and slice intervals by
+random access instead of loading the whole genome into a string.
+"""
+import json, mmap, os
+from bisect import bisect_right
+from pathlib import Path
+
+import numpy as np
+
+FORMAT_VERSION = 1
+BASES = "ACGT"
+# byte value -> the four bases it encodes (2 bits each, first base in the high bits)
+_DECODE = [
+    BASES[(b >> 6) & 3] + BASES[(b >> 4) & 3] + BASES[(b >> 2) & 3] + BASES[b & 3]
+    for b in range(256)
+]
+# ASCII -> 2-bit code; anything that is not ACGT (N and other IUPAC codes) -> 4
+_ENCODE = np.full(256, 4, dtype=np.uint8)
+for _i, _b in enumerate(BASES):
+    _ENCODE[ord(_b)] = _i
+    _ENCODE[ord(_b.lower())] = _i
+_COMP = str.maketrans("ACGTN", "TGCAN")
+CHUNK_BASES = 1 << 22  # bases packed per write while converting
+
+
+def rc(s):
+    return s.translate(_COMP)[::-1]
+
+
+def norm_chr(ch):
+    ch = ch.strip()
+    if ch.startswith("chr"):
+        ch = ch[3:]
+    return ch  # e.g., "chr19" -> "19"
+
+
+def store_paths(fasta):
+    fasta = Path(fasta)
+    return fasta.with_name(fasta.name + ".r2b"), fasta.with_name(fasta.name + ".r2b.json")
+
+
+def _source_stamp(fasta):
+    st = Path(fasta).stat()
+    return {"path": str(fasta), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+class _RecordWriter:
+    # Packs one FASTA record incrementally; keeps a <4-base carry between chunks
+    def __init__(self, out, offset):
+        self.out = out
+        self.offset = offset
+        self.length = 0
+        self.n_blocks = []
+        self.carry = np.empty(0, dtype=np.uint8)
+
+    def add(self, raw):
+        codes = _ENCODE[np.frombuffer(raw, dtype=np.uint8)]
+        self._record_n(codes)
+        self.length += len(codes)
+        codes = np.concatenate([self.carry, codes]) if len(self.carry) else codes
+        cut = len(codes) - len(codes) % 4
+        self.carry = codes[cut:].copy()
+        self._pack(codes[:cut])
+
+    def _record_n(self, codes):
+        is_n = codes == 4
+        if not is_n.any():
+            return
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], is_n.view(np.int8), [0]))))
+        for s, e in zip(edges[::2], edges[1::2]):
+            s, e = int(s) + self.length, int(e) + self.length
+            if self.n_blocks and self.n_blocks[-1][1] == s:
+                self.n_blocks[-1][1] = e  # run continues across a chunk boundary
+            else:
+                self.n_blocks.append([s, e])
+
+    def _pack(self, codes):
+        if not len(codes):
+            return
+        q = (codes & 3).reshape(-1, 4)
+        packed = (q[:, 0] << 6) | (q[:, 1] << 4) | (q[:, 2] << 2) | q[:, 3]
+        self.out.write(packed.astype(np.uint8).tobytes())
+
+    def close(self):
+        if len(self.carry):
+            pad = np.zeros(4 - len(self.carry), dtype=np.uint8)
+            self._pack(np.concatenate([self.carry, pad]))
+        nbytes = (self.length + 3) // 4
+        return {"offset": self.offset, "length": self.length, "n_blocks": self.n_blocks}, nbytes
+
+
+def build(fasta):
+    """Convert `fasta` into the packed store; returns the index path."""
+    data_path, idx_path = store_paths(fasta)
+    seqs = {}
+    order = []
+    offset = 0
+    tmp_data = data_path.with_name(data_path.name + ".tmp")
+    with open(fasta, "rb") as f, tmp_data.open("wb") as out:
+        rec = name = None
+        buf, buffered = [], 0
+
+        def flush():
+            nonlocal buf, buffered
+            if buf:
+                rec.add(b"".join(buf))
+            buf, buffered = [], 0
+
+        def finish():
+            nonlocal offset
+            flush()
+            meta, nbytes = rec.close()
+            seqs[name] = meta
+            order.append(name)
+            offset += nbytes
+
+        for line in f:
+            if line.startswith(b">"):
+                if rec is not None:
+                    finish()
+                name = line[1:].split(None, 1)[0].decode() if line[1:].strip() else f"seq{len(order)}"
+                rec = _RecordWriter(out, offset)
+                continue
+            if rec is None:
+                continue
+            line = line.rstrip()
+            buf.append(line)
+            buffered += len(line)
+            if buffered >= CHUNK_BASES:
+                flush()
+        if rec is not None:
+            finish()
+    index = {"version": FORMAT_VERSION, "source": _source_stamp(fasta),
+             "order": order, "seqs": seqs}
+    os.replace(tmp_data, data_path)
+    tmp_idx = idx_path.with_name(idx_path.name + ".tmp")
+    tmp_idx.write_text(json.dumps(index))
+    os.replace(tmp_idx, idx_path)
+    return idx_path
+
+
+def is_current(fasta):
+    data_path, idx_path = store_paths(fasta)
+    if not (data_path.exists() and idx_path.exists()):
+        return False
+    try:
+        index = json.loads(idx_path.read_text())
+    except (OSError, ValueError):
+        return False
+    src = _source_stamp(fasta)
+    return (index.get("version") == FORMAT_VERSION
+            and index["source"]["size"] == src["size"]
+            and index["source"]["mtime_ns"] == src["mtime_ns"])
+
+
+class ReferenceStore:
+    def __init__(self, fasta):
+        data_path, idx_path = store_paths(fasta)
+        index = json.loads(idx_path.read_text())
+        self.seqs = index["seqs"]
+        self.order = index["order"]
+        self._alias = {}
+        for name in self.order:
+            self._alias.setdefault(name, name)
+            self._alias.setdefault(norm_chr(name), name)
+            self._alias.setdefault("chr" + norm_chr(name), name)
+        self._fh = data_path.open("rb")
+        size = data_path.stat().st_size
+        self._mm = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def close(self):
+        if isinstance(self._mm, mmap.mmap):
+            self._mm.close()
+        self._fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def resolve(self, chrom):
+        # Accept "19", "chr19" or the exact FASTA record name
+        name = self._alias.get(chrom) or self._alias.get(norm_chr(chrom))
+        if name is None:
+            raise KeyError(f"{chrom} not found in reference ({len(self.order)} records)")
+        return name
+
+    def length(self, chrom):
+        return self.seqs[self.resolve(chrom)]["length"]
+
+    def fetch(self, chrom, start, end, strand="+"):
+        """Uppercase sequence of 1-based, inclusive [start, end] (GTF convention).
+
+        Reverse-complemented when strand is "-"; clipped to the record length.
+        """
+        meta = self.seqs[self.resolve(chrom)]
+        s0 = max(0, start - 1)
+        e0 = min(end, meta["length"])
+        if s0 >= e0:
+            return ""
+        b0, b1 = meta["offset"] + s0 // 4, meta["offset"] + (e0 + 3) // 4
+        raw = self._mm[b0:b1]
+        lead = s0 % 4
+        seq = "".join([_DECODE[b] for b in raw])[lead:lead + (e0 - s0)]
+        blocks = meta["n_blocks"]
+        if blocks:
+            i = max(0, bisect_right(blocks, [s0, float("inf")]) - 1)
+            if blocks[i][1] <= s0:
+                i += 1
+            parts, pos = [], s0
+            while i < len(blocks) and blocks[i][0] < e0:
+                ns, ne = max(blocks[i][0], s0), min(blocks[i][1], e0)
+                parts.append(seq[pos - s0:ns - s0])
+                parts.append("N" * (ne - ns))
+                pos = ne
+                i += 1
+            if parts:
+                parts.append(seq[pos - s0:])
+                seq = "".join(parts)
+        return rc(seq) if strand == "-" else seq
+
+
+def open_reference(fasta):
+    """Open the packed store for `fasta`, (re)building it if missing or stale."""
+    if not is_current(fasta):
+        build(fasta)
+    return ReferenceStore(fasta)
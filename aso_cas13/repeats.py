@@ -0,0 +1,187 @@
+"""Single-pass repeat, homopolymer and low-complexity annotation of windows.
+
+A motif set (repeat units with copy numbers, homopolymer length k) is compiled
+into one k-mer lookup table per pattern length. A region is encoded once, every
+pattern occurrence is found in one vectorized pass, and all windows of the
+region are then annotated from shared per-region arrays:
+
+- simple_repeat_score: per motif, the non-overlapping occurrence count inside
+  the window (what str.count gives), summed over motifs;
+- has_homopolymer: a run of >= k identical bases inside the window, from a
+  run-length array and a prefix sum;
+- dust / entropy (optional): DUST triplet score and Shannon entropy of the
+  base composition, from triplet and base prefix counts.
+"""
+import json
+
+import numpy as np
+
+DI = ["AT","TA","CG","GC","AG","GA","TC","CT","AC","CA","TG","GT"]
+TRI = ["ATG","CAG","CTG","GAA","GTT","TGG","CCC","GGG","AAA","TTT"]
+# Same motifs and thresholds as the original hard-coded filters
+DEFAULT_MOTIFS = {
+    "repeats": [{"unit": d, "copies": 3} for d in DI] + [{"unit": t, "copies": 2} for t in TRI],
+    "homopolymer_k": 5,
+}
+_ENC = np.full(256, 4, dtype=np.int64)
+for _i, _b in enumerate("ACGT"):
+    _ENC[ord(_b)] = _i
+    _ENC[ord(_b.lower())] = _i
+BLOCK = 1 << 16  # positions per block for the triplet prefix counts
+
+
+def load_motifs(path=None):
+    if path is None:
+        return DEFAULT_MOTIFS
+    text = open(path).read()
+    if str(path).endswith((".yml", ".yaml")):
+        import yaml
+        return yaml.safe_load(text)
+    return json.loads(text)
+
+
+def _kmer_codes(codes, k):
+    # integer k-mer starting at each position; -1 where the k-mer has a non-ACGT base
+    n = len(codes) - k + 1
+    if n <= 0:
+        return np.empty(0, dtype=np.int64)
+    val = np.zeros(n, dtype=np.int64)
+    bad = np.zeros(n, dtype=bool)
+    for j in range(k):
+        c = codes[j:j + n]
+        bad |= c == 4
+        val = (val << 2) | (c & 3)
+    val[bad] = -1
+    return val
+
+
+class RepeatScanner:
+    def __init__(self, motifs=None):
+        motifs = motifs or DEFAULT_MOTIFS
+        self.homopolymer_k = int(motifs.get("homopolymer_k", 5))
+        self.patterns = []  # distinct patterns (unit * copies)
+        self.weight = []  # how often each pattern is listed; summed str.count counts every listing
+        self.tables = {}  # pattern length -> lookup table k-mer -> pattern index
+        for m in motifs.get("repeats", []):
+            pat = m["unit"].upper() * int(m.get("copies", 1))
+            if pat in self.patterns:
+                self.weight[self.patterns.index(pat)] += 1
+                continue
+            k = len(pat)
+            if k > 12 or set(pat) - set("ACGT"):
+                raise ValueError(f"repeat pattern {pat} must be <= 12 nt of ACGT")
+            lut = self.tables.setdefault(k, np.full(4 ** k, -1, dtype=np.int64))
+            code = 0
+            for b in pat:
+                code = (code << 2) | int(_ENC[ord(b)])
+            lut[code] = len(self.patterns)
+            self.patterns.append(pat)
+            self.weight.append(1)
+
+    def _occurrences(self, codes):
+        # {motif index: sorted start positions} from one pass per pattern length
+        occ = {}
+        for k, lut in self.tables.items():
+            km = _kmer_codes(codes, k)
+            hit = np.flatnonzero(km >= 0)
+            mids = lut[km[hit]]
+            sel = mids >= 0
+            for mi, pos in zip(mids[sel].tolist(), hit[sel].tolist()):
+                occ.setdefault(mi, []).append(pos)
+        return {mi: np.array(p, dtype=np.int64) for mi, p in occ.items()}
+
+    def _repeat_scores(self, codes, offsets, w):
+        score = np.zeros(len(offsets), dtype=np.int64)
+        for mi, P in self._occurrences(codes).items():
+            plen = len(self.patterns[mi])
+            lo = np.searchsorted(P, offsets)
+            hi = np.searchsorted(P, offsets + w - plen, side="right")
+            if not (hi > lo).any():
+                continue
+            # greedy non-overlapping count, walking jump pointers for all windows at once
+            jump = np.searchsorted(P, P + plen)
+            cur = lo.copy()
+            while True:
+                active = cur < hi
+                if not active.any():
+                    break
+                score += active * self.weight[mi]
+                cur = np.where(active, jump[np.minimum(cur, len(P) - 1)], cur)
+        return score
+
+    def _homopolymer(self, codes, offsets, w):
+        k = self.homopolymer_k
+        n = len(codes)
+        if n == 0:
+            return np.zeros(len(offsets), dtype=bool)
+        # run[i] = length of the identical-base run ending at i (non-ACGT breaks runs)
+        same = np.concatenate(([False], (codes[1:] == codes[:-1]) & (codes[1:] != 4)))
+        idx = np.arange(n)
+        starts = np.where(same, 0, idx)
+        run = idx - np.maximum.accumulate(starts) + 1
+        run[codes == 4] = 0
+        cs = np.concatenate(([0], np.cumsum(run >= k)))
+        lo = np.minimum(offsets + k - 1, offsets + w)
+        return (cs[offsets + w] - cs[lo]) > 0
+
+    def _low_complexity(self, codes, offsets, w):
+        # Shannon entropy (bits) of base composition and DUST triplet score per window
+        onehot = (codes[:, None] == np.arange(4)).astype(np.int64)
+        base_cs = np.vstack([np.zeros((1, 4), np.int64), np.cumsum(onehot, axis=0)])
+        counts = base_cs[offsets + w] - base_cs[offsets]
+        p = counts / np.maximum(counts.sum(axis=1, keepdims=True), 1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            entropy = -np.nansum(np.where(p > 0, p * np.log2(p), 0.0), axis=1)
+        trip = _kmer_codes(codes, 3)
+        l = w - 2
+        dust = np.zeros(len(offsets))
+        if l > 1:
+            for b0 in range(0, len(offsets), BLOCK):
+                off = offsets[b0:b0 + BLOCK]
+                a, z = int(off.min()), int(off.max()) + l
+                t = trip[a:z]
+                oh = (t[:, None] == np.arange(64)).astype(np.int32)
+                tcs = np.vstack([np.zeros((1, 64), np.int32), np.cumsum(oh, axis=0)])
+                c = (tcs[off - a + l] - tcs[off - a]).astype(np.float64)
+                dust[b0:b0 + BLOCK] = (c * (c - 1) / 2).sum(axis=1) / (l - 1)
+        return dust, entropy
+
+    def scan_region(self, seq, offsets, w, low_complexity=False):
+        """Annotate windows seq[off:off+w] for each off in `offsets`.
+
+        Returns a dict of arrays: has_homopolymer, simple_repeat_score and, if
+        requested, dust and entropy.
+        """
+        codes = _ENC[np.frombuffer(seq.upper().encode("ascii"), dtype=np.uint8)]
+        offsets = np.asarray(offsets, dtype=np.int64)
+        out = {
+            "has_homopolymer": self._homopolymer(codes, offsets, w),
+            "simple_repeat_score": self._repeat_scores(codes, offsets, w),
+        }
+        if low_complexity:
+            out["dust"], out["entropy"] = self._low_complexity(codes, offsets, w)
+        return out
+
+    def scan(self, seq, low_complexity=False):
+        # single window
+        res = self.scan_region(seq, [0], len(seq), low_complexity)
+        return {k: v[0].item() for k, v in res.items()}
+
+
+def window_mask(table, scanner, max_repeat_score=None, drop_homopolymer=False):
+    """Chunk filter for scoring.top_windows(): True for windows that pass."""
+    def keep(chunk):
+        mask = np.ones(len(chunk), dtype=bool)
+        groups = chunk["region_id"].astype(np.int64) * 65536 + chunk["length"]
+        for g in np.unique(groups):
+            sel = np.flatnonzero(groups == g)
+            rid, w = divmod(int(g), 65536)
+            res = scanner.scan_region(table.regions[rid]["sequence"], chunk["offset"][sel], w)
+            ok = np.ones(len(sel), dtype=bool)
+            if max_repeat_score is not None:
+                ok &= res["simple_repeat_score"] <= max_repeat_score
+            if drop_homopolymer:
+                ok &= ~res["has_homopolymer"]
+            mask[sel] = ok
+        return mask
+    return keep
@@ -0,0 +1,177 @@
+"""Base GC/Tm scoring and top-N selection (stage 02).
+
+`top_windows()` is the vectorized engine: each region is encoded once into
+G/C and A/T prefix-sum arrays, GC% / Wallace Tm / base score are computed for a
+whole chunk of windows by array differences, and a bounded `TopK` keeps the
+best windows per type. Results match the row-by-row `score_row()` +
+`top_by_type()` path exactly, including tie order. Given a
+`seqindex.SequenceIndex`, scores and filters run once per unique window
+sequence and are gathered back to the windows by sequence id. With a
+`thermo.NearestNeighbor`, the selected rows also get its Tm and duplex ΔG.
+"""
+import numpy as np
+
+from aso_cas13.windows import WINDOW_TYPES
+
+TOP_N = 50
+TOP_COLS = ["type","transcript_id","chr","strand","win_start","win_end","gc","tm","score","window_seq"]
+THERMO_COLS = ["tm_nn", "dG_duplex"]  # nearest-neighbor Tm and ΔG37 (02 --thermo), carried to stage 11
+SCORE_CHUNK = 1 << 20  # windows scored per vectorized step
+_IS_GC = np.zeros(256, dtype=np.int32)
+_IS_AT = np.zeros(256, dtype=np.int32)
+for _b in "GC":
+    _IS_GC[ord(_b)] = 1
+for _b in "AT":
+    _IS_AT[ord(_b)] = 1
+
+
+def gc_content(seq):
+    gc = seq.count("G") + seq.count("C")
+    return 100.0 * gc / len(seq)
+
+
+def tm_proxy(seq):
+    # Wallace rule: 2*(A+T) + 4*(G+C)
+    return 2*(seq.count("A")+seq.count("T")) + 4*(seq.count("G")+seq.count("C"))
+
+
+def score_row(r):
+    seq = r["window_seq"]
+    gc = gc_content(seq)
+    tm = tm_proxy(seq)
+    score = 0.4*gc + 0.3*tm - 0.1*len(seq)  # placeholder scoring
+    r["gc"] = f"{gc:.1f}"
+    r["tm"] = f"{tm:.1f}"
+    r["score"] = f"{score:.2f}"
+    return r
+
+
+def top_by_type(rows, n=TOP_N):
+    # Split ASO vs Cas13, sort by score descending, keep top n of each
+    aso_rows = [r for r in rows if r["type"]=="ASO"]
+    cas_rows = [r for r in rows if r["type"]=="Cas13"]
+    aso_rows.sort(key=lambda r: float(r["score"]), reverse=True)
+    cas_rows.sort(key=lambda r: float(r["score"]), reverse=True)
+    return aso_rows[:n], cas_rows[:n]
+
+
+def prefix_counts(regions):
+    """Concatenated G/C and A/T prefix sums over all region sequences.
+
+    Region `rid` occupies [base[rid], base[rid] + len + 1) of both arrays, so the
+    count over window (rid, off, w) is cs[base + off + w] - cs[base + off].
+    """
+    cs_gc, cs_at, base, pos = [], [], np.zeros(len(regions), dtype=np.int64), 0
+    for rid, r in enumerate(regions):
+        codes = np.frombuffer(r["sequence"].encode("ascii"), dtype=np.uint8)
+        cs_gc.append(np.concatenate(([0], np.cumsum(_IS_GC[codes]))))
+        cs_at.append(np.concatenate(([0], np.cumsum(_IS_AT[codes]))))
+        base[rid] = pos
+        pos += len(codes) + 1
+    if not regions:
+        return np.zeros(1, np.int64), np.zeros(1, np.int64), base
+    return np.concatenate(cs_gc), np.concatenate(cs_at), base
+
+
+def window_scores(chunk, cs_gc, cs_at, base):
+    # Same float expression order as score_row(), so values agree bit for bit
+    i0 = base[chunk["region_id"]] + chunk["offset"]
+    w = chunk["length"].astype(np.int64)
+    gc_n = cs_gc[i0 + w] - cs_gc[i0]
+    at_n = cs_at[i0 + w] - cs_at[i0]
+    wf = w.astype(np.float64)
+    gc = 100.0 * gc_n / wf
+    tm = 2*at_n + 4*gc_n
+    return 0.4*gc + 0.3*tm - 0.1*wf
+
+
+class TopK:
+    """Bounded top-k by the 2-dp rounded score, ties kept in window order.
+
+    A push keeps exactly the k best windows by (rounded score desc, window
+    index asc), the order of the full sort in top_by_type(), so memory stays
+    O(k) plus one chunk even when many windows share a score (repeats,
+    GC-rich loci).
+    """
+
+    def __init__(self, k):
+        self.k = k
+        self.score = np.empty(0, dtype=np.float64)
+        self.idx = np.empty(0, dtype=np.int64)
+
+    def push(self, scores, idx):
+        s = np.concatenate([self.score, scores])
+        i = np.concatenate([self.idx, idx])
+        if len(s) > self.k:
+            # cheap cut first: rounding moves a value by at most 0.005
+            kth = np.partition(s, len(s) - self.k)[len(s) - self.k]
+            keep = s >= kth - 0.01
+            s, i = s[keep], i[keep]
+        order = np.lexsort((i, -rounded_cents(s)))[:self.k]
+        self.score, self.idx = s[order], i[order]
+
+    def result(self):
+        return self.idx.tolist()
+
+
+def rounded_cents(x):
+    """round(100 * float(f"{v:.2f}")) of each value, vectorized."""
+    x100 = np.asarray(x, dtype=np.float64) * 100
+    c = np.floor(x100 + 0.5)
+    # near a half cent the decimal rounding of the exact binary value decides
+    for j in np.flatnonzero(np.abs(x100 - np.floor(x100) - 0.5) < 1e-6).tolist():
+        c[j] = round(float(f"{float(x[j]):.2f}") * 100)
+    return c.astype(np.int64)
+
+
+def top_windows(table, n=TOP_N, keep=None, seqs=None, thermo=None):
+    """Top-n ASO and Cas13 rows of a WindowTable, scored in vectorized chunks.
+
+    `keep(chunk)` may return a boolean mask of windows allowed into the ranking
+    (e.g. repeats.window_mask, NearestNeighbor.mask), so filters apply before
+    the top-n cut. `seqs`: a SequenceIndex of the table; scores and `keep` then
+    run on the first window of each unique sequence only. `thermo`: a
+    NearestNeighbor of the table's regions, adds the THERMO_COLS.
+    """
+    # only the selected windows are materialized and formatted
+    out = []
+    for top in rank_windows(table, n, keep, seqs):
+        idx = top.result()
+        rows = [score_row(table.row(i)) for i in idx]
+        if thermo is not None and idx:
+            tm, dg = thermo.window_thermo(np.asarray(table.windows)[idx])
+            for r, t, g in zip(rows, tm.tolist(), dg.tolist()):
+                r["tm_nn"], r["dG_duplex"] = f"{t:.1f}", f"{g:.2f}"
+        out.append(rows)
+    return out
+
+
+def rank_windows(table, n=TOP_N, keep=None, seqs=None):
+    """One TopK per window type over a WindowTable (see top_windows)."""
+    cs_gc, cs_at, base = prefix_counts(table.regions)
+    if seqs is not None:
+        reps = np.asarray(table.windows)[seqs.first]
+        rep_scores = window_scores(reps, cs_gc, cs_at, base)
+        rep_allowed = keep(reps) if keep is not None else None
+    tops = [TopK(n) for _ in WINDOW_TYPES]
+    for c0 in range(0, len(table.windows), SCORE_CHUNK):
+        chunk = np.asarray(table.windows[c0:c0 + SCORE_CHUNK])
+        idx = np.arange(c0, c0 + len(chunk), dtype=np.int64)
+        if seqs is not None:
+            sid = seqs.seq_id[c0:c0 + len(chunk)]
+            scores = rep_scores[sid]
+            allowed = rep_allowed[sid] if rep_allowed is not None else True
+        else:
+            scores = window_scores(chunk, cs_gc, cs_at, base)
+            allowed = keep(chunk) if keep is not None else True
+        for code, top in enumerate(tops):
+            sel = (chunk["type"] == code) & allowed
+            if sel.any():
+                top.push(scores[sel], idx[sel])
+    return tops
+
+
+def write_top(path, rows):
+    # TSV, or Parquet/Feather by suffix
+    from aso_cas13.tables import write_rows
+    write_rows(path, TOP_COLS + [c for c in THERMO_COLS if rows and c in rows[0]], rows)
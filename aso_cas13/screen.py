@@ -0,0 +1,205 @@
+"""Transcriptome-wide screening in bounded memory.
+
+Genes are streamed from the compiled annotation index (`GtfIndex.iter_genes`)
+and grouped into chunks of about `chunk_bases` feature bases. Each chunk is
+intersected, windowed and scored in a worker process with the stage 01/02
+code (`WindowTable.from_targets`, `scoring.rank_windows`), and only its best
+rows come back:
+- rank "gene": the top k ASO and Cas13 windows of every gene;
+- rank "global": the chunk's top k, merged into one running `TopK`.
+
+At most `2 * workers` chunks are in flight, so peak memory depends on the
+chunk size and k, not on the number of genes. Rows go to one partition per
+chromosome as they arrive:
+
+    <out_dir>/<chr>/ASO_candidates_top.tsv + Cas13_guides_top.tsv   (gene + stage 02 columns)
+    <out_dir>/manifest.tsv
+"""
+import os, re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from aso_cas13.batch import by_chromosome
+from aso_cas13.gtf_index import open_index
+from aso_cas13.refstore import ReferenceStore, open_reference
+from aso_cas13.scoring import TOP_COLS, TopK, rank_windows, score_row
+from aso_cas13.windows import WINDOW_TYPES, WindowTable, overlap_targets
+
+FEATURES = ("three_prime_utr", "exon")
+CHUNK_BASES = 1 << 21
+SCREEN_COLS = ["gene", *TOP_COLS]
+PREFIX = {"ASO": "ASO_candidates", "Cas13": "Cas13_guides"}
+MANIFEST_COLS = ["chr", "genes", "aso_rows", "cas_rows", "aso_top", "cas_top"]
+
+
+def gene_chunks(genes, chunk_bases=CHUNK_BASES):
+    """Lists of (gene, features) holding about `chunk_bases` feature bases each."""
+    chunk, size = [], 0
+    for gene, feats in genes:
+        chunk.append((gene, feats))
+        size += sum(f[2] - f[1] + 1 for f in feats)
+        if size >= chunk_bases:
+            yield chunk
+            chunk, size = [], 0
+    if chunk:
+        yield chunk
+
+
+def gene_targets(feats, ref):
+    # as batch mode: one locus spanning the gene's features (all on one chromosome)
+    return overlap_targets(feats, feats[0][0], min(f[1] for f in feats), max(f[2] for f in feats), ref)
+
+
+_ref = None
+
+
+def _init_worker(ref_fa):
+    global _ref
+    _ref = ReferenceStore(ref_fa)
+
+
+def screen_chunk(chunk, k, rank):
+    """(results, {chr: genes screened}, [skipped genes]) of one chunk.
+
+    results: rank "gene": [(gene, chr, [ASO rows, Cas13 rows])];
+    rank "global": per type, [(raw score, window index, row)] of the chunk's top k.
+    """
+    skipped, genes, targets, per_chr = [], [], [], {}
+    for gene, feats in chunk:
+        try:
+            t = gene_targets(feats, _ref)
+        except KeyError:  # chromosome not in the reference
+            skipped.append(gene)
+            continue
+        genes.append((gene, feats[0][0], t))
+        per_chr[feats[0][0]] = per_chr.get(feats[0][0], 0) + 1
+    if rank == "gene":
+        out = []
+        for gene, chrom, t in genes:
+            table = WindowTable.from_targets(t)
+            out.append((gene, chrom, [[{**score_row(table.row(i)), "gene": gene} for i in top.result()]
+                                      for top in rank_windows(table, k)]))
+        return out, per_chr, skipped
+    gene_of = []
+    for gene, _, t in genes:
+        targets.extend(t)
+        gene_of.extend([gene] * len(t))
+    table = WindowTable.from_targets(targets)
+    out = []
+    for top in rank_windows(table, k):
+        score_of = dict(zip(top.idx.tolist(), top.score.tolist()))
+        out.append([(score_of[i], i, {**score_row(table.row(i)), "gene": gene_of[table.windows[i]["region_id"]]})
+                    for i in top.result()])
+    return out, per_chr, skipped
+
+
+def _bounded_map(ex, fn, items, depth):
+    # ordered results with at most `depth` tasks submitted ahead
+    pending = deque()
+    for args in items:
+        pending.append(ex.submit(fn, *args))
+        if len(pending) >= depth:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+class PartitionWriter:
+    """Appends rows to <out_dir>/<chr>/<prefix>_top.tsv, one open file per (chr, type)."""
+
+    def __init__(self, out_dir):
+        self.out_dir = Path(out_dir)
+        self.files, self.rows, self.genes = {}, {}, {}
+
+    def _file(self, chrom, typ):
+        key = (chrom, typ)
+        if key not in self.files:
+            path = self.path(chrom, typ)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self.files[key] = path.open("w")
+            self.files[key].write("\t".join(SCREEN_COLS) + "\n")
+            self.rows[key] = 0
+        return self.files[key]
+
+    def path(self, chrom, typ):
+        return self.out_dir / re.sub(r"[^A-Za-z0-9._-]+", "_", str(chrom)) / f"{PREFIX[typ]}_top.tsv"
+
+    def write(self, chrom, typ, rows):
+        f = self._file(chrom, typ)
+        for r in rows:
+            f.write("\t".join([str(r[c]) for c in SCREEN_COLS]) + "\n")
+        self.rows[(chrom, typ)] += len(rows)
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+        manifest = self.out_dir / "manifest.tsv"
+        manifest.parent.mkdir(parents=True, exist_ok=True)
+        with manifest.open("w") as f:
+            f.write("\t".join(MANIFEST_COLS) + "\n")
+            for chrom in sorted({c for c, _ in self.files}):
+                f.write("\t".join(map(str, [chrom, self.genes.get(chrom, 0), self.rows[(chrom, "ASO")],
+                                            self.rows[(chrom, "Cas13")], self.path(chrom, "ASO"),
+                                            self.path(chrom, "Cas13")])) + "\n")
+        return manifest
+
+
+def run_screen(ref_fa, gtf, out_dir="outputs/design/screen", k=50, rank="gene", features=FEATURES,
+               genes=None, chunk_bases=CHUNK_BASES, workers=None):
+    """Screen every annotated gene (or those in `genes`); returns (manifest, genes screened, genes skipped)."""
+    open_reference(ref_fa).close()  # build the packed store once, before forking
+    workers = workers or os.cpu_count() or 1
+    writer = PartitionWriter(out_dir)
+    tops = [TopK(k) for _ in WINDOW_TYPES]
+    kept = [{} for _ in WINDOW_TYPES]  # global: rows of the current top candidates
+    screened = skipped = 0
+    with open_index(gtf) as ann:
+        stream = ann.iter_genes(tuple(features))
+        if genes:
+            wanted = set(genes)
+            stream = ((g, f) for g, f in stream if g in wanted)
+        # genes on several contigs are screened once per chromosome
+        stream = ((g, fs) for g, f in stream for fs in by_chromosome(f).values())
+        items = ((c, k, rank) for c in gene_chunks(stream, chunk_bases))
+        if workers > 1:
+            ex = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(str(ref_fa),))
+            results = _bounded_map(ex, screen_chunk, items, 2 * workers)
+        else:
+            ex = None
+            _init_worker(str(ref_fa))
+            results = (screen_chunk(*args) for args in items)
+        try:
+            for n, (out, per_chr, skip) in enumerate(results):
+                skipped += len(skip)
+                for chrom, g in per_chr.items():
+                    writer.genes[chrom] = writer.genes.get(chrom, 0) + g
+                    screened += g
+                if rank == "gene":
+                    for gene, chrom, rows in out:
+                        for (typ, _), r in zip(WINDOW_TYPES, rows):
+                            writer.write(chrom, typ, r)
+                    continue
+                for top, rows, cand in zip(tops, kept, out):
+                    if not cand:
+                        continue
+                    idx = np.array([(n << 32) | i for _, i, _ in cand], dtype=np.int64)
+                    top.push(np.array([s for s, _, _ in cand]), idx)
+                    rows.update(zip(idx.tolist(), (r for _, _, r in cand)))
+                    alive = set(top.idx.tolist())
+                    for i in [i for i in rows if i not in alive]:
+                        del rows[i]
+        finally:
+            if ex is not None:
+                ex.shutdown(cancel_futures=True)
+    if rank == "global":
+        for (typ, _), top, rows in zip(WINDOW_TYPES, tops, kept):
+            for i in top.result():
+                r = rows[i]
+                writer.write(r["chr"], typ, [r])
+        for chrom in {c for c, _ in writer.files}:
+            for typ, _ in WINDOW_TYPES:
+                writer._file(chrom, typ)  # both types in every partition
+    return writer.close(), screened, skipped
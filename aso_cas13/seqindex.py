@@ -0,0 +1,179 @@
+"""Unique window sequences of the window table (dedup layer).
+
+Isoforms share exons, so the same window sequence occurs in many
+(transcript, window) rows. `SequenceIndex` interns every distinct
+`window_seq` of a `WindowTable` to an integer id (numbered in order of first
+occurrence) and keeps:
+- the per-window id (aligned with `01_target_windows.npy`);
+- the first window of each id;
+- the sorted transcripts that contain each sequence (CSR arrays).
+
+Per-sequence work (scores, repeat scans, lookups) can then run once per id,
+with results gathered back to every window by `seq_id` at output time.
+
+Windows up to 32 nt of uppercase ACGT are keyed as 2-bit packed integers and
+deduplicated with `np.unique`. Any other window (N, soft-masked bases) is
+keyed by its string. The index is saved next to the window table as
+`01_window_seqs.npz` and rebuilt when the table changes.
+"""
+from pathlib import Path
+
+import numpy as np
+
+from aso_cas13.windows import WINDOW_TYPES, table_paths
+
+INDEX_NAME = "01_window_seqs.npz"
+MAX_PACKED = 32  # 2 bits per base in a uint64
+_CODE = np.full(256, 4, dtype=np.uint64)
+for _i, _b in enumerate("ACGT"):
+    _CODE[ord(_b)] = _i
+
+
+def intern(values):
+    """(ids, unique values): ids[i] indexes unique, numbered in order of first appearance."""
+    ids, seen = [], {}
+    for v in values:
+        ids.append(seen.setdefault(v, len(seen)))
+    return ids, list(seen)
+
+
+def pack(seq):
+    """2-bit key of an uppercase ACGT sequence of <= 32 nt, else None."""
+    if len(seq) > MAX_PACKED:
+        return None
+    key = 0
+    for b in seq.encode("ascii", "replace"):
+        c = int(_CODE[b])
+        if c == 4:
+            return None
+        key = (key << 2) | c
+    return key
+
+
+def _stamp(results_dir):
+    return np.array([x for p in table_paths(results_dir) for x in (p.stat().st_size, p.stat().st_mtime_ns)], dtype=np.int64)
+
+
+class SequenceIndex:
+    def __init__(self, seq_id, first, tx_offsets, tx_codes, transcripts, keys, fallback):
+        self.seq_id = seq_id  # per window
+        self.first = first  # per sequence id: index of its first window
+        self.tx_offsets = tx_offsets
+        self.tx_codes = tx_codes
+        self.transcripts = transcripts
+        self.keys = keys  # width -> (sorted packed keys, ids)
+        self.fallback = fallback  # sequence -> id, for windows that do not pack
+
+    def __len__(self):
+        return len(self.first)
+
+    def transcript_counts(self):
+        """Number of distinct transcripts containing each sequence id."""
+        return np.diff(self.tx_offsets)
+
+    def transcripts_of(self, sid):
+        return [self.transcripts[c] for c in self.tx_codes[self.tx_offsets[sid]:self.tx_offsets[sid + 1]].tolist()]
+
+    def lookup(self, seqs):
+        """Sequence ids of `seqs` (-1 where not a window sequence)."""
+        out = np.full(len(seqs), -1, dtype=np.int64)
+        for i, s in enumerate(seqs):
+            key = pack(s)
+            if key is None or len(s) not in self.keys:
+                out[i] = self.fallback.get(s, -1)
+                continue
+            keys, ids = self.keys[len(s)]
+            j = np.searchsorted(keys, np.uint64(key))
+            if j < len(keys) and keys[j] == key:
+                out[i] = ids[j]
+        return out
+
+    def save(self, path, stamp=None):
+        arrays = {"seq_id": self.seq_id, "first": self.first, "tx_offsets": self.tx_offsets,
+                  "tx_codes": self.tx_codes, "transcripts": np.array(self.transcripts, dtype=str),
+                  "fallback_seqs": np.array(list(self.fallback), dtype=str),
+                  "fallback_ids": np.array(list(self.fallback.values()), dtype=np.int64)}
+        for w, (keys, ids) in self.keys.items():
+            arrays[f"keys_{w}"], arrays[f"ids_{w}"] = keys, ids
+        if stamp is not None:
+            arrays["stamp"] = stamp
+        tmp = Path(path).with_name(Path(path).name + ".tmp.npz")
+        np.savez(tmp, **arrays)
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path):
+        z = np.load(path)
+        keys = {int(k[5:]): (z[k], z[f"ids_{k[5:]}"]) for k in z.files if k.startswith("keys_")}
+        fallback = dict(zip(z["fallback_seqs"].tolist(), z["fallback_ids"].tolist()))
+        return cls(z["seq_id"], z["first"], z["tx_offsets"], z["tx_codes"], z["transcripts"].tolist(), keys, fallback)
+
+
+def build(table):
+    """SequenceIndex of a WindowTable."""
+    regions, windows = table.regions, np.asarray(table.windows)
+    n = len(windows)
+    # all region sequences in one code array; window = base[region] + offset
+    seqs = [r["sequence"] for r in regions]
+    base = np.zeros(len(seqs), dtype=np.int64)
+    if seqs:
+        base[1:] = np.cumsum([len(s) + 1 for s in seqs])[:-1]
+    codes = _CODE[np.frombuffer("\n".join(seqs).encode("ascii", "replace"), dtype=np.uint8)]
+    label = np.full(n, -1, dtype=np.int64)
+    reps, packed, fallback_label = [], {}, {}
+    for code, (typ, w) in enumerate(WINDOW_TYPES):
+        sel = np.flatnonzero(windows["type"] == code)
+        if not len(sel):
+            continue
+        pos = base[windows["region_id"][sel]] + windows["offset"][sel]
+        bad = np.ones(len(sel), dtype=bool) if w > MAX_PACKED else np.zeros(len(sel), dtype=bool)
+        key = np.zeros(len(sel), dtype=np.uint64)
+        if w <= MAX_PACKED:
+            for j in range(w):
+                c = codes[pos + j]
+                bad |= c == 4
+                key = (key << np.uint64(2)) | (c & np.uint64(3))
+        good = sel[~bad]
+        uk, first, inv = np.unique(key[~bad], return_index=True, return_inverse=True)
+        label[good] = len(reps) + inv
+        packed[w] = (uk, len(reps) + np.arange(len(uk)))
+        reps.extend(good[first].tolist())
+        for i in sel[bad].tolist():
+            s = table.row(i)["window_seq"]
+            if s not in fallback_label:
+                fallback_label[s] = len(reps)
+                reps.append(i)
+            label[i] = fallback_label[s]
+    # renumber labels by first occurrence
+    reps = np.array(reps, dtype=np.int64)
+    order = np.argsort(reps, kind="stable")
+    rank = np.empty(len(reps), dtype=np.int64)
+    rank[order] = np.arange(len(reps))
+    seq_id = rank[label].astype(np.int32) if n else np.empty(0, np.int32)
+    keys = {w: (uk, rank[ids]) for w, (uk, ids) in packed.items()}
+    fallback = {s: int(rank[l]) for s, l in fallback_label.items()}
+    # distinct (sequence, transcript) pairs -> CSR
+    transcripts, region_tx = np.unique(np.array([r["transcript_id"] for r in regions], dtype=str), return_inverse=True) \
+        if regions else (np.empty(0, dtype=str), np.empty(0, dtype=np.int64))
+    ntx = max(len(transcripts), 1)
+    pairs = np.unique(seq_id.astype(np.int64) * ntx + region_tx[windows["region_id"]])
+    tx_offsets = np.concatenate(([0], np.cumsum(np.bincount(pairs // ntx, minlength=len(reps)))))
+    return SequenceIndex(seq_id, reps[order], tx_offsets, (pairs % ntx).astype(np.int32),
+                         transcripts.tolist(), keys, fallback)
+
+
+def open_sequence_index(results_dir, table=None):
+    """The saved index of the window table in `results_dir`, rebuilt if the table changed."""
+    path = Path(results_dir) / INDEX_NAME
+    stamp = _stamp(results_dir)
+    if path.exists():
+        with np.load(path) as z:
+            fresh = "stamp" in z.files and np.array_equal(z["stamp"], stamp)
+        if fresh:
+            return SequenceIndex.load(path)
+    if table is None:
+        from aso_cas13.windows import WindowTable
+        table = WindowTable(results_dir)
+    index = build(table)
+    index.save(path, stamp)
+    return index
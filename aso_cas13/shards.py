@@ -0,0 +1,144 @@
+"""Sharded, deduplicated FASTA export and fan-in of per-shard results.
+
+`ShardWriter` streams FASTA records into one file, N files (round robin), or
+new files whenever a shard reaches a number of sequences or bases:
+`ASO_candidates.fa` becomes `ASO_candidates.000.fa`, `ASO_candidates.001.fa`, ...
+With dedup, each distinct sequence is written once under a query id and
+a sidecar map (`<out>.ids.tsv`: query_id, sequence, row_ids) records
+which candidate rows it stands for.
+
+The parse stages read per-shard outputs (globs, see `blast6.hit_files`) and
+use the map to turn per-query results back into per-sequence or per-row
+values.
+"""
+import csv
+from pathlib import Path
+
+MAP_COLS = ["query_id", "sequence", "row_ids"]
+
+
+def map_path(out):
+    return Path(f"{out}.ids.tsv")
+
+
+def shard_path(out, i):
+    out = Path(out)
+    return out.with_name(f"{out.stem}.{i:03d}{out.suffix}")
+
+
+class ShardWriter:
+    """FASTA records to `out`, or to shards of it.
+
+    `shards`: fixed number of files filled round robin; `max_seqs` /
+    `max_bases`: start a new file once the current one would exceed either.
+    """
+
+    def __init__(self, out, shards=None, max_seqs=None, max_bases=None):
+        self.out = Path(out)
+        self.shards, self.max_seqs, self.max_bases = shards, max_seqs, max_bases
+        self.sharded = bool(shards or max_seqs or max_bases)
+        self.files, self.paths = [], []
+        self.seqs = self.bases = 0  # in the current rolling shard
+        self.n = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _open(self):
+        path = shard_path(self.out, len(self.files)) if self.sharded else self.out
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.paths.append(path)
+        self.files.append(path.open("w"))
+        self.seqs = self.bases = 0
+
+    def write(self, qid, seq):
+        if self.shards:
+            if len(self.files) < self.shards:
+                self._open()
+            f = self.files[self.n % self.shards]
+        else:
+            full = self.files and ((self.max_seqs and self.seqs + 1 > self.max_seqs) or
+                                   (self.max_bases and self.seqs and self.bases + len(seq) > self.max_bases))
+            if not self.files or full:
+                self._open()
+            f = self.files[-1]
+        f.write(f">{qid}\n{seq}\n")
+        self.seqs += 1
+        self.bases += len(seq)
+        self.n += 1
+
+    def close(self):
+        if not self.files and not self.sharded:
+            self._open()  # an empty FASTA, as the unsharded export always writes one
+        for f in self.files:
+            f.close()
+        if self.sharded:
+            # drop shards left over from an earlier, larger split
+            for old in self.out.parent.glob(f"{self.out.stem}.[0-9][0-9][0-9]{self.out.suffix}"):
+                if old not in self.paths:
+                    old.unlink()
+
+
+def write_map(path, queries):
+    """`queries`: {query_id: (sequence, [row ids])}."""
+    with Path(path).open("w", newline="") as f:
+        w = csv.writer(f, delimiter="\t")
+        w.writerow(MAP_COLS)
+        for q, (seq, rows) in queries.items():
+            w.writerow([q, seq, ",".join(rows)])
+
+
+def load_map(path):
+    """{query_id: (sequence, [row ids])} from a sidecar map."""
+    with Path(path).open() as f:
+        return {r["query_id"]: (r["sequence"], r["row_ids"].split(",") if r["row_ids"] else [])
+                for r in csv.DictReader(f, delimiter="\t")}
+
+
+def by_sequence(values, qmap):
+    """{sequence: value} from {query_id: value}; a query with no value is left out."""
+    return {seq: values[q] for q, (seq, _) in qmap.items() if q in values}
+
+
+def for_rows(values, map_file, rows, seqcol="window_seq", default=0):
+    """{row qid: value} of per-query `values` from a mapped export, matched by sequence.
+
+    Without a map `values` are already keyed by the rows' qids and are returned as is.
+    """
+    if not map_file:
+        return values
+    seqs = by_sequence(values, load_map(map_file))
+    return {r["qid"]: seqs.get(r[seqcol].strip().upper(), default) for r in rows}
+
+
+def by_row(values, qmap):
+    """{row id: value} from {query_id: value}, in map order."""
+    return {r: values[q] for q, (_, rows) in qmap.items() if q in values for r in rows}
+
+
+def query_sequences(query, map_file=None):
+    """Upper-case sequences an external search ran on: those of the sidecar map,
+    else of the query FASTA (or a glob of its shards). Missing files add nothing."""
+    if map_file:
+        return {seq.upper() for seq, _ in load_map(map_file).values()}
+    from aso_cas13.blast6 import hit_files
+    seqs, cur = set(), []
+    for f in hit_files(query):
+        if not Path(f).exists():
+            continue
+        with open(f) as fh:
+            for line in fh:
+                line = line.strip()
+                if line.startswith(">"):
+                    if cur:
+                        seqs.add("".join(cur).upper())
+                    cur = []
+                elif line:
+                    cur.append(line)
+        if cur:
+            seqs.add("".join(cur).upper())
+        cur = []
+    return seqs
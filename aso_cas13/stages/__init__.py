@@ -0,0 +1,48 @@
+"""The pipeline stages as importable modules, one `main(argv=None)` each.
+
+The numbered scripts are thin wrappers around these modules and
+`aso-cas13 <command>` (aso_cas13.cli) runs the same code. A stage module
+imports only the light aso_cas13 helpers; pandas, matplotlib/seaborn and
+ViennaRNA are imported inside the functions that need them, so a command
+pays only for the libraries its options use.
+"""
+import importlib, sys
+
+SCRIPTS = [
+    "00_audit_inputs", "01_locus_windows", "02_filter_candidates", "03_export_candidates_fasta",
+    "03_parse_blast", "04_parse_blast_genome", "04_summarize_offtargets", "05_merge_offtargets",
+    "05_visualize_candidates", "07_rnafold_energy", "08_repeat_filters", "09_accessibility_proxy",
+    "10_isoform_conservation", "11_final_integration", "12_stringent_final_sets", "13_visualize_integrated",
+]
+# command -> numbered script, e.g. filter-candidates -> 02_filter_candidates
+COMMANDS = {s[3:].replace("_", "-"): s for s in SCRIPTS}
+
+
+def resolve(name):
+    """Numbered script of a command or script name (02_filter_candidates[.py] also works)."""
+    name = name[:-3] if name.endswith(".py") else name
+    if name in COMMANDS:
+        return COMMANDS[name]
+    if name in SCRIPTS:
+        return name
+    raise KeyError(name)
+
+
+def command(name):
+    return resolve(name)[3:].replace("_", "-")
+
+
+def load(name):
+    """The stage module of a command or script name; only it and its light imports are loaded."""
+    return importlib.import_module(f"{__name__}.{resolve(name)[3:]}")
+
+
+def run(name, argv=()):
+    """Run one stage in this process, as `aso-cas13 <name> <argv>` would."""
+    argv = list(argv)
+    saved = sys.argv
+    sys.argv = [f"aso-cas13 {command(name)}", *argv]  # usage messages and the metrics' argv
+    try:
+        load(name).main(argv)
+    finally:
+        sys.argv = saved
@@ -0,0 +1,38 @@
+"""Stage 09: accessibility score (GC/homopolymer proxy or RNAplfold)."""
+import argparse
+
+from aso_cas13.annotate import accessibility_column, add_columns, read_frame, stage_path, write_frame
+from aso_cas13.metrics import StageMetrics
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser()
+    p.add_argument("--engine", choices=["proxy", "plfold"], default="proxy",
+                   help="proxy: GC%%/homopolymer heuristic; plfold: mean unpaired probability from per-region local folding")
+    p.add_argument("--regions", default="outputs/results/01_target_regions.tsv", help="target regions from 01_locus_windows.py")
+    p.add_argument("--cache", default="outputs/cache/accessibility", help="per-region profile cache for --engine plfold")
+    p.add_argument("--window", type=int, default=80, help="RNAplfold -W")
+    p.add_argument("--span", type=int, default=40, help="RNAplfold -L")
+    p.add_argument("--workers", type=int, default=None)
+    p.add_argument("--format", choices=["tsv", "parquet", "feather"], default="tsv", help="table format of the stage outputs")
+    a = p.parse_args(argv)
+    metrics = StageMetrics("09_accessibility_proxy")
+
+    index = None
+    if a.engine == "plfold":
+        from aso_cas13.accessibility import AccessibilityIndex
+        index = AccessibilityIndex(a.regions, a.cache, a.window, a.span, a.workers)
+
+    for typ in ("ASO", "Cas13"):
+        inp = stage_path(typ, "repeats", fmt=a.format)
+        metrics.phase("load")
+        frame = read_frame(inp)
+        metrics.phase("compute", rows_in=len(frame))
+        cols, fallback = accessibility_column(frame, index)
+        add_columns(frame, cols)
+        metrics.phase("write", rows_out=len(frame))
+        write_frame(frame, stage_path(typ, "access", fmt=a.format))
+        if fallback:
+            print(f"{inp}: {fallback} windows outside the target regions used the GC/homopolymer proxy")
+    print(f"Wrote outputs/design/*_with_access.{a.format}")
+    metrics.done()
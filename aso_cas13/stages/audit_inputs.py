@@ -0,0 +1,121 @@
+"""Stage 00: audit of the pipeline outputs (sizes, checksums, columns, figures)."""
+import argparse, os, sys, json
+from pathlib import Path
+
+from aso_cas13.audit import audit_files
+from aso_cas13.metrics import StageMetrics, summarize
+
+ROOT = Path(".")
+TARGETS = [
+    # Reference
+    "outputs/reference/DMPK_ref_GRCh38.fasta",
+    # Pre-integration design
+    "outputs/design/ASO_candidates_final_grch38.tsv",
+    "outputs/design/Cas13_guides_final_grch38.tsv",
+    # Merged with conservation
+    "outputs/design/ASO_candidates_with_conservation.tsv",
+    "outputs/design/Cas13_guides_with_conservation.tsv",
+    # Final integrated
+    "outputs/design/ASO_candidates_final_integrated.tsv",
+    "outputs/design/Cas13_guides_final_integrated.tsv",
+    # Stringent sets
+    "outputs/design/ASO_candidates_final_stringent.tsv",
+    "outputs/design/Cas13_guides_final_stringent.tsv",
+    # RNAfold raw outputs
+    "outputs/results/ASO_rnafold.txt",
+    "outputs/results/Cas13_rnafold.txt",
+    # Figures
+    "outputs/figures/integrated_score_vs_offtargets.png",
+    "outputs/figures/dG_distribution.png",
+    "outputs/figures/accessibility_distribution.png",
+    "outputs/figures/top_candidates_integrated_barplot.png",
+]
+
+REQ_COLS_DESIGN = [
+    "type","transcript_id","chr","strand","win_start","win_end",
+    "gc","tm","score_base","offtargets_genome","score_final","window_seq"
+]
+REQ_COLS_MERGED_EXTRAS = [
+    "rnafold_dG","has_homopolymer_5+","simple_repeat_score",
+    "accessibility_score","isoform_conservation"
+]
+REQ_COLS_FINAL = REQ_COLS_DESIGN + REQ_COLS_MERGED_EXTRAS + ["final_integrated_score"]
+
+def check_spec(t):
+    """(kind, keyword arguments) of the aso_cas13.audit check for target `t`."""
+    if t.endswith(".fasta"):
+        return "fasta", {}
+    if t.endswith(".tsv"):
+        expected = None
+        numeric = None
+        if "final_grch38.tsv" in t:
+            expected = REQ_COLS_DESIGN
+            numeric = {
+                "gc":"float","tm":"float","score_base":"float","score_final":"float",
+                "win_start":"int","win_end":"int","offtargets_genome":"int"
+            }
+        if "with_conservation.tsv" in t:
+            expected = REQ_COLS_DESIGN + REQ_COLS_MERGED_EXTRAS
+            numeric = {
+                "gc":"float","tm":"float","score_base":"float","score_final":"float",
+                "win_start":"int","win_end":"int","offtargets_genome":"int",
+                "rnafold_dG":"float","simple_repeat_score":"float","accessibility_score":"float",
+                "isoform_conservation":"int"
+            }
+        if "final_integrated.tsv" in t:
+            expected = REQ_COLS_FINAL
+            numeric = {
+                "gc":"float","tm":"float","score_base":"float","score_final":"float",
+                "win_start":"int","win_end":"int","offtargets_genome":"int",
+                "rnafold_dG":"float","simple_repeat_score":"float","accessibility_score":"float",
+                "isoform_conservation":"int","final_integrated_score":"float"
+            }
+        if "stringent.tsv" in t:
+            expected = REQ_COLS_FINAL
+            numeric = {
+                "offtargets_genome":"int","final_integrated_score":"float"
+            }
+        return "tsv", {"expected_cols": expected, "numeric_checks": numeric}
+    if t.endswith(".txt"):
+        return "text", {"grep_keywords": ["MFE","dG","ΔG"]}
+    if t.endswith(".png"):
+        return "image", {}
+    return None, {}
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--performance", nargs="?", const="outputs/logs/metrics.jsonl", default=None, metavar="METRICS",
+                    help="add the latest per-stage metrics (aso_cas13.metrics JSON lines) as _performance")
+    ap.add_argument("--fast", action="store_true",
+                    help="reuse cached results of files whose size and mtime are unchanged (outputs/cache/audit_inputs.json)")
+    ap.add_argument("--workers", type=int, default=None, help="files checked concurrently (default: min(8, CPUs))")
+    args = ap.parse_args(argv)
+    metrics = StageMetrics("00_audit_inputs").phase("compute", rows_in=len(TARGETS))
+    # one read per file (size, lines, SHA-1 and the type check together), files in parallel
+    jobs = [(t, *check_spec(t)) for t in TARGETS]
+    entries = audit_files(jobs, args.workers, fast=args.fast)
+    report = dict(zip(TARGETS, entries))
+
+    # Also list any unexpected empties in key directories
+    extra = {}
+    for d in ["outputs/reference","outputs/design","outputs/results","outputs/figures"]:
+        dp = Path(d)
+        if dp.exists():
+            empties = []
+            for f in dp.iterdir():
+                try:
+                    if f.is_file() and f.stat().st_size == 0:
+                        empties.append(str(f))
+                except Exception:
+                    pass
+            extra[d] = {"empty_files": empties}
+        else:
+            extra[d] = {"missing_dir": True}
+    report["_directory_empty_scan"] = extra
+
+    if args.performance:
+        report["_performance"] = summarize(args.performance)
+
+    metrics.phase("write")
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    metrics.done()
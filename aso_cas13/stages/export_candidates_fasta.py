@@ -0,0 +1,70 @@
+"""Stage 03: candidate table to FASTA (deduplicated, sharded or cache-filtered)."""
+import argparse
+
+from aso_cas13.metrics import StageMetrics
+from aso_cas13.shards import ShardWriter, map_path, write_map
+from aso_cas13.tables import iter_rows, read_rows
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser()
+    p.add_argument("--input", required=True, help="candidate table (.tsv, .parquet or .feather)")
+    p.add_argument("--seqcol", default="window_seq")
+    p.add_argument("--idfmt", default="{type}|{transcript_id}|{win_start}|{win_end}")
+    p.add_argument("--out", required=True)
+    p.add_argument("--cache", default=None, help="off-target cache (SQLite); only sequences missing from it are exported")
+    p.add_argument("--ref", default="inputs/reference/GRCh38.fa", help="reference FASTA whose hash keys the cache")
+    p.add_argument("--ref-build", default=None, help="reference build label to key the cache instead of hashing --ref")
+    p.add_argument("--search-params", default="blastn", help="search settings the cache entries must match")
+    p.add_argument("--min-pident", type=float, default=None,
+                   help="with --min-length: look up the filtered counts 05_merge_offtargets.py caches (default: the hit-line counts of 04)")
+    p.add_argument("--min-length", type=int, default=None)
+    g = p.add_argument_group("dedup and sharding (a sidecar map <out>.ids.tsv links query ids to rows)")
+    g.add_argument("--dedup", action="store_true", help="write each distinct sequence once, as <query-prefix><n>")
+    g.add_argument("--query-prefix", default="q", help="--dedup: query id prefix")
+    g.add_argument("--shards", type=int, default=None, help="split into N files <out stem>.000<suffix>, ... (round robin)")
+    g.add_argument("--seqs-per-shard", type=int, default=None, help="start a new shard after this many sequences")
+    g.add_argument("--bases-per-shard", type=int, default=None, help="start a new shard before exceeding this many bases")
+    g.add_argument("--map", default=None, help="sidecar map path (default: <out>.ids.tsv)")
+    a = p.parse_args(argv)
+    metrics = StageMetrics("03_export_candidates_fasta").phase("load")
+    sidecar = a.dedup or a.shards or a.seqs_per_shard or a.bases_per_shard or a.map
+    cached = set()
+    if a.cache:
+        # the cache lookup needs every sequence up front
+        rows = read_rows(a.input)
+        metrics.phase("compute", rows_in=len(rows))
+        from aso_cas13.ot_cache import OffTargetCache, blast_params, reference_key
+        params = blast_params(a.search_params, a.min_pident, a.min_length)
+        with OffTargetCache(a.cache, reference_key(a.ref, a.ref_build), params) as c:
+            cached = set(c.get_many(row[a.seqcol].strip() for row in rows))
+    else:
+        rows = iter_rows(a.input)  # streamed straight into the FASTA
+    metrics.phase("write")
+    n = total = 0
+    queries = {}  # query id -> (sequence, [row ids])
+    query_of = {}  # sequence -> query id (dedup)
+    with ShardWriter(a.out, a.shards, a.seqs_per_shard, a.bases_per_shard) as out:
+        for row in rows:
+            total += 1
+            seq = row[a.seqcol].strip().upper()
+            if seq in cached: continue
+            _id = a.idfmt.format(**row)
+            if a.dedup and seq in query_of:
+                queries[query_of[seq]][1].append(_id)
+                continue
+            qid = f"{a.query_prefix}{len(query_of)}" if a.dedup else _id
+            query_of[seq] = qid
+            if sidecar:
+                queries[qid] = (seq, [_id])
+            out.write(qid, seq)
+            n += 1
+    if sidecar:
+        write_map(a.map or map_path(a.out), queries)
+    metrics.rows(rows_in=total, rows_out=n)
+    if a.cache:
+        print(f"Wrote {a.out} with {n} sequences ({total - n} rows served by the off-target cache).")
+    if sidecar:
+        where = f"{len(out.paths)} shards {', '.join(map(str, out.paths))}" if out.sharded else str(a.out)
+        print(f"Wrote {n} sequences for {total} rows to {where}; map {a.map or map_path(a.out)}")
+    metrics.done()
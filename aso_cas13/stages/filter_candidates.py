@@ -0,0 +1,63 @@
+"""Stage 02: GC/Tm scoring and the top ASO and Cas13 windows."""
+import argparse
+from pathlib import Path
+
+from aso_cas13.metrics import StageMetrics
+from aso_cas13.scoring import top_windows, write_top
+from aso_cas13.tables import with_format
+from aso_cas13.windows import WindowTable
+
+
+def main(argv=None):
+    inp_dir = Path("outputs/results")  # 01_target_regions.tsv + 01_target_windows.npy
+    aso_out = Path("outputs/design/ASO_candidates_top.tsv")
+    cas_out = Path("outputs/design/Cas13_guides_top.tsv")
+    p = argparse.ArgumentParser()
+    p.add_argument("--max-repeat-score", type=int, default=None, help="drop windows above this simple_repeat_score before the top-50 cut")
+    p.add_argument("--no-homopolymer", action="store_true", help="drop windows with a homopolymer run before the top-50 cut")
+    p.add_argument("--motifs", default=None, help="repeat motif set (JSON/YAML); defaults to the 08_repeat_filters.py motifs")
+    p.add_argument("--dedup", action="store_true",
+                   help="score and filter each unique window sequence once (index cached as 01_window_seqs.npz)")
+    p.add_argument("--format", choices=["tsv", "parquet", "feather"], default="tsv", help="table format of the stage outputs")
+    g = p.add_argument_group("nearest-neighbor thermodynamics (salt-corrected Tm and duplex ΔG of every window)")
+    g.add_argument("--thermo", action="store_true", help="add tm_nn and dG_duplex columns (used by 11_final_integration.py)")
+    g.add_argument("--nn-params", choices=["dna", "rna_dna"], default="dna",
+                   help="dna: SantaLucia 1998 DNA/DNA; rna_dna: Sugimoto 1995 DNA oligo on the RNA target")
+    g.add_argument("--na-mM", type=float, default=50.0)
+    g.add_argument("--mg-mM", type=float, default=0.0)
+    g.add_argument("--oligo-nM", type=float, default=250.0, help="concentration of each strand")
+    g.add_argument("--min-tm-nn", type=float, default=None, help="drop windows below this NN Tm before the top-50 cut")
+    g.add_argument("--max-tm-nn", type=float, default=None, help="drop windows above this NN Tm before the top-50 cut")
+    a = p.parse_args(argv)
+    aso_out, cas_out = with_format(aso_out, a.format), with_format(cas_out, a.format)
+    metrics = StageMetrics("02_filter_candidates").phase("load")
+
+    table = WindowTable(inp_dir)
+    keep = None
+    if a.max_repeat_score is not None or a.no_homopolymer:
+        from aso_cas13.repeats import RepeatScanner, load_motifs, window_mask
+        keep = window_mask(table, RepeatScanner(load_motifs(a.motifs)), a.max_repeat_score, a.no_homopolymer)
+
+    thermo = None
+    if a.thermo or a.min_tm_nn is not None or a.max_tm_nn is not None:
+        from aso_cas13.thermo import NearestNeighbor
+        thermo = NearestNeighbor(table.regions, a.nn_params, a.na_mM, a.mg_mM, a.oligo_nM)
+        if a.min_tm_nn is not None or a.max_tm_nn is not None:
+            tm_keep, other = thermo.mask(a.min_tm_nn, a.max_tm_nn), keep
+            keep = tm_keep if other is None else lambda chunk: other(chunk) & tm_keep(chunk)
+
+    seqs = None
+    if a.dedup:
+        from aso_cas13.seqindex import open_sequence_index
+        seqs = open_sequence_index(inp_dir, table)
+        print(f"{len(table.windows)} windows, {len(seqs)} unique sequences")
+
+    # Vectorized GC/Tm scoring over all windows; bounded top 50 per type
+    metrics.phase("compute", rows_in=len(table.windows))
+    aso_top, cas_top = top_windows(table, keep=keep, seqs=seqs, thermo=thermo)
+    metrics.phase("write", rows_out=len(aso_top) + len(cas_top))
+    write_top(aso_out, aso_top)
+    write_top(cas_out, cas_top)
+
+    print(f"Wrote {aso_out} and {cas_out} with top candidates.")
+    metrics.done()
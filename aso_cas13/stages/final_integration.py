@@ -0,0 +1,91 @@
+"""Stage 11: final integrated score (or stages 07-11 fused in memory)."""
+import argparse
+
+from aso_cas13.annotate import add_columns, final_integrated_score, read_frame, stage_path, write_frame
+from aso_cas13.metrics import StageMetrics
+
+WEIGHTS = {
+    "homopolymer_penalty": 3.0,
+    "repeat_penalty": 0.5,  # per simple_repeat_score point
+    "min_accessibility": 0.7, "low_accessibility_factor": 0.8,
+    "stable_dG": -20, "stable_dG_penalty": 2.0,  # extremely stable RNAfold structures
+    "isoform_bonus_2": 1.0, "isoform_bonus_3": 0.5,  # window shared by >= 2 / >= 3 isoforms
+    "min_tm_nn": 50.0, "low_tm_nn_penalty": 1.0,  # weak duplex by nearest-neighbor Tm (02 --thermo only)
+}
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser()
+    p.add_argument("--fused", action="store_true",
+                   help="run stages 07-11 in memory from *_final_grch38.tsv; only the final tables are written")
+    p.add_argument("--format", choices=["tsv", "parquet", "feather"], default="tsv", help="table format of the stage outputs")
+    p.add_argument("--debug", action="store_true", help="--fused: also write the *_with_*.tsv intermediates")
+    g = p.add_argument_group("fused stage options (same meaning as in 07-10)")
+    g.add_argument("--fold-engine", choices=["text", "vienna"], default="text")
+    g.add_argument("--fold-cache", default="outputs/cache/rnafold.sqlite")
+    g.add_argument("--temperature", type=float, default=37.0)
+    g.add_argument("--dangles", type=int, default=2)
+    g.add_argument("--param-file", default=None)
+    g.add_argument("--aso-rnafold", default="outputs/results/ASO_rnafold.txt")
+    g.add_argument("--cas-rnafold", default="outputs/results/Cas13_rnafold.txt")
+    g.add_argument("--aso-map", default=None)
+    g.add_argument("--cas-map", default=None)
+    g.add_argument("--rnafold-cmd", default=None)
+    g.add_argument("--aso-query", default="outputs/results/ASO_candidates.fa")
+    g.add_argument("--cas-query", default="outputs/results/Cas13_guides.fa")
+    g.add_argument("--concurrency", type=int, default=4)
+    g.add_argument("--retries", type=int, default=1)
+    g.add_argument("--timeout", type=float, default=None)
+    g.add_argument("--motifs", default=None)
+    g.add_argument("--low-complexity", action="store_true")
+    g.add_argument("--access-engine", choices=["proxy", "plfold"], default="proxy")
+    g.add_argument("--regions", default="outputs/results/01_target_regions.tsv")
+    g.add_argument("--access-cache", default="outputs/cache/accessibility")
+    g.add_argument("--window", type=int, default=80)
+    g.add_argument("--span", type=int, default=40)
+    g.add_argument("--isoform-engine", choices=["table", "windows", "index"], default="table")
+    g.add_argument("--ref", default="inputs/reference/chr19.fa")
+    g.add_argument("--gtf", default="inputs/reference/annotation.gtf")
+    g.add_argument("--windows", default="outputs/results")
+    g.add_argument("--isoform-cache", default="outputs/cache/isoforms")
+    g.add_argument("--mismatches", type=int, default=0, choices=[0, 1])
+    g.add_argument("--workers", type=int, default=None)
+    a = p.parse_args(argv)
+    metrics = StageMetrics("11_final_integration:fused" if a.fused else "11_final_integration")
+
+    if a.fused:
+        metrics.phase("compute")  # one in-memory pass; reads and writes are inside
+        from aso_cas13 import annotate
+        from aso_cas13.repeats import RepeatScanner, load_motifs
+        frames = {typ: read_frame(stage_path(typ, "input", fmt=a.format)) for typ in annotate.PREFIX}
+        maps = {"ASO": a.aso_map, "Cas13": a.cas_map}
+        if a.fold_engine == "vienna":
+            E = annotate.vienna_energies(frames.values(), a.fold_cache, a.workers, a.temperature, a.dangles, a.param_file)
+            energies = {typ: E for typ in frames}
+        else:
+            rnafold_txt = {"ASO": a.aso_rnafold, "Cas13": a.cas_rnafold}
+            queries = {"ASO": a.aso_query, "Cas13": a.cas_query}
+            energies = {typ: annotate.text_energies(rnafold_txt[typ], maps[typ], a.rnafold_cmd, queries[typ],
+                                                    a.concurrency, a.retries, a.timeout) for typ in frames}
+        by_seq = {typ: a.fold_engine == "vienna" or bool(maps[typ]) for typ in frames}
+        index = None
+        if a.access_engine == "plfold":
+            from aso_cas13.accessibility import AccessibilityIndex
+            index = AccessibilityIndex(a.regions, a.access_cache, a.window, a.span, a.workers)
+        coverage = None
+        if a.isoform_engine == "index":
+            coverage = lambda f: annotate.index_coverage(f, a.gtf, a.ref, a.mismatches, a.isoform_cache)
+        elif a.isoform_engine == "windows":
+            coverage = lambda f: annotate.window_coverage(f, a.windows)
+        annotate.run_fused(energies, by_seq, RepeatScanner(load_motifs(a.motifs)), WEIGHTS,
+                           a.low_complexity, index, coverage, a.debug, fmt=a.format, frames=frames)
+    else:
+        for typ in ("ASO", "Cas13"):
+            metrics.phase("load")
+            frame = read_frame(stage_path(typ, "conservation", fmt=a.format))
+            metrics.phase("compute", rows_in=len(frame))
+            add_columns(frame, final_integrated_score(frame, WEIGHTS))
+            metrics.phase("write", rows_out=len(frame))
+            write_frame(frame, stage_path(typ, "final", fmt=a.format))
+    print(f"Wrote {stage_path('ASO', 'final', fmt=a.format)} and {stage_path('Cas13', 'final', fmt=a.format)}")
+    metrics.done()
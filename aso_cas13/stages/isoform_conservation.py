@@ -0,0 +1,36 @@
+"""Stage 10: number of isoforms sharing each candidate window."""
+import argparse
+
+from aso_cas13.annotate import add_columns, index_coverage, isoform_conservation, read_frame, stage_path, table_coverage, window_coverage, write_frame
+from aso_cas13.metrics import StageMetrics
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser()
+    p.add_argument("--engine", choices=["table", "windows", "index"], default="table",
+                   help="table: count transcripts among rows of this table; windows: among all windows of the target "
+                        "regions (unique-sequence index of 01); index: look windows up in all spliced isoforms")
+    p.add_argument("--ref", default="inputs/reference/chr19.fa")
+    p.add_argument("--gtf", default="inputs/reference/annotation.gtf")
+    p.add_argument("--windows", default="outputs/results", help="--engine windows: directory of the 01 window table")
+    p.add_argument("--cache", default="outputs/cache/isoforms", help="--engine index: cache directory")
+    p.add_argument("--mismatches", type=int, default=0, choices=[0, 1], help="--engine index: allow one mismatch")
+    p.add_argument("--format", choices=["tsv", "parquet", "feather"], default="tsv", help="table format of the stage outputs")
+    a = p.parse_args(argv)
+    metrics = StageMetrics("10_isoform_conservation")
+
+    for typ in ("ASO", "Cas13"):
+        metrics.phase("load")
+        frame = read_frame(stage_path(typ, "access", fmt=a.format))
+        metrics.phase("compute", rows_in=len(frame))
+        if a.engine == "index":
+            cov = index_coverage(frame, a.gtf, a.ref, a.mismatches, a.cache)
+        elif a.engine == "windows":
+            cov = window_coverage(frame, a.windows)
+        else:
+            cov = table_coverage(frame)
+        add_columns(frame, isoform_conservation(frame, cov))
+        metrics.phase("write", rows_out=len(frame))
+        write_frame(frame, stage_path(typ, "conservation", fmt=a.format))
+    print(f"Wrote outputs/design/*_with_conservation.{a.format}")
+    metrics.done()
@@ -0,0 +1,87 @@
+"""Stage 01: target regions and windows of the DMPK locus (or batch / screening runs)."""
+import argparse
+from pathlib import Path
+
+from aso_cas13.gtf_index import open_index
+from aso_cas13.metrics import StageMetrics
+from aso_cas13.refstore import norm_chr, open_reference
+from aso_cas13.windows import overlap_targets, window_rows, write_compact, write_windows
+
+ref_fa = Path("inputs/reference/chr19.fa")
+gtf = Path("inputs/reference/annotation.gtf")
+bed = Path("inputs/reference/DMPK_CTGrepeat_GRCh38.bed")
+out_dir = Path("outputs/results")
+out_csv = out_dir / "01_target_windows.csv"
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser()
+    p.add_argument("--batch", action="store_true", help="design every BED locus / gene, one partition per locus")
+    p.add_argument("--bed", default=None, help=f"BED of the locus (its first line; default {bed}), or of every locus with --batch")
+    p.add_argument("--genes", default=None, help="comma-separated gene names or a file with one per line (batch mode)")
+    p.add_argument("--workers", type=int, default=None)
+    p.add_argument("--ref", default=str(ref_fa), help="reference FASTA")
+    p.add_argument("--gtf", default=str(gtf), help="annotation GTF")
+    p.add_argument("--csv", action="store_true", help="also write the legacy one-row-per-window CSV (large)")
+    p.add_argument("--dedup", action="store_true", help="also write the unique-sequence index 01_window_seqs.npz")
+    g = p.add_argument_group("screening (every annotated gene, streamed in chunks with bounded memory)")
+    g.add_argument("--screen", action="store_true", help="screen all genes of the annotation (or --genes) into partitions per chromosome")
+    g.add_argument("--features", default="three_prime_utr,exon", help="GTF feature types to window, e.g. three_prime_utr")
+    g.add_argument("--rank", choices=["gene", "global"], default="gene", help="keep the top k per gene or over all genes")
+    g.add_argument("--top-k", type=int, default=50)
+    g.add_argument("--chunk-bases", type=int, default=None, help="feature bases windowed per task")
+    g.add_argument("--screen-dir", default="outputs/design/screen")
+    a = p.parse_args(argv)
+    metrics = StageMetrics("01_locus_windows:batch" if a.batch else "01_locus_windows:screen" if a.screen else "01_locus_windows")
+
+    if a.screen:
+        from aso_cas13.batch import read_genes
+        from aso_cas13.screen import CHUNK_BASES, run_screen
+        metrics.phase("compute")
+        manifest, screened, skipped = run_screen(a.ref, a.gtf, a.screen_dir, a.top_k, a.rank, a.features.split(","),
+                                                 genes=read_genes(a.genes) if a.genes else None,
+                                                 chunk_bases=a.chunk_bases or CHUNK_BASES, workers=a.workers)
+        metrics.rows(rows_in=screened)
+        print(f"Screened {screened} genes ({skipped} on chromosomes missing from {a.ref}); manifest {manifest}")
+        metrics.done()
+        return
+
+    if a.batch:
+        from aso_cas13.batch import run_batch
+        if not a.bed and not a.genes:
+            a.bed = bed
+        metrics.phase("compute")
+        manifest, summary = run_batch(a.ref, a.gtf, bed=a.bed, genes=a.genes, workers=a.workers)
+        metrics.rows(rows_in=len(summary), rows_out=sum(r[5] for r in summary))
+        print(f"Wrote {len(summary)} locus partitions with {sum(r[5] for r in summary)} window rows; manifest {manifest}")
+        metrics.done()
+        return
+
+    metrics.phase("load")
+    # Packed, memory-mapped reference (built next to the FASTA on first use)
+    ref = open_reference(a.ref)
+
+    # DMPK exons/UTRs from the compiled annotation index (built on first use)
+    with open_index(a.gtf) as ann:
+        regions = ann.features("DMPK", ("three_prime_utr", "exon"))  # (chr, start, end, strand, transcript_id)
+
+    # Load BED locus
+    with Path(a.bed or bed).open() as f:
+        b = f.readline().strip().split("\t")
+        bed_chr, bed_start, bed_end = norm_chr(b[0]), int(b[1]), int(b[2])
+
+    # Intersect BED with regions; regions are stored once, windows as integer columns
+    metrics.phase("compute", rows_in=len(regions))
+    targets = overlap_targets(regions, bed_chr, bed_start, bed_end, ref)
+    metrics.phase("write", rows_in=len(targets))
+    regions_path, windows_path, n_windows = write_compact(out_dir, targets)
+    if a.csv:
+        write_windows(out_csv, window_rows(targets))
+
+    if a.dedup:
+        from aso_cas13.seqindex import open_sequence_index
+        print(f"{len(open_sequence_index(out_dir))} unique window sequences")
+
+    metrics.rows(rows_out=n_windows)
+    print(f"Wrote {regions_path} ({len(targets)} regions) and {windows_path} with {n_windows} window rows.")
+    metrics.done()
@@ -0,0 +1,102 @@
+"""Stage 05: merge off-target counts into a candidate table."""
+import argparse, csv
+
+from aso_cas13.metrics import StageMetrics
+from aso_cas13.tables import read_rows, table_format, write_rows
+
+
+def make_id(row):
+    return f"{row['type']}|{row['transcript_id']}|{row['win_start']}|{row['win_end']}"
+
+
+# Read input file explicitly
+def read_tsv(inp):
+    with open(inp) as f:
+        header = f.readline().strip().split('\t')   # read header line
+        # ✅ Add the new column if not present
+        if 'offtargets_genome' not in header:
+            header.append('offtargets_genome')
+
+        rows = []
+        for line in f:
+            parts = line.strip().split('\t')
+            if len(parts) == len(header) - 1:  # minus the new column
+                row = dict(zip(header[:-1], parts))
+                rows.append(row)
+    return header, rows
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser()
+    p.add_argument("inp", help="candidate table (.tsv, .parquet or .feather)")
+    p.add_argument("offt", help="candidate_id/offtargets_genome table from 04_summarize_offtargets.py")
+    p.add_argument("outp", help="output table; format follows the suffix")
+    p.add_argument("--cache", default=None, help="off-target cache (SQLite); fills rows whose sequence was not searched this run")
+    p.add_argument("--ref", default="inputs/reference/GRCh38.fa", help="reference FASTA whose hash keys the cache")
+    p.add_argument("--ref-build", default=None, help="reference build label to key the cache instead of hashing --ref")
+    p.add_argument("--search-params", default="blastn", help="search settings the cache entries must match")
+    p.add_argument("--min-pident", type=float, default=90.0, help="thresholds the summary counts were filtered with (part of the cache key)")
+    p.add_argument("--min-length", type=int, default=18)
+    p.add_argument("--query", default=None, help="FASTA (or a glob of shards) the search ran on; its rows without hits are cached as 0")
+    p.add_argument("--map", default=None, help="sidecar map of the searched export, instead of --query")
+    p.add_argument("--seqcol", default="window_seq")
+    a = p.parse_args(argv)
+    inp, offt, outp = a.inp, a.offt, a.outp
+    metrics = StageMetrics("05_merge_offtargets").phase("load")
+
+    # Load off-target counts
+    offt_map = {}
+    with open(offt) as f:
+        reader = csv.DictReader(f, delimiter='\t')
+        for row in reader:
+            offt_map[row['candidate_id']] = row['offtargets_genome']
+
+    if table_format(inp) == "tsv":
+        header, rows = read_tsv(inp)
+    else:
+        rows = read_rows(inp)
+        header = list(rows[0]) if rows else []
+        if 'offtargets_genome' not in header:
+            header.append('offtargets_genome')
+
+    metrics.phase("compute", rows_in=len(rows))
+    # A row found in the summary takes its count, rows skipped at export are served
+    # from the cache and the rest are 0. Only results of sequences that were searched
+    # (summary rows, and --query/--map sequences without hits) are written back.
+    cached, fresh, searched = {}, {}, set()
+    if a.cache:
+        from aso_cas13.ot_cache import OffTargetCache, blast_params, reference_key
+        from aso_cas13.shards import query_sequences
+        cache = OffTargetCache(a.cache, reference_key(a.ref, a.ref_build),
+                               blast_params(a.search_params, a.min_pident, a.min_length))
+        cached = cache.get_many(row.get(a.seqcol, "") for row in rows if make_id(row) not in offt_map)
+        if a.query or a.map:
+            searched = query_sequences(a.query, a.map)
+
+    # Update counts
+    for row in rows:
+        key = make_id(row)
+        seq = row.get(a.seqcol, "").strip().upper()
+        if key in offt_map:
+            row['offtargets_genome'] = offt_map[key]
+        elif seq in cached:
+            row['offtargets_genome'] = str(cached[seq][0])
+        else:
+            row['offtargets_genome'] = "0"  # default if not found
+        if a.cache and seq not in cached and (key in offt_map or seq in searched):
+            fresh[seq] = int(row['offtargets_genome'])
+
+    # Write output
+    metrics.phase("write", rows_out=len(rows))
+    if table_format(outp) == "tsv":
+        with open(outp, 'w', newline='') as o:
+            writer = csv.DictWriter(o, fieldnames=header, delimiter='\t')
+            writer.writeheader()
+            writer.writerows(rows)
+    else:
+        write_rows(outp, header, rows)
+
+    if a.cache:
+        cache.put_many(fresh)
+        cache.close()
+    metrics.done()
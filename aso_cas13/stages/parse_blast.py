@@ -0,0 +1,92 @@
+"""Stage 03: chr19 BLAST off-target penalties."""
+import argparse
+
+from aso_cas13.blast6 import count_hits
+from aso_cas13.metrics import StageMetrics
+from aso_cas13.scoring import THERMO_COLS
+from aso_cas13.shards import for_rows
+from aso_cas13.tables import read_rows, with_format, write_rows
+
+
+# Load top candidates into dicts keyed by query id used in FASTA
+def load_top(path, typ):
+    items = []
+    for row in read_rows(path):
+        # Query ID format used in FASTA: >type_transcript_id_win_start_win_end
+        qid = f"{typ}_{row['transcript_id']}_{row['win_start']}_{row['win_end']}"
+        row['qid'] = qid
+        items.append(row)
+    return items
+
+
+# Apply off-target penalty and sort
+def finalize(items, hits, base_weight=1.0, penalty=2.0):
+    out = []
+    for row in items:
+        base_score = float(row['score'])
+        off = hits.get(row['qid'], 0)
+        final_score = base_weight*base_score - penalty*off
+        out.append({
+            "type": row["type"],
+            "transcript_id": row["transcript_id"],
+            "chr": row["chr"],
+            "strand": row["strand"],
+            "win_start": row["win_start"],
+            "win_end": row["win_end"],
+            "gc": row["gc"],
+            "tm": row["tm"],
+            "score_base": row["score"],
+            "offtargets_chr19": str(off),
+            "score_final": f"{final_score:.2f}",
+            "window_seq": row["window_seq"],
+            **{c: row[c] for c in THERMO_COLS if c in row},
+        })
+    out.sort(key=lambda r: float(r["score_final"]), reverse=True)
+    return out
+
+
+# Write outputs
+def write_tsv(path, rows):
+    # keep top 50 for presentation
+    write_rows(path, ["type","transcript_id","chr","strand","win_start","win_end","gc","tm","score_base","offtargets_chr19","score_final","window_seq"] + [c for c in THERMO_COLS if rows and c in rows[0]], rows[:50])
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser()
+    p.add_argument("--format", choices=["tsv", "parquet", "feather"], default="tsv", help="table format of the stage outputs")
+    p.add_argument("--aso-hits", default="outputs/results/ASO_offtargets.txt", help="outfmt6 hits; a glob fans in per-shard files")
+    p.add_argument("--cas-hits", default="outputs/results/Cas13_offtargets.txt")
+    p.add_argument("--aso-map", default=None, help="sidecar map of a --dedup/sharded export: hits are matched by sequence")
+    p.add_argument("--cas-map", default=None)
+    p.add_argument("--workers", type=int, default=1, help="shard files counted concurrently")
+    a = p.parse_args(argv)
+    metrics = StageMetrics("03_parse_blast").phase("load")
+
+    # Inputs
+    aso_top = with_format("outputs/design/ASO_candidates_top.tsv", a.format)
+    cas_top = with_format("outputs/design/Cas13_guides_top.tsv", a.format)
+    aso_blast = a.aso_hits
+    cas_blast = a.cas_hits
+
+    # Outputs
+    aso_final = with_format("outputs/design/ASO_candidates_final.tsv", a.format)
+    cas_final = with_format("outputs/design/Cas13_guides_final.tsv", a.format)
+
+    aso_items = load_top(aso_top, "ASO")
+    cas_items = load_top(cas_top, "Cas13")
+
+    # Count BLAST hits per qid (streaming outfmt6 parser)
+    metrics.phase("compute", rows_in=len(aso_items) + len(cas_items))
+    aso_hits = count_hits(aso_blast, workers=a.workers)
+    cas_hits = count_hits(cas_blast, workers=a.workers)
+    aso_hits = for_rows(aso_hits, a.aso_map, aso_items)
+    cas_hits = for_rows(cas_hits, a.cas_map, cas_items)
+
+    aso_final_rows = finalize(aso_items, aso_hits, base_weight=1.0, penalty=2.0)
+    cas_final_rows = finalize(cas_items, cas_hits, base_weight=1.0, penalty=2.0)
+
+    metrics.phase("write", rows_out=min(len(aso_final_rows), 50) + min(len(cas_final_rows), 50))
+    write_tsv(aso_final, aso_final_rows)
+    write_tsv(cas_final, cas_final_rows)
+    print(f"Wrote {aso_final} and {cas_final} with off-target penalties applied.")
+    metrics.done()
@@ -0,0 +1,164 @@
+"""Stage 04: genome-wide off-target penalties (BLAST hits, external blastn or k-mer search)."""
+import argparse
+
+from aso_cas13.blast6 import HitCollector, HitCounter, collect_hits, count_hits, hit_files, merge_counts, merge_hits
+from aso_cas13.metrics import StageMetrics
+from aso_cas13.scoring import THERMO_COLS
+from aso_cas13.shards import for_rows, load_map, query_sequences
+from aso_cas13.tables import read_rows, with_format, write_rows
+
+
+def load_top(path, typ):
+    items = []
+    for row in read_rows(path):
+        qid = f"{typ}_{row['transcript_id']}_{row['win_start']}_{row['win_end']}"
+        row['qid'] = qid
+        items.append(row)
+    return items
+
+
+def finalize(items, hits, penalty=3.0):
+    out = []
+    for row in items:
+        base = float(row['score'])
+        off = hits.get(row['qid'], 0)
+        final = base - penalty*off
+        out.append({
+            "type": row["type"],
+            "transcript_id": row["transcript_id"],
+            "chr": row["chr"],
+            "strand": row["strand"],
+            "win_start": row["win_start"],
+            "win_end": row["win_end"],
+            "gc": row["gc"],
+            "tm": row["tm"],
+            "score_base": row["score"],
+            "offtargets_genome": str(off),
+            "score_final": f"{final:.2f}",
+            "window_seq": row["window_seq"],
+            **{c: row[c] for c in THERMO_COLS if c in row},
+        })
+    out.sort(key=lambda r: float(r["score_final"]), reverse=True)
+    return out
+
+
+def cached_hits(items, cache, search, searched=None):
+    # Serve sequences from the cache, search only the misses and store their results;
+    # with `searched` (the sequences the external search ran on) a miss outside it
+    # counts as 0 for this run but is not stored, so "not searched" never caches as 0
+    seq_of = {r["qid"]: r["window_seq"].strip().upper() for r in items}
+    cached = cache.get_many(seq_of.values())
+    fresh = search({q: s for q, s in seq_of.items() if s not in cached})
+    cache.put_many({seq_of[q]: v for q, v in fresh.items() if searched is None or seq_of[q] in searched})
+    return {q: cached[s][0] if s in cached else fresh[q][0] for q, s in seq_of.items()}
+
+
+def write(path, rows):
+    write_rows(path, ["type","transcript_id","chr","strand","win_start","win_end","gc","tm","score_base","offtargets_genome","score_final","window_seq"] + [c for c in THERMO_COLS if rows and c in rows[0]], rows[:50])
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser()
+    p.add_argument("--engine", choices=["blast", "kmer"], default="blast",
+                   help="blast: count hits in the outfmt6 files; kmer: in-process seed index search")
+    p.add_argument("--ref", default="inputs/reference/GRCh38.fa", help="reference FASTA for --engine kmer")
+    p.add_argument("--aso-mismatches", type=int, default=1)
+    p.add_argument("--cas-mismatches", type=int, default=2)
+    p.add_argument("--workers", type=int, default=None)
+    p.add_argument("--cache", default=None, help="off-target cache (SQLite) keyed by sequence, reference and search settings")
+    p.add_argument("--ref-build", default=None, help="reference build label to key the cache instead of hashing --ref")
+    p.add_argument("--search-params", default="blastn", help="BLAST settings the cache entries must match")
+    p.add_argument("--format", choices=["tsv", "parquet", "feather"], default="tsv", help="table format of the stage outputs")
+    p.add_argument("--aso-hits", default="outputs/results/ASO_offtargets_grch38.txt",
+                   help="outfmt6 hits for --engine blast; a glob fans in per-shard files")
+    p.add_argument("--cas-hits", default="outputs/results/Cas13_offtargets_grch38.txt")
+    p.add_argument("--aso-map", default=None, help="sidecar map of a --dedup/sharded export: hits are matched by sequence")
+    p.add_argument("--cas-map", default=None)
+    g = p.add_argument_group("external blastn (run over the exported FASTA shards; its output is parsed as it streams)")
+    g.add_argument("--blast-cmd", default=None,
+                   help="e.g. 'blastn -task blastn-short -db grch38 -outfmt 6 -query {query}'; replaces --aso-hits/--cas-hits")
+    g.add_argument("--aso-query", default="outputs/results/ASO_candidates.fa", help="query FASTA or a glob of shards (also what --cache records as searched)")
+    g.add_argument("--cas-query", default="outputs/results/Cas13_guides.fa")
+    g.add_argument("--concurrency", type=int, default=4, help="blastn processes at a time")
+    g.add_argument("--retries", type=int, default=1, help="reruns of a failing shard")
+    g.add_argument("--timeout", type=float, default=None, help="seconds per shard attempt")
+    a = p.parse_args(argv)
+    metrics = StageMetrics("04_parse_blast_genome").phase("load")
+
+    aso_top = with_format("outputs/design/ASO_candidates_top.tsv", a.format)
+    cas_top = with_format("outputs/design/Cas13_guides_top.tsv", a.format)
+    aso_blast = a.aso_hits
+    cas_blast = a.cas_hits
+
+    aso_final = with_format("outputs/design/ASO_candidates_final_grch38.tsv", a.format)
+    cas_final = with_format("outputs/design/Cas13_guides_final_grch38.tsv", a.format)
+
+    def run_blast(query, make_consumer):
+        from aso_cas13.toolrun import run_tool
+        return run_tool(a.blast_cmd, hit_files(query), make_consumer, a.concurrency, a.retries, a.timeout)
+
+    def blast_counts(blast_path, query):
+        if a.blast_cmd:
+            return merge_counts(run_blast(query, HitCounter))
+        return count_hits(blast_path, workers=a.workers or 1)
+
+    def blast_collect(blast_path, query, qids):
+        if a.blast_cmd:
+            return merge_hits(run_blast(query, lambda: HitCollector(qids))) if qids else {}
+        return collect_hits(blast_path, qids=qids)
+
+    def blast_search(blast_path, query, map_file=None):
+        def search(queries):
+            if not map_file:
+                hits = blast_collect(blast_path, query, set(queries))
+                return {q: (len(hits.get(q, [])), hits.get(q, [])) for q in queries}
+            # hits are under the export's query ids; match the rows by sequence
+            query_of = {seq: q for q, (seq, _) in load_map(map_file).items()}
+            hits = blast_collect(blast_path, query, {query_of[s] for s in queries.values() if s in query_of})
+            return {q: (len(hits.get(query_of.get(s), [])), hits.get(query_of.get(s), [])) for q, s in queries.items()}
+        return search
+
+    def kmer_search(max_mm):
+        def search(queries):
+            from aso_cas13.offtarget import count_offtargets
+            counts = count_offtargets(a.ref, queries, max_mm, workers=a.workers) if queries else {}
+            return {q: (n, None) for q, n in counts.items()}
+        return search
+
+    aso_items = load_top(aso_top, "ASO")
+    cas_items = load_top(cas_top, "Cas13")
+    metrics.phase("compute", rows_in=len(aso_items) + len(cas_items))
+    if a.cache:
+        from aso_cas13.offtarget import K
+        from aso_cas13.ot_cache import OffTargetCache, blast_params, reference_key
+        ref_key = reference_key(a.ref, a.ref_build)
+        if a.engine == "kmer":
+            aso_search, aso_params = kmer_search(a.aso_mismatches), {"engine": "kmer", "k": K, "mismatches": a.aso_mismatches}
+            cas_search, cas_params = kmer_search(a.cas_mismatches), {"engine": "kmer", "k": K, "mismatches": a.cas_mismatches}
+            aso_searched = cas_searched = None  # every miss is searched here
+        else:
+            # counts are hit lines; only sequences of the searched FASTA/map are stored
+            aso_search, aso_params = blast_search(aso_blast, a.aso_query, a.aso_map), blast_params(a.search_params)
+            cas_search, cas_params = blast_search(cas_blast, a.cas_query, a.cas_map), blast_params(a.search_params)
+            aso_searched = query_sequences(a.aso_query, a.aso_map)
+            cas_searched = query_sequences(a.cas_query, a.cas_map)
+        with OffTargetCache(a.cache, ref_key, aso_params) as c:
+            aso_hits = cached_hits(aso_items, c, aso_search, aso_searched)
+        with OffTargetCache(a.cache, ref_key, cas_params) as c:
+            cas_hits = cached_hits(cas_items, c, cas_search, cas_searched)
+    elif a.engine == "kmer":
+        from aso_cas13.offtarget import count_offtargets
+        aso_hits = count_offtargets(a.ref, {r["qid"]: r["window_seq"] for r in aso_items}, a.aso_mismatches, workers=a.workers)
+        cas_hits = count_offtargets(a.ref, {r["qid"]: r["window_seq"] for r in cas_items}, a.cas_mismatches, workers=a.workers)
+    else:
+        aso_hits = for_rows(blast_counts(aso_blast, a.aso_query), a.aso_map, aso_items)
+        cas_hits = for_rows(blast_counts(cas_blast, a.cas_query), a.cas_map, cas_items)
+
+    aso_final_rows = finalize(aso_items, aso_hits, penalty=3.0)
+    cas_final_rows = finalize(cas_items, cas_hits, penalty=3.0)
+
+    metrics.phase("write", rows_out=min(len(aso_final_rows), 50) + min(len(cas_final_rows), 50))
+    write(aso_final, aso_final_rows)
+    write(cas_final, cas_final_rows)
+    print(f"Wrote {aso_final} and {cas_final} with genome-wide off-target penalties.")
+    metrics.done()
@@ -0,0 +1,26 @@
+"""Stage 08: homopolymer and simple-repeat columns."""
+import argparse
+
+from aso_cas13.annotate import add_columns, read_frame, repeat_columns, stage_path, write_frame
+from aso_cas13.metrics import StageMetrics
+from aso_cas13.repeats import RepeatScanner, load_motifs
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser()
+    p.add_argument("--motifs", default=None, help="repeat motif set (JSON/YAML: repeats=[{unit, copies}], homopolymer_k)")
+    p.add_argument("--low-complexity", action="store_true", help="also add dust_score and entropy columns")
+    p.add_argument("--format", choices=["tsv", "parquet", "feather"], default="tsv", help="table format of the stage outputs")
+    a = p.parse_args(argv)
+    metrics = StageMetrics("08_repeat_filters")
+    scanner = RepeatScanner(load_motifs(a.motifs))
+
+    for typ in ("ASO", "Cas13"):
+        metrics.phase("load")
+        frame = read_frame(stage_path(typ, "dG", fmt=a.format))
+        metrics.phase("compute", rows_in=len(frame))
+        add_columns(frame, repeat_columns(frame, scanner, a.low_complexity))
+        metrics.phase("write", rows_out=len(frame))
+        write_frame(frame, stage_path(typ, "repeats", fmt=a.format))
+    print(f"Wrote outputs/design/*_with_repeats.{a.format}")
+    metrics.done()
@@ -0,0 +1,54 @@
+"""Stage 07: RNAfold minimum free energy per candidate."""
+import argparse
+
+from aso_cas13.annotate import add_columns, read_frame, rnafold_dG, stage_path, text_energies, vienna_energies, write_frame
+from aso_cas13.metrics import StageMetrics
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser()
+    p.add_argument("--engine", choices=["text", "vienna"], default="text",
+                   help="text: parse RNAfold output files; vienna: fold in-process with the ViennaRNA bindings")
+    p.add_argument("--workers", type=int, default=None)
+    p.add_argument("--cache", default="outputs/cache/rnafold.sqlite", help="fold cache for --engine vienna")
+    p.add_argument("--temperature", type=float, default=37.0)
+    p.add_argument("--dangles", type=int, default=2)
+    p.add_argument("--param-file", default=None, help="ViennaRNA energy parameter file")
+    p.add_argument("--format", choices=["tsv", "parquet", "feather"], default="tsv", help="table format of the stage outputs")
+    p.add_argument("--aso-rnafold", default="outputs/results/ASO_rnafold.txt", help="--engine text: RNAfold output; a glob fans in per-shard files")
+    p.add_argument("--cas-rnafold", default="outputs/results/Cas13_rnafold.txt")
+    p.add_argument("--aso-map", default=None, help="sidecar map of a --dedup/sharded export: energies are matched by sequence")
+    p.add_argument("--cas-map", default=None)
+    g = p.add_argument_group("external RNAfold (run over the exported FASTA shards; its output is parsed as it streams)")
+    g.add_argument("--rnafold-cmd", default=None,
+                   help="e.g. 'RNAfold --noPS' (shard on stdin, or '{query}' for its path); replaces --aso-rnafold/--cas-rnafold")
+    g.add_argument("--aso-query", default="outputs/results/ASO_candidates.fa", help="query FASTA or a glob of shards")
+    g.add_argument("--cas-query", default="outputs/results/Cas13_guides.fa")
+    g.add_argument("--concurrency", type=int, default=4, help="RNAfold processes at a time")
+    g.add_argument("--retries", type=int, default=1, help="reruns of a failing shard")
+    g.add_argument("--timeout", type=float, default=None, help="seconds per shard attempt")
+    a = p.parse_args(argv)
+    metrics = StageMetrics("07_rnafold_energy").phase("load")
+
+    # Inputs/outputs
+    frames = {typ: read_frame(stage_path(typ, "input", fmt=a.format)) for typ in ("ASO", "Cas13")}
+    rnafold_txt = {"ASO": a.aso_rnafold, "Cas13": a.cas_rnafold}
+    maps = {"ASO": a.aso_map, "Cas13": a.cas_map}
+
+    metrics.phase("compute", rows_in=sum(map(len, frames.values())))
+    if a.engine == "vienna":
+        # Fold every unique window once (memoized on disk) and merge MFE by sequence
+        E = vienna_energies(frames.values(), a.cache, a.workers, a.temperature, a.dangles, a.param_file)
+        energies = {typ: E for typ in frames}
+    else:
+        queries = {"ASO": a.aso_query, "Cas13": a.cas_query}
+        energies = {typ: text_energies(rnafold_txt[typ], maps[typ], a.rnafold_cmd, queries[typ],
+                                       a.concurrency, a.retries, a.timeout) for typ in frames}
+
+    for typ, frame in frames.items():
+        add_columns(frame, rnafold_dG(frame, energies[typ], typ, by_seq=a.engine == "vienna" or bool(maps[typ])))
+        metrics.phase("write", rows_out=len(frame))
+        write_frame(frame, stage_path(typ, "dG", fmt=a.format))
+
+    print(f"Wrote {stage_path('ASO', 'dG', fmt=a.format)} and {stage_path('Cas13', 'dG', fmt=a.format)}")
+    metrics.done()
@@ -0,0 +1,28 @@
+"""Stage 12: stringent final candidate sets."""
+import argparse
+from pathlib import Path
+
+from aso_cas13.metrics import StageMetrics
+from aso_cas13.tables import read_table, with_format, write_table
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser()
+    p.add_argument("--format", choices=["tsv", "parquet", "feather"], default="tsv", help="table format of the stage outputs")
+    a = p.parse_args(argv)
+    metrics = StageMetrics("12_stringent_final_sets").phase("load")
+
+    aso = read_table(with_format("outputs/design/ASO_candidates_final_integrated.tsv", a.format))
+    cas = read_table(with_format("outputs/design/Cas13_guides_final_integrated.tsv", a.format))
+
+    metrics.phase("compute", rows_in=len(aso) + len(cas))
+    aso_strict = aso[(aso["offtargets_genome"] == 0) & (aso["has_homopolymer_5+"] == "no")].sort_values("final_integrated_score", ascending=False).head(20)
+    cas_strict = cas[(cas["offtargets_genome"] <= 1) & (cas["has_homopolymer_5+"] == "no")].sort_values("final_integrated_score", ascending=False).head(20)
+
+    metrics.phase("write", rows_out=len(aso_strict) + len(cas_strict))
+    Path("outputs/design").mkdir(parents=True, exist_ok=True)
+    write_table(aso_strict, with_format("outputs/design/ASO_candidates_final_stringent.tsv", a.format))
+    write_table(cas_strict, with_format("outputs/design/Cas13_guides_final_stringent.tsv", a.format))
+
+    print("Wrote stringent final sets.")
+    metrics.done()
@@ -0,0 +1,52 @@
+"""Stage 05: figures of the genome-wide candidate sets."""
+import argparse
+from pathlib import Path
+
+from aso_cas13.figures import MAX_POINTS, Figure, ensure_numeric, render_all, top10_combo
+from aso_cas13.metrics import StageMetrics
+from aso_cas13.tables import read_table
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser()
+    p.add_argument("--dpi", type=int, default=300)
+    p.add_argument("--workers", type=int, default=None, help="figures rendered concurrently (default: one per figure)")
+    p.add_argument("--scatter", choices=["auto", "points", "hexbin", "sample"], default="auto",
+                   help="auto: points up to --max-points rows per type, hexbin density above")
+    p.add_argument("--max-points", type=int, default=MAX_POINTS)
+    p.add_argument("--force", action="store_true", help="re-render figures whose inputs are unchanged")
+    a = p.parse_args(argv)
+    metrics = StageMetrics("05_visualize_candidates")
+
+    aso_path = Path("outputs/design/ASO_candidates_final_grch38.tsv")
+    cas_path = Path("outputs/design/Cas13_guides_final_grch38.tsv")
+    fig_dir = Path("outputs/figures")
+
+    # Load data (only the plotted columns; numeric ones come back numeric)
+    metrics.phase("load")
+    cols = ["type", "transcript_id", "win_start", "win_end", "gc", "offtargets_genome", "score_final"]
+    aso = read_table(aso_path, cols)  # or the Parquet/Feather table of the same name
+    cas = read_table(cas_path, cols)
+    metrics.phase("compute", rows_in=len(aso) + len(cas))
+    frames = {"ASO": ensure_numeric(aso, cols[4:]), "Cas13": ensure_numeric(cas, cols[4:])}
+    figs = [
+        # 1) GC% distribution (overlaid histograms)
+        Figure("gc_distribution.png", "hist_pair", {t: df[["gc"]] for t, df in frames.items()},
+               dict(col="gc", bins=20, xlabel="GC%", title="GC% distribution of ASO and Cas13 candidates")),
+        # 2) Score vs off-targets scatter
+        Figure("score_vs_offtargets.png", "scatter_pair",
+               {t: df[["offtargets_genome", "score_final"]] for t, df in frames.items()},
+               dict(x="offtargets_genome", y="score_final", xlabel="Genome-wide off-target count", ylabel="Final score",
+                    title="Final score vs genome-wide off-targets", mode=a.scatter, max_points=a.max_points)),
+        # 3) Top 10 by final score (ASO and Cas13), grouped bar chart
+        Figure("top_candidates_barplot.png", "top_bar", {"combo": top10_combo(frames, "score_final")},
+               dict(y="score_final", ylabel="Final score", title="Top 10 candidates by final score (ASO vs Cas13)")),
+    ]
+
+    metrics.phase("write")  # rendering and saving figures
+    status = render_all(figs, fig_dir, a.dpi, a.workers, force=a.force)
+    cached = [n for n, s in status.items() if s == "cached"]
+    if cached:
+        print(f"Unchanged inputs, kept: {', '.join(cached)}")
+    print("Saved figures: outputs/figures/gc_distribution.png, score_vs_offtargets.png, top_candidates_barplot.png")
+    metrics.done()
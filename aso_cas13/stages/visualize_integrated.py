@@ -0,0 +1,57 @@
+"""Stage 13: figures of the integrated candidate sets."""
+import argparse
+from pathlib import Path
+
+from aso_cas13.figures import MAX_POINTS, Figure, ensure_numeric, render_all, top10_combo
+from aso_cas13.metrics import StageMetrics
+from aso_cas13.tables import read_table
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser()
+    p.add_argument("--dpi", type=int, default=300)
+    p.add_argument("--workers", type=int, default=None, help="figures rendered concurrently (default: one per figure)")
+    p.add_argument("--scatter", choices=["auto", "points", "hexbin", "sample"], default="auto",
+                   help="auto: points up to --max-points rows per type, hexbin density above")
+    p.add_argument("--max-points", type=int, default=MAX_POINTS)
+    p.add_argument("--force", action="store_true", help="re-render figures whose inputs are unchanged")
+    a = p.parse_args(argv)
+    metrics = StageMetrics("13_visualize_integrated")
+
+    fig_dir = Path("outputs/figures")
+
+    metrics.phase("load")
+    # TSV, or the Parquet/Feather table of the same name; only the plotted columns
+    cols = ["type", "transcript_id", "win_start", "win_end", "offtargets_genome", "rnafold_dG",
+            "accessibility_score", "final_integrated_score"]
+    aso = read_table("outputs/design/ASO_candidates_final_integrated.tsv", cols)
+    cas = read_table("outputs/design/Cas13_guides_final_integrated.tsv", cols)
+    metrics.phase("compute", rows_in=len(aso) + len(cas))
+    frames = {"ASO": ensure_numeric(aso, cols[4:]), "Cas13": ensure_numeric(cas, cols[4:])}
+    figs = [
+        # 1) Integrated score vs off-targets
+        Figure("integrated_score_vs_offtargets.png", "scatter_pair",
+               {t: df[["offtargets_genome", "final_integrated_score"]] for t, df in frames.items()},
+               dict(x="offtargets_genome", y="final_integrated_score", xlabel="Genome-wide off-target count",
+                    ylabel="Final integrated score", title="Integrated score vs genome-wide off-targets",
+                    mode=a.scatter, max_points=a.max_points)),
+        # 2) ΔG distributions
+        Figure("dG_distribution.png", "hist_pair", {t: df[["rnafold_dG"]] for t, df in frames.items()},
+               dict(col="rnafold_dG", bins=20, xlabel="RNAfold ΔG (kcal/mol)", title="ΔG distribution (ASO vs Cas13)")),
+        # 3) Accessibility distributions
+        Figure("accessibility_distribution.png", "hist_pair", {t: df[["accessibility_score"]] for t, df in frames.items()},
+               dict(col="accessibility_score", bins=10, xlabel="Accessibility score",
+                    title="Accessibility score distribution (ASO vs Cas13)")),
+        # 4) Top 10 by integrated score (grouped bar)
+        Figure("top_candidates_integrated_barplot.png", "top_bar", {"combo": top10_combo(frames, "final_integrated_score")},
+               dict(y="final_integrated_score", ylabel="Final integrated score",
+                    title="Top 10 candidates by integrated score (ASO vs Cas13)")),
+    ]
+
+    metrics.phase("write")  # rendering and saving figures
+    status = render_all(figs, fig_dir, a.dpi, a.workers, force=a.force)
+    cached = [n for n, s in status.items() if s == "cached"]
+    if cached:
+        print(f"Unchanged inputs, kept: {', '.join(cached)}")
+    print("Saved figures: integrated_score_vs_offtargets.png, dG_distribution.png, accessibility_distribution.png, top_candidates_integrated_barplot.png")
+    metrics.done()
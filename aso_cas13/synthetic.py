@@ -0,0 +1,198 @@
+"""Synthetic inputs for benchmarking the pipeline offline.
+
+Writes a project tree with the hard-coded input names: a random reference
+(`inputs/reference/chr19.fa`), a GTF with one gene per locus (the first one
+is DMPK), a BED of the loci, and, once the candidate tables exist, outfmt6
+BLAST hit files padded to a target size and RNAfold text. Window counts are
+controlled through the DMPK locus length and transcripts per gene: each
+transcript contributes one exon and one 3' UTR region over the locus, so
+stage 01 produces about 2 * 1.3 * transcripts * locus_len windows.
+
+It also provides offline stand-ins for the external tools, deterministic in
+the query sequences, for exercising aso_cas13.toolrun:
+
+    python -m aso_cas13.synthetic blastn QUERY.fa   # outfmt6 hits on stdout
+    python -m aso_cas13.synthetic rnafold < QUERY.fa  # RNAfold text on stdout
+"""
+import csv, sys, zlib
+from pathlib import Path
+
+import numpy as np
+
+REF = Path("inputs/reference/chr19.fa")
+GTF = Path("inputs/reference/annotation.gtf")
+BED = Path("inputs/reference/DMPK_CTGrepeat_GRCh38.bed")
+FLANK = 10_000
+LOCUS_GAP = 5_000
+OTHER_LOCUS_LEN = 2_000
+UTR_FRACTION = 0.3
+FASTA_WIDTH = 60
+BLOCK_LINES = 100_000  # outfmt6 filler lines generated once and repeated
+
+
+def locus_len_for(windows, transcripts):
+    # invert windows ~= 2 * (1 + UTR_FRACTION) * transcripts * locus_len
+    return max(100, int(windows / (2 * (1 + UTR_FRACTION) * transcripts)))
+
+
+def layout(n_loci, dmpk_len):
+    """[(gene, start, end, strand)] 1-based, loci in order along chromosome 19."""
+    loci, pos = [], FLANK
+    for i in range(n_loci):
+        length = dmpk_len if i == 0 else OTHER_LOCUS_LEN
+        gene = "DMPK" if i == 0 else f"SYN{i:05d}"
+        loci.append((gene, pos, pos + length - 1, "-" if i % 2 == 0 else "+"))
+        pos += length + LOCUS_GAP
+    return loci, pos + FLANK
+
+
+def write_reference(root, length, seed=0):
+    rng = np.random.default_rng(seed)
+    path = Path(root) / REF
+    path.parent.mkdir(parents=True, exist_ok=True)
+    alphabet = np.frombuffer(b"ACGT", dtype=np.uint8)
+    with path.open("wb") as f:
+        f.write(b">19\n")
+        step = FASTA_WIDTH * 100_000
+        for s in range(0, length, step):
+            n = min(step, length - s)
+            seq = alphabet[rng.integers(0, 4, n)]
+            rows = n // FASTA_WIDTH
+            body = np.hstack([seq[:rows * FASTA_WIDTH].reshape(rows, FASTA_WIDTH),
+                              np.full((rows, 1), ord("\n"), np.uint8)]).tobytes()
+            f.write(body)
+            if n % FASTA_WIDTH:
+                f.write(seq[rows * FASTA_WIDTH:].tobytes() + b"\n")
+    return path
+
+
+def write_annotation(root, loci, transcripts):
+    path = Path(root) / GTF
+    with path.open("w") as f:
+        for g, (gene, start, end, strand) in enumerate(loci):
+            gid = f"ENSG{g:011d}"
+            f.write(f'19\tsynthetic\tgene\t{start}\t{end}\t.\t{strand}\t.\tgene_id "{gid}"; gene_name "{gene}";\n')
+            for t in range(transcripts):
+                tid = f"ENST{g:06d}{t:05d}"
+                attrs = f'gene_id "{gid}"; transcript_id "{tid}"; gene_name "{gene}";'
+                s, e = start + 3 * t, end - 3 * t  # isoforms differ slightly at the ends
+                utr = int((e - s) * UTR_FRACTION)
+                u0, u1 = (s, s + utr) if strand == "-" else (e - utr, e)
+                f.write(f"19\tsynthetic\ttranscript\t{s}\t{e}\t.\t{strand}\t.\t{attrs}\n")
+                f.write(f"19\tsynthetic\texon\t{s}\t{e}\t.\t{strand}\t.\t{attrs}\n")
+                f.write(f"19\tsynthetic\tthree_prime_utr\t{u0}\t{u1}\t.\t{strand}\t.\t{attrs}\n")
+    return path
+
+
+def write_bed(root, loci):
+    path = Path(root) / BED
+    with path.open("w") as f:
+        for gene, start, end, _ in loci:
+            f.write(f"chr19\t{start - 1}\t{end}\t{gene}\n")
+    return path
+
+
+def generate_inputs(root, n_loci=1, windows=1000, transcripts=4, seed=0):
+    """Reference, GTF and BED for `n_loci` loci; returns the layout."""
+    loci, length = layout(n_loci, locus_len_for(windows, transcripts))
+    write_reference(root, length, seed)
+    write_annotation(root, loci, transcripts)
+    write_bed(root, loci)
+    return {"loci": loci, "reference_bp": length}
+
+
+def _qids(table, typ):
+    with open(table) as f:
+        return [f"{typ}_{r['transcript_id']}_{r['win_start']}_{r['win_end']}" for r in csv.DictReader(f, delimiter="\t")]
+
+
+def _hit_lines(rng, qids, n):
+    q = rng.integers(0, len(qids), n)
+    length = rng.integers(14, 29, n)
+    mm = rng.integers(0, 4, n)
+    sstart = rng.integers(1, 50_000_000, n)
+    pident = 100.0 * (length - mm) / length
+    evalue = rng.uniform(0.001, 10, n)
+    return "".join(
+        f"{qids[q[i]]}\tchr{1 + i % 22}\t{pident[i]:.2f}\t{length[i]}\t{mm[i]}\t0\t1\t{length[i]}\t"
+        f"{sstart[i]}\t{sstart[i] + length[i] - 1}\t{evalue[i]:.2e}\t{30.0 - mm[i]:.1f}\n"
+        for i in range(n)).encode()
+
+
+def write_outfmt6(path, table, typ, target_bytes, seed=0):
+    """outfmt6 hits for the candidates of `table`, padded with filler queries to `target_bytes`."""
+    rng = np.random.default_rng(seed)
+    qids = _qids(table, typ)
+    filler = [f"{typ}_FILLER{i:07d}_1_{20 + i % 10}" for i in range(10_000)]
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("wb") as f:
+        head = _hit_lines(rng, qids, 5 * len(qids)) if qids else b""
+        f.write(head)
+        written = len(head)
+        block = _hit_lines(rng, filler, BLOCK_LINES)
+        while written < target_bytes:
+            part = block[:target_bytes - written]
+            part = part[:part.rfind(b"\n") + 1]
+            if not part:  # less than a line left; a whole block would overshoot by ~9 MB
+                break
+            f.write(part)
+            written += len(part)
+    return path
+
+
+def write_rnafold(path, table, typ, seed=0):
+    """RNAfold text (header, sequence, structure with energy) for every row of `table`."""
+    rng = np.random.default_rng(seed)
+    with open(table) as f:
+        rows = list(csv.DictReader(f, delimiter="\t"))
+    path = Path(path)
+    with path.open("w") as o:
+        for r in rows:
+            seq = r["window_seq"].replace("T", "U")
+            o.write(f">{typ}_{r['transcript_id']}_{r['win_start']}_{r['win_end']}\n{seq}\n"
+                    f"{'.' * len(seq)} ({-rng.uniform(0, 25):.2f})\n")
+    return path
+
+
+def _fasta_records(f):
+    qid, seq = None, []
+    for line in f:
+        line = line.strip()
+        if line.startswith(">"):
+            if qid is not None:
+                yield qid, "".join(seq)
+            qid, seq = (line[1:].split() or [""])[0], []
+        elif line:
+            seq.append(line)
+    if qid is not None:
+        yield qid, "".join(seq)
+
+
+def stub_blastn(query, out=sys.stdout):
+    """outfmt6 lines for each query: itself plus 0-4 off-target hits, keyed by sequence."""
+    with open(query) as f:
+        for qid, seq in _fasta_records(f):
+            h = zlib.crc32(seq.upper().encode())
+            n = len(seq)
+            for i in range(1 + h % 5):
+                mm = (h >> (3 + i)) % 3 if i else 0
+                sstart = 1 + (h >> i) % 50_000_000
+                out.write(f"{qid}\tchr{1 + (h + i) % 22}\t{100.0 * (n - mm) / n:.2f}\t{n}\t{mm}\t0\t1\t{n}\t"
+                          f"{sstart}\t{sstart + n - 1}\t{1e-3 * (1 + mm):.2e}\t{30.0 - mm:.1f}\n")
+
+
+def stub_rnafold(f=sys.stdin, out=sys.stdout):
+    """RNAfold text (header, sequence, structure with energy) for each record, keyed by sequence."""
+    for qid, seq in _fasta_records(f):
+        rna = seq.upper().replace("T", "U")
+        out.write(f">{qid}\n{rna}\n{'.' * len(rna)} ({-(zlib.crc32(rna.encode()) % 2500) / 100:.2f})\n")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["blastn"] and len(sys.argv) == 3:
+        stub_blastn(sys.argv[2])
+    elif sys.argv[1:] == ["rnafold"]:
+        stub_rnafold()
+    else:
+        sys.exit("usage: python -m aso_cas13.synthetic blastn QUERY.fa | rnafold < QUERY.fa")
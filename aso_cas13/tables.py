@@ -0,0 +1,196 @@
+"""Candidate table I/O in TSV or a typed binary columnar format.
+
+Stage tables can be stored as TSV (default), Parquet or Feather; the format
+follows the file suffix. Binary tables are typed: type/transcript_id/chr/
+strand as categoricals, coordinates and counts as int32, scores as float32.
+A column is only typed if every value renders back to its TSV text with the
+column's format, so TSV -> binary -> TSV is lossless and stages that work on
+text (`read_text`, `read_rows`) see exactly what the TSV would give them.
+Readers accept a path in any format and fall back to a sibling file with the
+same stem in another format.
+
+    python -m aso_cas13.tables outputs/design/*.parquet   # export TSV next to each
+"""
+import csv, math
+from pathlib import Path
+
+FORMATS = {"tsv": ".tsv", "parquet": ".parquet", "feather": ".feather"}
+CATEGORICAL = ["type", "transcript_id", "chr", "strand", "has_homopolymer_5+"]
+INT32 = ["start", "end", "win_start", "win_end", "offtargets_chr19", "offtargets_genome",
+         "simple_repeat_score", "isoform_conservation"]
+# float32 columns and how the stages write them as text
+FLOAT32 = {
+    "gc": "{:.1f}", "tm": "{:.1f}",
+    "score": "{:.2f}", "score_base": "{:.2f}", "score_final": "{:.2f}",
+    "rnafold_dG": "{:.2f}", "dust_score": "{:.2f}", "entropy": "{:.3f}",
+    "accessibility_score": "round2",  # str(round(x, 2)) in 09_accessibility_proxy.py
+    "final_integrated_score": "{:.2f}",
+}
+
+
+def table_format(path):
+    suffix = Path(path).suffix
+    for fmt, s in FORMATS.items():
+        if s == suffix:
+            return fmt
+    return "tsv"
+
+
+def with_format(path, fmt):
+    return Path(path).with_suffix(FORMATS[fmt])
+
+
+def locate(path):
+    """`path` if it exists, else the same stem in another format, else `path`."""
+    path = Path(path)
+    if path.exists():
+        return path
+    for s in FORMATS.values():
+        alt = path.with_suffix(s)
+        if alt.exists():
+            return alt
+    return path
+
+
+def _render(x, fmt):
+    if x is None or (isinstance(x, float) and math.isnan(x)):
+        return ""
+    x = float(x)
+    return str(round(x, 2)) if fmt == "round2" else fmt.format(x)
+
+
+def to_typed(frame):
+    """String frame -> typed frame; columns that would not round-trip stay strings."""
+    import numpy as np
+    import pandas as pd
+    out = frame.copy()
+    for col in out.columns:
+        vals = out[col]
+        if col in CATEGORICAL:
+            out[col] = vals.astype("category")
+        elif col in INT32:
+            num = pd.to_numeric(vals, errors="coerce")
+            if num.notna().all() and (num.astype(np.int64).astype(str) == vals).all() \
+                    and num.between(-2**31, 2**31 - 1).all():
+                out[col] = num.astype(np.int32)
+        elif col in FLOAT32:
+            num = pd.to_numeric(vals.replace("", np.nan), errors="coerce").astype(np.float32)
+            text = [_render(x, FLOAT32[col]) for x in num.tolist()]
+            if text == vals.tolist():
+                out[col] = num
+    return out
+
+
+def to_text(frame):
+    """Typed frame -> all-string frame as the TSV stages write it."""
+    out = frame.copy()
+    for col in out.columns:
+        if col in FLOAT32 and out[col].dtype.kind == "f":
+            out[col] = [_render(x, FLOAT32[col]) for x in out[col].tolist()]
+        else:
+            out[col] = out[col].astype(str)
+    return out
+
+
+def _read_binary(path, columns=None):
+    import pandas as pd
+    if table_format(path) == "parquet":
+        return pd.read_parquet(path, columns=columns)
+    return pd.read_feather(path, columns=columns)
+
+
+def read_table(path, columns=None):
+    """Frame with numeric columns: typed from a binary file, pandas-inferred from TSV.
+
+    `columns`: read only these (in file order for TSV).
+    """
+    import pandas as pd
+    path = locate(path)
+    if table_format(path) == "tsv":
+        return pd.read_csv(path, sep="\t", usecols=columns)
+    return _read_binary(path, columns)
+
+
+def read_text(path):
+    """All columns as strings, empty fields kept as ''."""
+    import pandas as pd
+    path = locate(path)
+    if table_format(path) == "tsv":
+        return pd.read_csv(path, sep="\t", dtype=str, keep_default_na=False)
+    return to_text(_read_binary(path))
+
+
+def read_rows(path):
+    """[row dict of strings], as csv.DictReader gives them."""
+    path = locate(path)
+    if table_format(path) == "tsv":
+        with path.open() as f:
+            return list(csv.DictReader(f, delimiter="\t"))
+    return read_text(path).to_dict("records")
+
+
+def iter_rows(path):
+    """The rows of `read_rows`, streamed from a TSV (binary tables are read whole)."""
+    path = locate(path)
+    if table_format(path) == "tsv":
+        with path.open() as f:
+            yield from csv.DictReader(f, delimiter="\t")
+    else:
+        yield from read_text(path).to_dict("records")
+
+
+def _write_binary(frame, path):
+    frame = frame.reset_index(drop=True)
+    if table_format(path) == "parquet":
+        frame.to_parquet(path, index=False)
+    else:
+        frame.to_feather(path)
+
+
+def write_text(frame, path):
+    """Write a string frame: plain tab join for TSV (no quoting), typed for binary."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if table_format(path) != "tsv":
+        _write_binary(to_typed(frame), path)
+        return
+    cols = list(frame.columns)
+    with path.open("w") as f:
+        f.write("\t".join(cols) + "\n")
+        for row in zip(*(frame[c].tolist() for c in cols)):
+            f.write("\t".join(row) + "\n")
+
+
+def write_rows(path, cols, rows):
+    path = Path(path)
+    if table_format(path) == "tsv":
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("w") as f:
+            f.write("\t".join(cols) + "\n")
+            for r in rows:
+                f.write("\t".join([str(r[c]) for c in cols]) + "\n")
+        return
+    import pandas as pd
+    write_text(pd.DataFrame([[str(r[c]) for c in cols] for r in rows], columns=cols, dtype=str), path)
+
+
+def write_table(frame, path):
+    """Write a pandas frame as-is (TSV via to_csv, binary with its dtypes)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if table_format(path) == "tsv":
+        frame.to_csv(path, sep="\t", index=False)
+    else:
+        _write_binary(frame, path)
+
+
+def export_tsv(path, out=None):
+    out = Path(out) if out else with_format(path, "tsv")
+    write_text(read_text(path), out)
+    return out
+
+
+if __name__ == "__main__":
+    import sys
+    for p in sys.argv[1:]:
+        print(f"Wrote {export_tsv(p)}")
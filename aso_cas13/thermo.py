@@ -0,0 +1,130 @@
+"""Nearest-neighbor duplex Tm and ΔG37 of every window at once (stage 02 --thermo).
+
+Parameters: SantaLucia (1998) unified DNA/DNA stacks, or Sugimoto et al.
+(1995) RNA/DNA hybrid stacks with the window (transcript sense) as the RNA
+strand, i.e. a DNA oligo on its target. Each region is encoded once into
+prefix sums of the stack ΔH and ΔS over its dinucleotides, so the sums of a
+window are two array differences plus the initiation terms of its end bases,
+and a whole chunk of windows is scored with a few vectorized operations.
+
+Salt: SantaLucia's entropy correction 0.368 * (N - 1) * ln[Na+], with Mg2+
+counted as Na+ equivalents (von Ahsen et al. 2001: 120 * sqrt([Mg2+])).
+Tm assumes two non-self-complementary strands at `oligo_nM` each, i.e.
+C_T = 2 * oligo_nM and the C_T / 4 term is oligo_nM / 2.
+Windows with bases other than ACGT get NaN.
+"""
+import numpy as np
+
+R = 1.9872  # cal / (K mol)
+T37 = 310.15
+# (ΔH kcal/mol, ΔS cal/(K mol)) of stack 5'-XY-3' on the window strand
+NN_PARAMS = {
+    "dna": {
+        # SantaLucia 1998; XY and its reverse complement are the same stack
+        "stacks": {"AA": (-7.9, -22.2), "AT": (-7.2, -20.4), "TA": (-7.2, -21.3), "CA": (-8.5, -22.7),
+                   "GT": (-8.4, -22.4), "CT": (-7.8, -21.0), "GA": (-8.2, -22.2), "CG": (-10.6, -27.2),
+                   "GC": (-9.8, -24.4), "GG": (-8.0, -19.9)},
+        "init": (0.0, 0.0), "term_gc": (0.1, -2.8), "term_at": (2.3, 4.1),
+    },
+    "rna_dna": {
+        # Sugimoto 1995; window = RNA strand
+        "stacks": {"AA": (-7.8, -21.9), "AC": (-5.9, -12.3), "AG": (-9.1, -23.5), "AT": (-8.3, -23.9),
+                   "CA": (-9.0, -26.1), "CC": (-9.3, -23.2), "CG": (-16.3, -47.1), "CT": (-7.0, -19.7),
+                   "GA": (-5.5, -13.5), "GC": (-8.0, -17.1), "GG": (-12.8, -31.9), "GT": (-7.8, -21.6),
+                   "TA": (-7.8, -23.2), "TC": (-8.6, -22.9), "TG": (-10.4, -28.4), "TT": (-11.5, -36.4)},
+        "init": (1.9, -3.9), "term_gc": (0.0, 0.0), "term_at": (0.0, 0.0),
+    },
+}
+_CODE = np.full(256, 4, dtype=np.uint8)  # A C G T(U) -> 0-3, anything else 4
+for _i, _b in enumerate("ACGT"):
+    _CODE[ord(_b)] = _CODE[ord(_b.lower())] = _i
+_CODE[ord("U")] = _CODE[ord("u")] = 3
+_COMP = {"A": "T", "C": "G", "G": "C", "T": "A"}
+
+
+def stack_table(params="dna"):
+    """(ΔH[16], ΔS[16]) indexed by 4 * code(X) + code(Y) of stack XY."""
+    stacks = NN_PARAMS[params]["stacks"]
+    dH, dS = np.zeros(16), np.zeros(16)
+    for i, x in enumerate("ACGT"):
+        for j, y in enumerate("ACGT"):
+            h, s = stacks.get(x + y) or stacks[_COMP[y] + _COMP[x]]
+            dH[4 * i + j], dS[4 * i + j] = h, s
+    return dH, dS
+
+
+def na_equivalent(na_mM=50.0, mg_mM=0.0):
+    """Monovalent-equivalent salt (M) of Na+ plus Mg2+."""
+    return (na_mM + 120.0 * np.sqrt(max(mg_mM, 0.0))) / 1000.0
+
+
+class NearestNeighbor:
+    """Vectorized NN thermodynamics of windows over regions (as `WindowTable.regions`).
+
+    Region `rid` occupies [base[rid], base[rid] + len + 1) of the concatenated
+    arrays, as in `scoring.prefix_counts`.
+    """
+
+    def __init__(self, regions, params="dna", na_mM=50.0, mg_mM=0.0, oligo_nM=250.0):
+        p = NN_PARAMS[params]
+        dH, dS = stack_table(params)
+        self.init_h, self.init_s = p["init"]
+        # terminal initiation per end-base code (A, C, G, T, other)
+        ends = [p["term_gc"] if b in "CG" else p["term_at"] for b in "ACGT"] + [(0.0, 0.0)]
+        self.end_h, self.end_s = (np.array(x) for x in zip(*ends))
+        self.salt_s = 0.368 * np.log(na_equivalent(na_mM, mg_mM))  # per stack
+        self.ct_s = R * np.log(oligo_nM * 1e-9 / 2)  # C_T / 4 with C_T = 2 * oligo_nM
+        codes, cs_h, cs_s, cs_bad = [], [], [], []
+        self.base, pos = np.zeros(len(regions), dtype=np.int64), 0
+        for rid, r in enumerate(regions):
+            c = _CODE[np.frombuffer(r["sequence"].encode("ascii"), dtype=np.uint8)]
+            n = len(c)
+            st = 4 * np.minimum(c[:-1], 3).astype(np.int64) + np.minimum(c[1:], 3)  # other bases: see cs_bad
+            h, s, bad = np.zeros(n + 1), np.zeros(n + 1), np.zeros(n + 1, dtype=np.int32)
+            h[1:n], s[1:n] = np.cumsum(dH[st]), np.cumsum(dS[st])  # stacks before position i
+            bad[1:] = np.cumsum(c == 4)
+            codes.append(np.append(c, 4))
+            cs_h.append(h)
+            cs_s.append(s)
+            cs_bad.append(bad)
+            self.base[rid] = pos
+            pos += n + 1
+        if not regions:
+            codes, cs_h, cs_s, cs_bad = [np.full(1, 4, np.uint8)], [np.zeros(1)], [np.zeros(1)], [np.zeros(1, np.int32)]
+        self.codes, self.cs_h = np.concatenate(codes), np.concatenate(cs_h)
+        self.cs_s, self.cs_bad = np.concatenate(cs_s), np.concatenate(cs_bad)
+
+    def window_thermo(self, chunk):
+        """(Tm °C, ΔG37 kcal/mol) arrays of a chunk of windows (region_id, offset, length)."""
+        i0 = self.base[chunk["region_id"]] + chunk["offset"]
+        w = chunk["length"].astype(np.int64)
+        last = i0 + w - 1
+        first_c, last_c = self.codes[i0], self.codes[last]
+        dh = self.init_h + (self.cs_h[last] - self.cs_h[i0]) + self.end_h[first_c] + self.end_h[last_c]
+        ds = (self.init_s + (self.cs_s[last] - self.cs_s[i0]) + self.end_s[first_c] + self.end_s[last_c]
+              + self.salt_s * (w - 1))
+        tm = 1000.0 * dh / (ds + self.ct_s) - 273.15
+        dg = dh - T37 * ds / 1000.0
+        bad = self.cs_bad[i0 + w] - self.cs_bad[i0] > 0
+        tm[bad] = np.nan
+        dg[bad] = np.nan
+        return tm, dg
+
+    def mask(self, min_tm=None, max_tm=None):
+        """keep(chunk) for scoring.rank_windows: windows with min_tm <= Tm <= max_tm."""
+        def keep(chunk):
+            tm = self.window_thermo(chunk)[0]
+            ok = np.ones(len(tm), dtype=bool)
+            if min_tm is not None:
+                ok &= tm >= min_tm
+            if max_tm is not None:
+                ok &= tm <= max_tm
+            return ok
+        return keep
+
+
+def duplex_thermo(seq, params="dna", na_mM=50.0, mg_mM=0.0, oligo_nM=250.0):
+    """(Tm, ΔG37) of one sequence and its perfect complement."""
+    win = np.array([(0, 0, len(seq))], dtype=[("region_id", "i8"), ("offset", "i8"), ("length", "i8")])
+    tm, dg = NearestNeighbor([{"sequence": seq}], params, na_mM, mg_mM, oligo_nM).window_thermo(win)
+    return float(tm[0]), float(dg[0])
@@ -0,0 +1,103 @@
+"""Bounded-concurrency runs of external tools (blastn, RNAfold) over FASTA shards.
+
+`run_tool()` starts one subprocess per query shard, at most `concurrency` at
+a time, from a command template: `{query}` is replaced by the shard path, and
+a template without it gets the shard on stdin (`RNAfold --noPS`). Each
+process's stdout is read as it is produced and handed in newline-aligned
+blocks to a fresh consumer (`feed(bytes)` / `result()`, e.g.
+`blast6.HitCounter`, `annotate.RNAfoldStream`), so results are parsed while
+other shards are still running and no intermediate files are written.
+
+A shard attempt that exits non-zero or runs past `timeout` seconds is killed
+and retried up to `retries` times with a fresh consumer; a shard that still
+fails raises `ToolError`, and the processes of the other shards are killed.
+"""
+import asyncio, shlex, time
+
+READ_BYTES = 1 << 20
+STDERR_TAIL = 2000
+
+
+class ToolError(RuntimeError):
+    pass
+
+
+def command(template, query):
+    """(argv, stdin path or None) of `template` for one shard."""
+    args = shlex.split(template)
+    if any("{query}" in x for x in args):
+        return [x.replace("{query}", str(query)) for x in args], None
+    return args, query
+
+
+async def _pump(stream, consumer):
+    rest = b""
+    while True:
+        buf = await stream.read(READ_BYTES)
+        if not buf:
+            break
+        buf = rest + buf
+        cut = buf.rfind(b"\n") + 1
+        rest = buf[cut:]
+        if cut:
+            # parse off the event loop so other shards' pipes keep draining
+            await asyncio.to_thread(consumer.feed, buf[:cut])
+    if rest:
+        await asyncio.to_thread(consumer.feed, rest)
+
+
+async def _attempt(argv, stdin_path, consumer, timeout):
+    stdin = open(stdin_path, "rb") if stdin_path else asyncio.subprocess.DEVNULL
+    try:
+        proc = await asyncio.create_subprocess_exec(*argv, stdin=stdin, stdout=asyncio.subprocess.PIPE,
+                                                    stderr=asyncio.subprocess.PIPE)
+    finally:
+        if stdin_path:
+            stdin.close()
+    try:
+        _, err, rc = await asyncio.wait_for(
+            asyncio.gather(_pump(proc.stdout, consumer), proc.stderr.read(), proc.wait()), timeout)
+    except asyncio.TimeoutError:
+        raise ToolError(f"timed out after {timeout}s") from None
+    finally:
+        if proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+    if rc != 0:
+        raise ToolError(f"exit {rc}: {err.decode(errors='replace').strip()[-STDERR_TAIL:]}")
+    return consumer.result()
+
+
+async def _shard(template, query, make_consumer, retries, timeout, report):
+    argv, stdin_path = command(template, query)
+    for attempt in range(retries + 1):
+        t0 = time.time()
+        try:
+            result = await _attempt(argv, stdin_path, make_consumer(), timeout)
+        except FileNotFoundError as e:
+            raise ToolError(f"{argv[0]}: {e.strerror}") from None
+        except ToolError as e:
+            if attempt == retries:
+                raise ToolError(f"{query}: {e} (attempt {attempt + 1} of {retries + 1})") from None
+            report(f"[retry]   {query}: {e}")
+            continue
+        report(f"[done]    {query} in {time.time() - t0:.1f}s")
+        return result
+
+
+async def _run_all(template, queries, make_consumer, concurrency, retries, timeout, report):
+    sem = asyncio.Semaphore(max(1, concurrency))
+
+    async def one(query):
+        async with sem:
+            return await _shard(template, query, make_consumer, retries, timeout, report)
+
+    return await asyncio.gather(*(one(q) for q in queries))
+
+
+def run_tool(template, queries, make_consumer, concurrency=4, retries=1, timeout=None, report=print):
+    """[consumer result per shard], in the order of `queries`."""
+    queries = list(queries)
+    if not queries:
+        return []
+    return asyncio.run(_run_all(template, queries, make_consumer, concurrency, retries, timeout, report))
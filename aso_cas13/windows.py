@@ -0,0 +1,136 @@
+"""Target-region intersection and fixed-length windowing (stage 01).
+
+The window table is stored compactly: each target region (with its sequence)
+once in `01_target_regions.tsv`, and each window as integer columns
+(type, region_id, offset, length) in the NumPy file `01_target_windows.npy`.
+`WindowTable` memory-maps the windows and materializes `window_seq` lazily by
+slicing the region sequence, instead of repeating the region on every row.
+"""
+import csv
+from pathlib import Path
+
+import numpy as np
+
+ASO_W = 18
+CAS_W = 28
+WINDOW_TYPES = (("ASO", ASO_W), ("Cas13", CAS_W))  # index = type code
+WINDOW_COLS = ["type","transcript_id","chr","strand","start","end","win_start","win_end","sequence","window_seq"]
+REGION_COLS = ["region_id","transcript_id","chr","strand","start","end","sequence"]
+WINDOW_DTYPE = np.dtype([("type", "u1"), ("region_id", "<i4"), ("offset", "<i4"), ("length", "<u2")])
+REGIONS_NAME = "01_target_regions.tsv"
+WINDOWS_NAME = "01_target_windows.npy"
+ROW_CHUNK = 65536
+
+
+def overlap_targets(regions, bed_chr, bed_start, bed_end, ref):
+    # Intersect one locus with (chr, start, end, strand, transcript_id) regions
+    targets = []
+    for chrom, start, end, strand, tid in regions:
+        if chrom != bed_chr:
+            continue
+        ov_start = max(start, bed_start)
+        ov_end = min(end, bed_end)
+        if ov_start < ov_end:
+            s = ref.fetch(chrom, ov_start, ov_end, strand)  # 1-based, inclusive
+            targets.append({
+                "transcript_id": tid, "chr": chrom, "strand": strand,
+                "start": ov_start, "end": ov_end, "sequence": s
+            })
+    return targets
+
+
+def table_paths(results_dir):
+    results_dir = Path(results_dir)
+    return results_dir / REGIONS_NAME, results_dir / WINDOWS_NAME
+
+
+def compact_windows(targets):
+    # Same window order as window_rows(): per target, all ASO then all Cas13 windows
+    parts = []
+    for rid, t in enumerate(targets):
+        n = len(t["sequence"])
+        for code, (typ, w) in enumerate(WINDOW_TYPES):
+            k = max(0, n - w + 1)
+            a = np.empty(k, WINDOW_DTYPE)
+            a["type"], a["region_id"], a["length"] = code, rid, w
+            a["offset"] = np.arange(k)
+            parts.append(a)
+    return np.concatenate(parts) if parts else np.empty(0, WINDOW_DTYPE)
+
+
+def write_compact(results_dir, targets):
+    regions_path, windows_path = table_paths(results_dir)
+    regions_path.parent.mkdir(parents=True, exist_ok=True)
+    with regions_path.open("w", newline="") as f:
+        w = csv.writer(f, delimiter="\t")
+        w.writerow(REGION_COLS)
+        for rid, t in enumerate(targets):
+            w.writerow([rid] + [t[c] for c in REGION_COLS[1:]])
+    windows = compact_windows(targets)
+    np.save(windows_path, windows)
+    return regions_path, windows_path, len(windows)
+
+
+class WindowTable:
+    def __init__(self, results_dir=None):
+        if results_dir is None:
+            return
+        regions_path, windows_path = table_paths(results_dir)
+        with regions_path.open() as f:
+            self.regions = list(csv.DictReader(f, delimiter="\t"))
+        for r in self.regions:
+            r["start"], r["end"] = int(r["start"]), int(r["end"])
+        self.windows = np.load(windows_path, mmap_mode="r")
+
+    @classmethod
+    def from_targets(cls, targets):
+        """In-memory table of overlap_targets() output, without writing it."""
+        table = cls()
+        table.regions, table.windows = targets, compact_windows(targets)
+        return table
+
+    def __len__(self):
+        return len(self.windows)
+
+    def _row(self, code, rid, off, w):
+        reg = self.regions[rid]
+        ws = reg["start"] + off
+        return {
+            "type": WINDOW_TYPES[code][0], "transcript_id": reg["transcript_id"], "chr": reg["chr"],
+            "strand": reg["strand"], "start": reg["start"], "end": reg["end"],
+            "win_start": ws, "win_end": ws + w - 1,
+            "window_seq": reg["sequence"][off:off + w],
+        }
+
+    def row(self, i):
+        w = self.windows[i]
+        return self._row(int(w["type"]), int(w["region_id"]), int(w["offset"]), int(w["length"]))
+
+    def rows(self):
+        """Window rows as dicts (WINDOW_COLS minus the region `sequence`), built lazily."""
+        for c0 in range(0, len(self.windows), ROW_CHUNK):
+            chunk = self.windows[c0:c0 + ROW_CHUNK]
+            for rec in zip(chunk["type"].tolist(), chunk["region_id"].tolist(),
+                           chunk["offset"].tolist(), chunk["length"].tolist()):
+                yield self._row(*rec)
+
+
+def window_rows(targets):
+    # Generated row by row so the legacy CSV streams instead of holding every window
+    for t in targets:
+        seq = t["sequence"]
+        for typ, w in (("ASO", ASO_W), ("Cas13", CAS_W)):
+            for i in range(0, max(0, len(seq) - w + 1)):
+                yield [
+                    typ, t["transcript_id"], t["chr"], t["strand"],
+                    t["start"], t["end"], t["start"]+i, t["start"]+i+w-1,
+                    seq, seq[i:i+w]
+                ]
+
+
+def write_windows(path, rows):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(WINDOW_COLS)
+        w.writerows(rows)
@@ -0,0 +1,4 @@
+from aso_cas13.pipeline import main
+
+if __name__ == "__main__":
+    raise SystemExit(main())
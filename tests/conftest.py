@@ -0,0 +1,57 @@
+"""A small synthetic project run through the default stages, shared by the tests."""
+import os, shutil
+from contextlib import contextmanager
+from pathlib import Path
+
+import pytest
+
+from aso_cas13 import synthetic
+from aso_cas13.stages import run
+
+PREFIX = {"ASO": "ASO_candidates", "Cas13": "Cas13_guides"}
+
+
+@contextmanager
+def chdir(path):
+    old = os.getcwd()
+    os.chdir(path)
+    try:
+        yield Path(path)
+    finally:
+        os.chdir(old)
+
+
+def run_stages(root, *stages):
+    """Run (command, [args]) stages in this process with `root` as the working directory."""
+    with chdir(root):
+        for name, *args in stages:
+            run(name, args[0] if args else [])
+
+
+def build_project(root, n_loci=1, windows=400, seed=0):
+    # stages 01-12 with their defaults; BLAST and RNAfold outputs are synthetic
+    root = Path(root)
+    synthetic.generate_inputs(root, n_loci=n_loci, windows=windows, seed=seed)
+    run_stages(root, ("locus-windows",), ("filter-candidates",))
+    for typ, p in PREFIX.items():
+        for name in (f"{typ}_offtargets.txt", f"{typ}_offtargets_grch38.txt"):
+            synthetic.write_outfmt6(root / "outputs/results" / name, root / f"outputs/design/{p}_top.tsv", typ, 20_000, seed)
+    run_stages(root, ("parse-blast",), ("parse-blast-genome",),
+               *(("summarize-offtargets", [f"outputs/results/{t}_offtargets_grch38.txt",
+                                           f"outputs/results/{t}_offtargets_summary.tsv"]) for t in PREFIX))
+    for typ, p in PREFIX.items():
+        synthetic.write_rnafold(root / f"outputs/results/{typ}_rnafold.txt", root / f"outputs/design/{p}_final_grch38.tsv", typ, seed)
+    run_stages(root, ("rnafold-energy",), ("repeat-filters",), ("accessibility-proxy",), ("isoform-conservation",),
+               ("final-integration",), ("stringent-final-sets",))
+    return root
+
+
+@pytest.fixture(scope="session")
+def built_project(tmp_path_factory):
+    return build_project(tmp_path_factory.mktemp("built") / "project")
+
+
+@pytest.fixture
+def project(built_project, tmp_path):
+    """A private copy of the built project."""
+    return Path(shutil.copytree(built_project, tmp_path / "project"))
@@ -0,0 +1,41 @@
+"""Prefix-summed plfold profiles against folding each target region directly."""
+import csv
+
+import numpy as np
+import pytest
+
+from aso_cas13.annotate import HOMOPOLYMER_COL, proxy_accessibility
+from aso_cas13.tables import read_rows
+from conftest import PREFIX, run_stages
+
+RNA = pytest.importorskip("RNA")
+
+
+def _unpaired(seq, W=80, L=40):
+    # RNAplfold -W 80 -L 40 -u 1 of the whole region
+    rna = seq.upper().replace("T", "U")
+    w = min(W, len(rna))
+    up = RNA.pfl_fold_up(rna, 1, w, min(L, w))
+    return [up[i][1] for i in range(1, len(rna) + 1)]
+
+
+def test_plfold_matches_direct_profiles(project):
+    with (project / "outputs/results/01_target_regions.tsv").open() as f:
+        regions = list(csv.DictReader(f, delimiter="\t"))
+    profiles = [_unpaired(r["sequence"]) for r in regions]
+
+    def expected(row):
+        ws, we = int(row["win_start"]), int(row["win_end"])
+        for r, prof in zip(regions, profiles):
+            start, end = int(r["start"]), int(r["end"])
+            # the region the window was cut from: overlapping exon/UTR regions differ in sequence
+            if r["transcript_id"] == row["transcript_id"] and start <= ws and we <= end \
+                    and r["sequence"][ws - start:we - start + 1] == row["window_seq"]:
+                return str(round(float(np.mean(prof[ws - start:we - start + 1])), 2))
+        return str(proxy_accessibility(row.get("gc"), row.get(HOMOPOLYMER_COL, "no")))
+
+    for _ in range(2):  # cold, then from the profile cache
+        run_stages(project, ("accessibility-proxy", ["--engine", "plfold", "--workers", "2"]))
+        for p in PREFIX.values():
+            rows = read_rows(project / f"outputs/design/{p}_with_access.tsv")
+            assert rows and [r["accessibility_score"] for r in rows] == [expected(r) for r in rows]
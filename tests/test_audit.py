@@ -0,0 +1,127 @@
+"""Single-pass audit checks against the per-check reads of the old 00_audit_inputs.py."""
+import csv, hashlib, re
+from pathlib import Path
+
+import pytest
+
+from aso_cas13 import audit
+from aso_cas13.stages.audit_inputs import check_spec
+
+
+# the old 00_audit_inputs.py checks, one read per check
+def size_lines(p: Path):
+    if not p.exists():
+        return {"exists": False, "bytes": 0, "lines": 0}
+    with p.open("rb") as f:
+        lines = sum(1 for _ in f)
+    return {"exists": True, "bytes": p.stat().st_size, "lines": lines}
+
+
+def audit_fasta(p: Path):
+    res = {"type": "FASTA", "headers": 0, "non_iupac": 0}
+    if not p.exists() or p.stat().st_size == 0:
+        return res
+    with p.open() as f:
+        for line in f:
+            if line.startswith(">"):
+                res["headers"] += 1
+            else:
+                res["non_iupac"] += len(re.sub(r"[ACGTNacgtn]", "", line.strip()))
+    try:
+        with p.open() as f:
+            res["preview"] = "".join([next(f) for _ in range(5)])
+    except Exception:
+        res["preview"] = ""
+    return res
+
+
+def audit_tsv(p: Path, expected_cols=None, numeric_checks=None):
+    res = {"type": "TSV", "columns": [], "missing_cols": [], "numeric_invalid": {}}
+    if not p.exists() or p.stat().st_size == 0:
+        return res
+    with p.open() as f:
+        r = csv.DictReader(f, delimiter="\t")
+        res["columns"] = r.fieldnames or []
+        if expected_cols:
+            res["missing_cols"] = [c for c in expected_cols if c not in res["columns"]]
+        rows = []
+        for i, row in enumerate(r):
+            rows.append(row)
+            if i >= 2: break
+        res["preview_rows"] = rows
+    if numeric_checks:
+        import pandas as pd
+        df = pd.read_csv(p, sep="\t")
+        res["numeric_invalid"] = {col: int(pd.to_numeric(df[col], errors="coerce").isna().sum())
+                                  for col in numeric_checks if col in df.columns}
+    return res
+
+
+def audit_text(p: Path, grep_keywords=None):
+    res = {"type": "TEXT", "contains": {}}
+    if not p.exists() or p.stat().st_size == 0:
+        return res
+    text = p.read_text(errors="ignore")
+    for k in grep_keywords or []:
+        res["contains"][k] = k in text
+    try:
+        with p.open() as f:
+            res["preview"] = "".join([next(f) for _ in range(5)])
+    except Exception:
+        res["preview"] = ""
+    return res
+
+
+def audit_image(p: Path):
+    res = {"type": "IMAGE", "png_sig_ok": None}
+    if not p.exists() or p.stat().st_size == 0:
+        return res
+    with p.open("rb") as f:
+        res["png_sig_ok"] = f.read(8) == b"\x89PNG\r\n\x1a\n"
+    return res
+
+
+OLD = {"fasta": audit_fasta, "tsv": audit_tsv, "text": audit_text, "image": audit_image}
+
+
+def _files(root, project):
+    design = project / "outputs/design"
+    files = {
+        "ref.fasta": ">chr19 test\nACGTNacgtn\nACGXRY\r\n>two\n\nAC-GT\nTTTT",
+        "short.fasta": ">one\nACGT\n",
+        "odd.tsv": "type\tgc\twin_start\tscore_final\nASO\t1.5\t10\tNA\nASO\tnan\tx\t\nCas13\t-2e3\t11\tinf\nASO\t3\t\tNULL\n",
+        "header_only.tsv": "type\tgc\n",
+        "ASO_rnafold.txt": "".join(f">q{i}\nACGU\n.... ( -1.20)  dG\n" for i in range(3)),
+        "short_rnafold.txt": ">q\nACGU\n",
+        "fig.png": b"\x89PNG\r\n\x1a\n" + bytes(100),
+        "not.png": b"GIF89a" + bytes(10),
+        "empty.tsv": "",
+    }
+    out = []
+    for name, data in files.items():
+        p = root / name
+        p.write_bytes(data if isinstance(data, bytes) else data.encode())
+        out.append(p)
+    for name in ("ASO_candidates_final_grch38.tsv", "Cas13_guides_with_conservation.tsv",
+                 "ASO_candidates_final_integrated.tsv", "Cas13_guides_final_stringent.tsv"):
+        out.append(design / name)
+    return out + [root / "missing.fasta"]
+
+
+@pytest.mark.parametrize("block", [audit.BLOCK, 7])
+def test_checks_match_old_audit(project, tmp_path, monkeypatch, block):
+    monkeypatch.setattr(audit, "BLOCK", block)  # small blocks split lines and records
+    for p in _files(tmp_path, project):
+        spec_name = p.name.replace("odd", "final_integrated").replace("header_only", "final_grch38")
+        kind, spec = check_spec(spec_name)
+        entry = audit.audit_file(p, kind, **spec)
+        assert entry.pop("sha1") == (hashlib.sha1(p.read_bytes()).hexdigest() if p.exists() else None)
+        assert entry == {"path": str(p), **size_lines(p), "detail": OLD[kind](p, **spec)}, p.name
+
+
+def test_fast_rerun_reuses_entries(project, tmp_path):
+    jobs = [(str(p), *check_spec(p.name)) for p in _files(tmp_path, project)]
+    cache = tmp_path / "audit.json"
+    first = audit.audit_files(jobs, workers=4, cache=cache)
+    assert audit.audit_files(jobs, workers=1, cache=cache, fast=True) == first
+    assert first == [audit.audit_file(path, kind, **spec) for path, kind, spec in jobs]
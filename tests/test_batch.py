@@ -0,0 +1,64 @@
+"""Locus and batch design: reference/annotation/BED options and genes on several contigs."""
+import os, shutil, subprocess, sys
+from pathlib import Path
+
+from aso_cas13 import synthetic
+from aso_cas13.batch import gene_loci
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+class _Ann:
+    def __init__(self, feats):
+        self.feats = feats
+
+    def features(self, gene, feature_types):
+        return self.feats.get(gene, [])
+
+
+def test_gene_on_several_contigs_gets_one_locus_per_chromosome():
+    ann = _Ann({
+        "CRLF2": [("X", 1000, 1200, "-", "t1"), ("Y", 500, 700, "-", "t2"), ("X", 1500, 1600, "-", "t1")],
+        "DMPK": [("19", 100, 200, "-", "t3"), ("19", 300, 400, "-", "t3")],
+    })
+    loci, regions = gene_loci(ann, ["CRLF2", "DMPK", "MISSING"])
+    assert loci == [("CRLF2_X", "X", 1000, 1600), ("CRLF2_Y", "Y", 500, 700), ("DMPK", "19", 100, 400)]
+    assert all(f[0] == chrom for lid, chrom, _, _ in loci for f in regions[lid])
+    assert len(regions["CRLF2_X"]) == 2
+
+
+def test_batch_uses_ref_and_gtf(tmp_path):
+    synthetic.generate_inputs(tmp_path, n_loci=2, windows=200)
+    # only the given paths exist, not the defaults under inputs/reference
+    alt = tmp_path / "alt"
+    shutil.move(str(tmp_path / "inputs/reference"), alt)
+    env = dict(os.environ, PYTHONPATH=str(ROOT), ASO_CAS13_METRICS="0")
+    out = subprocess.run([sys.executable, "-m", "aso_cas13", "locus-windows", "--batch", "--genes", "DMPK,SYN00001",
+                          "--workers", "1", "--ref", str(alt / "chr19.fa"), "--gtf", str(alt / "annotation.gtf")],
+                         cwd=tmp_path, env=env, capture_output=True, text=True)
+    assert out.returncode == 0, out.stdout + out.stderr
+    manifest = (tmp_path / "outputs/results/loci/manifest.tsv").read_text().splitlines()
+    assert [l.split("\t")[0] for l in manifest[1:]] == ["DMPK", "SYN00001"]
+
+
+def test_single_locus_uses_bed(tmp_path):
+    synthetic.generate_inputs(tmp_path, n_loci=1, windows=200)
+    env = dict(os.environ, PYTHONPATH=str(ROOT), ASO_CAS13_METRICS="0")
+    regions = tmp_path / "outputs/results/01_target_regions.tsv"
+
+    def locus_windows(*args):
+        out = subprocess.run([sys.executable, "-m", "aso_cas13", "locus-windows", *args],
+                             cwd=tmp_path, env=env, capture_output=True, text=True)
+        assert out.returncode == 0, out.stdout + out.stderr
+        return regions.read_text()
+
+    default = locus_windows()
+    alt = tmp_path / "alt"
+    shutil.move(str(tmp_path / "inputs/reference"), alt)
+    paths = ["--ref", str(alt / "chr19.fa"), "--gtf", str(alt / "annotation.gtf")]
+    assert locus_windows(*paths, "--bed", str(alt / "DMPK_CTGrepeat_GRCh38.bed")) == default
+    chrom, start, end, *_ = (alt / "DMPK_CTGrepeat_GRCh38.bed").read_text().split("\t")
+    (alt / "narrow.bed").write_text(f"{chrom}\t{start}\t{int(start) + 30}\tDMPK\n")
+    narrow = locus_windows(*paths, "--bed", str(alt / "narrow.bed"))
+    assert narrow != default
+    assert all(int(l.split("\t")[5]) <= int(start) + 30 for l in narrow.splitlines()[1:])
@@ -0,0 +1,29 @@
+"""Benchmark harness: per-stage peak RSS and synthetic input sizes."""
+import numpy as np
+
+from aso_cas13 import benchmark, synthetic
+from aso_cas13.pipeline import STAGES
+
+
+def test_stage_peak_is_its_own(tmp_path):
+    big = np.ones(300 << 17)  # the harness holds 300 MB; a fork+exec child inherits ru_maxrss
+    stage = next(s for s in STAGES if s.name == "01_locus_windows")
+    point = benchmark.run_point(tmp_path, 1, 300, 1, stages=[stage], report=lambda *_: None)
+    res = point["stages"]["01_locus_windows"]
+    assert res["ok"]
+    assert 0 < res["peak_rss_mb"] < 200, res
+    assert big.sum() == len(big)
+
+
+def test_outfmt6_size_follows_target(project):
+    table = project / "outputs/design/ASO_candidates_top.tsv"
+    for mb in (1, 3):
+        path = synthetic.write_outfmt6(project / f"hits_{mb}.txt", table, "ASO", mb << 20)
+        assert (mb << 20) - 200 <= path.stat().st_size <= (mb << 20)
+
+
+def test_rss_exponent():
+    pts = [{"stages": {"s": {"ok": True, "input_bytes": b, "wall_s": b / 1e6, "peak_rss_mb": m}}}
+           for b, m in ((1e6, 10.0), (4e6, 40.0), (16e6, None))]
+    s = benchmark.scaling(pts)["s"]
+    assert s["exponent"] == 1.0 and s["rss_exponent"] == 1.0
@@ -0,0 +1,55 @@
+"""Chunked outfmt6 counting against the line-by-line counter it replaced."""
+import gzip
+import random
+from collections import Counter
+
+import pytest
+
+from aso_cas13 import blast6
+
+
+def line_counts(text, min_pident=None):
+    # the pre-pandas parsers: every non-blank line counts for its first field;
+    # a filter on a column the line lacks drops it
+    counts = Counter()
+    for line in text.splitlines():
+        cols = line.strip().split("\t")
+        if line.strip() and (min_pident is None or len(cols) > 2 and float(cols[2]) >= min_pident):
+            counts[cols[0]] += 1
+    return dict(counts)
+
+
+def ragged(n, seed=0):
+    rng = random.Random(seed)
+    lines = []
+    for i in range(n):
+        q = f"ASO_t{rng.randrange(40)}"
+        row = [q, f"chr{rng.randrange(1, 23)}", f"{rng.uniform(80, 100):.2f}", str(rng.randrange(14, 29)),
+               str(rng.randrange(4)), "0", "1", "20", "100", "119", f"{rng.uniform(0, 10):.2e}", "30.0"]
+        kind = i % 7
+        if kind == 1:
+            row = row[:rng.randrange(1, 11)]  # truncated line
+        elif kind == 2:
+            row += ["extra", "fields"]
+        lines.append("\t".join(row))
+        if kind == 3:
+            lines.append("")
+    return "\n".join(["NA"] + lines) + "\n"
+
+
+@pytest.mark.parametrize("workers,gz,min_pident", [(1, False, None), (3, False, None), (1, True, None),
+                                                   (1, False, 90), (3, False, 90)])
+def test_ragged_lines_counted_like_line_parser(tmp_path, monkeypatch, workers, gz, min_pident):
+    monkeypatch.setattr(blast6, "CHUNK_BYTES", 4096)  # many blocks, some starting on short lines
+    text = ragged(3000)
+    path = tmp_path / ("hits.tsv.gz" if gz else "hits.tsv")
+    with (gzip.open if gz else open)(path, "wt") as f:
+        f.write(text)
+    assert blast6.count_hits(str(path), min_pident=min_pident, workers=workers) == line_counts(text, min_pident)
+
+
+def test_filters_skip_lines_missing_the_column(tmp_path):
+    path = tmp_path / "hits.tsv"
+    path.write_text("q2\nq1\tchr1\t99.0\t20\nq1\tchr1\t99.0\nq2\tchr2\t95.0\t19\t1\t0\t1\t19\t5\t23\t0.01\t35\t9\n")
+    assert blast6.count_hits(str(path), min_pident=90, min_length=18) == {"q1": 1, "q2": 1}
+    assert blast6.count_hits(str(path)) == {"q1": 2, "q2": 2}
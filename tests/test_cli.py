@@ -0,0 +1,38 @@
+"""The aso-cas13 CLI with only the installed package importable (no numbered scripts)."""
+import os, shutil, subprocess, sys
+from pathlib import Path
+
+import aso_cas13
+from aso_cas13 import synthetic
+from aso_cas13.pipeline import STAGES, code_files, stage_module
+
+PKG = Path(aso_cas13.__file__).resolve().parent
+
+
+def _installed(tmp_path):
+    # the package alone, as pip would put it in site-packages
+    site = tmp_path / "site"
+    shutil.copytree(PKG, site / "aso_cas13", ignore=shutil.ignore_patterns("__pycache__"))
+    env = dict(os.environ, PYTHONPATH=str(site), MPLBACKEND="Agg", ASO_CAS13_METRICS="0")
+    return site, env
+
+
+def test_run_without_repo_scripts(tmp_path):
+    site, env = _installed(tmp_path)
+    project = tmp_path / "project"
+    synthetic.generate_inputs(project, n_loci=1, windows=300)
+    # the repo root is neither the working directory nor on PYTHONPATH
+    out = subprocess.run([sys.executable, "-m", "aso_cas13", "run", "02_filter_candidates"],
+                         cwd=project, env=env, capture_output=True, text=True)
+    assert out.returncode == 0, out.stdout + out.stderr
+    assert "2 ran" in out.stdout
+    assert (project / "outputs/design/ASO_candidates_top.tsv").exists()
+    log = (project / "outputs/logs/02_filter_candidates.log").read_text()
+    assert "can't open file" not in log
+
+
+def test_stage_key_hashes_the_stage_module():
+    stage = next(s for s in STAGES if s.name == "02_filter_candidates")
+    files = code_files(stage_module(stage))
+    assert PKG / "stages/filter_candidates.py" in files
+    assert PKG / "scoring.py" in files
@@ -0,0 +1,111 @@
+"""13_visualize_integrated: parallel, cached figures match the old serial script."""
+import pandas as pd
+import pytest
+
+from aso_cas13.tables import read_table, write_table
+from conftest import PREFIX, chdir, run_stages
+
+pytest.importorskip("seaborn")
+image = pytest.importorskip("matplotlib.image")
+
+DPI = "40"
+NAMES = ("integrated_score_vs_offtargets.png", "dG_distribution.png", "accessibility_distribution.png",
+         "top_candidates_integrated_barplot.png")
+
+
+def serial_figures(design, fig_dir, dpi):
+    # the plotting of 13_visualize_integrated.py before figures.render_all
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    fig_dir.mkdir(parents=True, exist_ok=True)
+    aso = read_table(design / f"{PREFIX['ASO']}_final_integrated.tsv")
+    cas = read_table(design / f"{PREFIX['Cas13']}_final_integrated.tsv")
+    for df in (aso, cas):
+        for col in ["offtargets_genome", "rnafold_dG", "accessibility_score", "final_integrated_score"]:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+
+    plt.figure(figsize=(9,5))
+    sns.scatterplot(x="offtargets_genome", y="final_integrated_score", data=aso, color="#1f77b4", s=40, label="ASO")
+    sns.scatterplot(x="offtargets_genome", y="final_integrated_score", data=cas, color="#d62728", s=40, label="Cas13")
+    plt.xlabel("Genome-wide off-target count")
+    plt.ylabel("Final integrated score")
+    plt.title("Integrated score vs genome-wide off-targets")
+    plt.legend()
+    plt.tight_layout()
+    plt.savefig(fig_dir / NAMES[0], dpi=dpi)
+    plt.close()
+
+    for name, col, bins, xlabel, title in (
+            (NAMES[1], "rnafold_dG", 20, "RNAfold ΔG (kcal/mol)", "ΔG distribution (ASO vs Cas13)"),
+            (NAMES[2], "accessibility_score", 10, "Accessibility score", "Accessibility score distribution (ASO vs Cas13)")):
+        plt.figure(figsize=(8,5))
+        sns.histplot(aso[col], color="#1f77b4", bins=bins, alpha=0.5, label="ASO")
+        sns.histplot(cas[col], color="#d62728", bins=bins, alpha=0.5, label="Cas13")
+        plt.xlabel(xlabel)
+        plt.ylabel("Count")
+        plt.title(title)
+        plt.legend()
+        plt.tight_layout()
+        plt.savefig(fig_dir / name, dpi=dpi)
+        plt.close()
+
+    tops = []
+    for typ, df in (("ASO", aso), ("Cas13", cas)):
+        top = df.sort_values("final_integrated_score", ascending=False).head(10).copy()
+        top["label"] = (top["type"] + "_" + top["transcript_id"] + "_" + top["win_start"].astype(str) + "_"
+                        + top["win_end"].astype(str))
+        tops.append(top[["label", "final_integrated_score"]].assign(group=typ))
+    combo = pd.concat(tops, ignore_index=True)
+    plt.figure(figsize=(12,6))
+    sns.barplot(data=combo, x="label", y="final_integrated_score", hue="group", palette=["#1f77b4", "#d62728"])
+    plt.xticks(rotation=60, ha="right")
+    plt.xlabel("Candidate (type_transcript_win_start_win_end)")
+    plt.ylabel("Final integrated score")
+    plt.title("Top 10 candidates by integrated score (ASO vs Cas13)")
+    plt.tight_layout()
+    plt.savefig(fig_dir / NAMES[3], dpi=dpi)
+    plt.close()
+
+
+def assert_same_pixels(a, b):
+    pa, pb = image.imread(a), image.imread(b)
+    assert pa.shape == pb.shape and (pa == pb).all(), a.name
+
+
+def mtimes(fig_dir):
+    return {n: (fig_dir / n).stat().st_mtime_ns for n in NAMES}
+
+
+def test_parallel_cached_figures_match_serial(project, capsys):
+    design, figs = project / "outputs/design", project / "outputs/figures"
+    with chdir(project):
+        serial_figures(design, project / "serial", int(DPI))
+    run_stages(project, ("visualize-integrated", ["--dpi", DPI, "--workers", "2"]))
+    for name in NAMES:
+        assert_same_pixels(figs / name, project / "serial" / name)
+
+    # unchanged inputs: nothing is re-rendered
+    before = mtimes(figs)
+    capsys.readouterr()
+    run_stages(project, ("visualize-integrated", ["--dpi", DPI, "--workers", "2"]))
+    assert "Unchanged inputs, kept: " + ", ".join(NAMES) in capsys.readouterr().out
+    assert mtimes(figs) == before
+
+    # a changed ΔG column re-renders only the ΔG histogram, still matching the serial script
+    path = design / f"{PREFIX['ASO']}_final_integrated.tsv"
+    df = read_table(path)
+    df["rnafold_dG"] = pd.to_numeric(df["rnafold_dG"]) - 5
+    write_table(df, path)
+    with chdir(project):
+        serial_figures(design, project / "serial", int(DPI))
+    run_stages(project, ("visualize-integrated", ["--dpi", DPI, "--workers", "2"]))
+    after = mtimes(figs)
+    assert [n for n in NAMES if after[n] != before[n]] == ["dG_distribution.png"]
+    for name in NAMES:
+        assert_same_pixels(figs / name, project / "serial" / name)
+
+    # a different dpi is a different figure
+    run_stages(project, ("visualize-integrated", ["--dpi", "30", "--workers", "1"]))
+    assert all(image.imread(figs / n).shape != image.imread(project / "serial" / n).shape for n in NAMES)
@@ -0,0 +1,30 @@
+"""Figure stages on binary (Parquet) tables."""
+import pytest
+
+from aso_cas13.figures import top10_combo
+from aso_cas13.tables import read_table, read_text, write_text
+from conftest import PREFIX, run_stages
+
+pytest.importorskip("matplotlib")
+pytest.importorskip("pyarrow")
+
+TABLES = ("final_grch38", "final_integrated")
+
+
+def test_figure_stages_read_parquet(project):
+    design = project / "outputs/design"
+    tsv_combo = top10_combo({t: read_table(design / f"{p}_final_integrated.tsv") for t, p in PREFIX.items()},
+                            "final_integrated_score")
+    for p in PREFIX.values():
+        for name in TABLES:
+            tsv = design / f"{p}_{name}.tsv"
+            write_text(read_text(tsv), tsv.with_suffix(".parquet"))
+            tsv.unlink()
+    frames = {t: read_table(design / f"{p}_final_integrated.tsv") for t, p in PREFIX.items()}
+    assert str(frames["ASO"]["type"].dtype) == "category"
+    combo = top10_combo(frames, "final_integrated_score")
+    assert combo["label"].tolist() == tsv_combo["label"].tolist()
+    run_stages(project, ("visualize-candidates", ["--workers", "1"]), ("visualize-integrated", ["--workers", "1"]))
+    figs = project / "outputs/figures"
+    for name in ("top_candidates_barplot.png", "top_candidates_integrated_barplot.png", "dG_distribution.png"):
+        assert (figs / name).stat().st_size > 0
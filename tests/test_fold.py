@@ -0,0 +1,35 @@
+"""In-process ViennaRNA folding against parsing RNAfold text output."""
+import pytest
+
+from conftest import PREFIX, run_stages
+
+RNA = pytest.importorskip("RNA")
+D = "outputs/design"
+
+
+def _with_dG(root):
+    return {typ: (root / f"{D}/{p}_with_dG.tsv").read_bytes() for typ, p in PREFIX.items()}
+
+
+def test_vienna_matches_rnafold_text(project):
+    # `RNAfold --noPS < <export>.fa` over a deduplicated export (ids of the synthetic
+    # rows can repeat with different sequences, the sidecar map matches by sequence)
+    maps = []
+    for typ, p in PREFIX.items():
+        fa = project / f"outputs/results/{p}.fa"
+        run_stages(project, ("export-candidates-fasta", ["--input", f"{D}/{p}_final_grch38.tsv", "--dedup", "--out", str(fa)]))
+        lines = fa.read_text().split()
+        with (project / f"outputs/results/{typ}_rnafold.txt").open("w") as f:
+            for name, seq in zip(lines[::2], lines[1::2]):
+                structure, mfe = RNA.fold(seq.replace("T", "U"))
+                f.write(f"{name}\n{seq}\n{structure} ({mfe:6.2f})\n")
+        maps += [f"--{typ[:3].lower()}-map", f"{fa}.ids.tsv"]
+    run_stages(project, ("rnafold-energy", maps))
+    text = _with_dG(project)
+    assert b"\t\n" not in text["ASO"]  # every row got an energy
+
+    run_stages(project, ("rnafold-energy", ["--engine", "vienna", "--workers", "2"]))
+    assert _with_dG(project) == text
+    # served from the fold cache
+    run_stages(project, ("rnafold-energy", ["--engine", "vienna", "--workers", "1"]))
+    assert _with_dG(project) == text
@@ -0,0 +1,49 @@
+"""11_final_integration --fused against stages 07-11 run one at a time."""
+import shutil, sys
+
+import pytest
+
+from conftest import PREFIX, run_stages
+
+D = "outputs/design"
+# RNAfold stand-in: FASTA on stdin, one record per query with a GC-dependent energy
+FAKE_RNAFOLD = """import sys
+lines = sys.stdin.read().split()
+for name, seq in zip(lines[::2], lines[1::2]):
+    print(f"{name}\\n{seq}\\n{'.' * len(seq)} ({-0.5 * sum(c in 'GC' for c in seq):.2f})")
+"""
+EXTERNAL = ["--rnafold-cmd", f"{sys.executable} fake_rnafold.py", "--concurrency", "1",
+            "--aso-query", "outputs/results/ASO_candidates.fa", "--aso-map", "outputs/results/ASO_candidates.fa.ids.tsv",
+            "--cas-query", "outputs/results/Cas13_guides.fa", "--cas-map", "outputs/results/Cas13_guides.fa.ids.tsv"]
+
+
+def _final(root):
+    return {typ: (root / f"{D}/{p}_final_integrated.tsv").read_bytes() for typ, p in PREFIX.items()}
+
+
+@pytest.mark.parametrize("fold_args,fused_args", [
+    ([], []),
+    (["--aso-rnafold", "alt/ASO.txt", "--cas-rnafold", "alt/Cas13.txt"],
+     ["--aso-rnafold", "alt/ASO.txt", "--cas-rnafold", "alt/Cas13.txt"]),
+    (["--engine", "vienna", "--temperature", "25", "--dangles", "0"],
+     ["--fold-engine", "vienna", "--temperature", "25", "--dangles", "0"]),
+    (EXTERNAL, EXTERNAL),
+])
+def test_fused_matches_stages(project, fold_args, fused_args):
+    if "vienna" in fold_args:
+        pytest.importorskip("RNA")
+    if "alt/ASO.txt" in fold_args:
+        (project / "alt").mkdir()
+        for typ in PREFIX:
+            shutil.move(project / f"outputs/results/{typ}_rnafold.txt", project / f"alt/{typ}.txt")
+    if "--rnafold-cmd" in fold_args:
+        (project / "fake_rnafold.py").write_text(FAKE_RNAFOLD)
+        run_stages(project, *(("export-candidates-fasta", ["--input", f"{D}/{p}_final_grch38.tsv", "--dedup",
+                                                           "--out", f"outputs/results/{p}.fa"]) for p in PREFIX.values()))
+    run_stages(project, ("rnafold-energy", fold_args), ("repeat-filters",), ("accessibility-proxy",),
+               ("isoform-conservation",), ("final-integration",))
+    staged = _final(project)
+    for p in PREFIX.values():
+        (project / f"{D}/{p}_final_integrated.tsv").unlink()
+    run_stages(project, ("final-integration", ["--fused", *fused_args]))
+    assert _final(project) == staged
@@ -0,0 +1,64 @@
+"""Compiled GTF index against the line-by-line GTF scan it replaced in stage 01."""
+from aso_cas13 import synthetic
+from aso_cas13.gtf_index import open_index
+from aso_cas13.refstore import norm_chr
+
+FEATURES = ("three_prime_utr", "exon")
+EXTRA = """#!genome-build test
+chr19\ttest\tgene\t100\t900\t.\t+\t.\tgene_id "G1"; gene_name "EDGE";
+chr19\ttest\texon\t100\t200\t.\t+\t.\tgene_id "G1"; transcript_id "T1"; gene_name "EDGE";
+chr19\ttest\tthree_prime_utr\t800\t900\t.\t+\t.\tgene_id "G1"; transcript_id "T1"; gene_name "EDGE";
+chr19\ttest\tCDS\t150\t200\t.\t+\t0\tgene_id "G1"; transcript_id "T1"; gene_name "EDGE";
+19\ttest\texon\t300\t400\t.\t+\t.\tgene_id "G1"; transcript_id "T2"; gene "EDGE";
+chrX\ttest\texon\t10\t20\t.\t-\t.\tgene_id "G1"; gene_name "EDGE";
+chr19\ttest\texon\t5\t6
+"""
+
+
+def _scan(gtf, gene, feature_types=FEATURES):
+    # the stage 01 parse before the index: every line, every run
+    regions = []
+    with open(gtf) as f:
+        for line in f:
+            if line.startswith("#"): continue
+            parts = line.rstrip("\n").split("\t")
+            if len(parts) < 9: continue
+            chrom, src, feature, start, end, score, strand, frame, attrs = parts
+            if feature not in feature_types:
+                continue
+            at = {}
+            for kv in attrs.split(";"):
+                kv = kv.strip()
+                if not kv: continue
+                if " " in kv:
+                    k, v = kv.split(" ", 1)
+                    at[k] = v.strip().strip('"')
+            gene_name = at.get("gene_name") or at.get("gene")
+            tid = at.get("transcript_id")
+            if gene_name == gene and tid:
+                regions.append((norm_chr(chrom), int(start), int(end), strand, tid))
+    return regions
+
+
+def test_features_match_gtf_scan(tmp_path):
+    synthetic.generate_inputs(tmp_path, n_loci=4, windows=200)
+    gtf = tmp_path / synthetic.GTF
+    with gtf.open("a") as f:
+        f.write(EXTRA)
+    with open_index(gtf) as ann:
+        genes = ann.genes()
+        assert "DMPK" in genes and "EDGE" in genes
+        for gene in genes:
+            assert ann.features(gene, FEATURES) == _scan(gtf, gene)
+            assert ann.features(gene, ("CDS",)) == _scan(gtf, gene, ("CDS",))
+
+
+def test_index_follows_gtf_edits(tmp_path):
+    synthetic.generate_inputs(tmp_path, n_loci=1, windows=200)
+    gtf = tmp_path / synthetic.GTF
+    with open_index(gtf) as ann:
+        assert ann.features("EDGE") == []
+    with gtf.open("a") as f:
+        f.write(EXTRA)
+    with open_index(gtf) as ann:
+        assert ann.features("EDGE") == _scan(gtf, "EDGE") != []
@@ -0,0 +1,55 @@
+"""Spliced-isoform k-mer index against substring search in each spliced transcript."""
+import pytest
+
+from aso_cas13.refstore import norm_chr
+from aso_cas13.tables import read_rows
+from conftest import PREFIX, run_stages
+
+COMP = str.maketrans("ACGTN", "TGCAN")
+
+
+def _spliced(root):
+    # every transcript spliced from the GTF exons and the FASTA, in transcript orientation
+    # (the project has one gene, so these are the isoforms of the rows' gene)
+    ref, name = {}, None
+    for line in (root / "inputs/reference/chr19.fa").read_text().splitlines():
+        if line.startswith(">"):
+            name = norm_chr(line[1:].split()[0])
+            ref[name] = []
+        else:
+            ref[name].append(line.strip().upper())
+    ref = {c: "".join(s) for c, s in ref.items()}
+    exons = {}
+    for line in (root / "inputs/reference/annotation.gtf").read_text().splitlines():
+        parts = line.split("\t")
+        if line.startswith("#") or len(parts) < 9 or parts[2] != "exon" or 'transcript_id "' not in parts[8]:
+            continue
+        tid = parts[8].split('transcript_id "')[1].split('"')[0]
+        exons.setdefault(tid, []).append((norm_chr(parts[0]), int(parts[3]), int(parts[4]), parts[6]))
+    out = {}
+    for tid, ex in exons.items():
+        ex.sort(key=lambda e: e[1])
+        seq = "".join(ref[c][s - 1:e] for c, s, e, _ in ex)
+        out[tid] = seq.translate(COMP)[::-1] if ex[0][3] == "-" else seq
+    return out
+
+
+def _count(seq, transcripts, mismatches):
+    seq = seq.strip().upper()
+    if not mismatches:
+        return sum(seq in t for t in transcripts.values())
+    w = len(seq)
+    return sum(any(sum(a != b for a, b in zip(seq, t[i:i + w])) <= mismatches for i in range(len(t) - w + 1))
+               for t in transcripts.values())
+
+
+@pytest.mark.parametrize("mismatches", [0, 1])
+def test_index_matches_spliced_search(project, mismatches):
+    run_stages(project, ("isoform-conservation", ["--engine", "index", "--mismatches", str(mismatches)]))
+    transcripts = _spliced(project)
+    for p in PREFIX.values():
+        rows = read_rows(project / f"outputs/design/{p}_with_conservation.tsv")
+        assert rows
+        got = [int(r["isoform_conservation"]) for r in rows]
+        assert got == [_count(r["window_seq"], transcripts, mismatches) for r in rows]
+        assert max(got) > 1
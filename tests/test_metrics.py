@@ -0,0 +1,25 @@
+"""Stage metrics of a process started from a larger one."""
+import json, subprocess, sys, textwrap
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+PARENT = textwrap.dedent("""
+    import json, os, resource, subprocess, sys
+    import numpy as np
+    big = np.ones(400 << 17)  # 400 MB, touched
+    child = ("from aso_cas13.metrics import StageMetrics; "
+             "m = StageMetrics('small').phase('compute'); m.done()")
+    subprocess.run([sys.executable, "-c", child], check=True)
+    print(json.dumps({"parent_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+""")
+
+
+def test_child_records_its_own_peak(tmp_path):
+    metrics = tmp_path / "metrics.jsonl"
+    env = {"PYTHONPATH": str(ROOT), "ASO_CAS13_METRICS": str(metrics), "PATH": "/usr/bin:/bin"}
+    out = subprocess.run([sys.executable, "-c", PARENT], env=env, capture_output=True, text=True, check=True)
+    parent_mb = json.loads(out.stdout)["parent_mb"]
+    child_mb = json.loads(metrics.read_text().splitlines()[-1])["total"]["peak_rss_mb"]
+    assert parent_mb > 350
+    assert child_mb < 150, (child_mb, parent_mb)
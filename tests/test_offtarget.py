@@ -0,0 +1,80 @@
+"""Seed-index search against a brute-force scan, including N blocks and record ends."""
+import random
+
+import pytest
+
+from aso_cas13.offtarget import open_index
+
+COMP = str.maketrans("ACGTN", "TGCAN")
+
+
+def rc(s):
+    return s.translate(COMP)[::-1]
+
+
+def brute(records, q, max_mm):
+    # loci (chrom, 1-based start) where q or its reverse complement has <= max_mm mismatches (N mismatches)
+    out = set()
+    for name, seq in records.items():
+        for p in range(len(seq) - len(q) + 1):
+            site = seq[p:p + len(q)]
+            for s in (q, rc(q)):
+                if sum(a != b or a == "N" for a, b in zip(site, s)) <= max_mm:
+                    out.add((name, p + 1))
+    return out
+
+
+def mutate(rng, s, n):
+    s = list(s)
+    for i in rng.sample(range(len(s)), n):
+        s[i] = rng.choice([b for b in "ACGT" if b != s[i]])
+    return "".join(s)
+
+
+@pytest.fixture(scope="module")
+def genome(tmp_path_factory):
+    rng = random.Random(7)
+    seq = lambda n: "".join(rng.choice("ACGT") for _ in range(n))
+    records = {
+        "chrA": seq(400) + "N" * 30 + seq(300) + "N" * 5 + seq(200),
+        "chrB": "N" * 10 + seq(250) + "NN" + seq(150),
+        "chrC": seq(40),  # shorter than most seeds' k-mers fit around
+        "chrD": seq(11) + "N" * 3 + seq(300),  # first clean run shorter than k
+    }
+    fa = tmp_path_factory.mktemp("ref") / "ref.fa"
+    fa.write_text("".join(f">{n}\n{s}\n" for n, s in records.items()))
+    return records, open_index(fa)
+
+
+def queries(records, rng, L, max_mm):
+    # sites next to every N block and record end, on both strands, with max_mm mismatches
+    out = []
+    for name, seq in records.items():
+        bounds = [i for i in range(1, len(seq)) if (seq[i] == "N") != (seq[i - 1] == "N")] + [len(seq)]
+        for b in bounds:
+            for p in (b - L, b - L - 3, b, b + 2):
+                site = seq[p:p + L] if 0 <= p and p + L <= len(seq) else ""
+                if len(site) == L and "N" not in site:
+                    q = mutate(rng, site, max_mm)
+                    out.append(q if rng.random() < 0.5 else rc(q))
+    return out
+
+
+@pytest.mark.parametrize("L,max_mm", [(18, 1), (18, 2), (28, 2), (18, 0)])
+def test_matches_brute_force(genome, L, max_mm):
+    records, index = genome
+    rng = random.Random(L * 10 + max_mm)
+    qs = queries(records, rng, L, max_mm)
+    assert len(qs) > 10
+    for q in qs:
+        found = {(c, s) for c, s, _, _ in index.search(q, max_mm)}
+        assert found == brute(records, q, max_mm), q
+
+
+def test_palindrome_counted_once(tmp_path):
+    pal = "ACGTACGGCCGTACGT"  # its own reverse complement
+    assert rc(pal) == pal
+    fa = tmp_path / "pal.fa"
+    fa.write_text(f">chr1\nTTTTTTTTTTTTTTTTTTTT{pal}TTTTTTTTTTTTTTTTTTTT\n")
+    hits = open_index(fa).search(pal, 0)
+    assert [(c, s, m) for c, s, _, m in hits] == [("chr1", 21, 0)]
@@ -0,0 +1,48 @@
+"""Off-target cache: keys per count type, entries only for searched sequences."""
+from aso_cas13.ot_cache import OffTargetCache, blast_params
+from aso_cas13.tables import read_rows
+from conftest import run_stages
+
+CACHE = "outputs/cache/offtargets.sqlite"
+
+
+def entries(path, params):
+    with OffTargetCache(path, "test", params) as c:
+        return {s: n for s, (n, _) in c.get_many([r[0] for r in c.con.execute("SELECT seq FROM offtargets")]).items()}
+
+
+def test_parse_genome_caches_searched_hit_lines_only(project):
+    # only the ASO candidates are exported (searched); Cas13 has no query FASTA
+    run_stages(project, ("export-candidates-fasta", ["--input", "outputs/design/ASO_candidates_top.tsv",
+                                                     "--out", "outputs/results/ASO_candidates.fa"]),
+               ("parse-blast-genome", ["--cache", CACHE, "--ref-build", "test"]))
+    counts = {}  # rows sharing a sequence may have different synthetic hit counts
+    for r in read_rows(project / "outputs/design/ASO_candidates_final_grch38.tsv"):
+        counts.setdefault(r["window_seq"], set()).add(int(r["offtargets_genome"]))
+    got = entries(project / CACHE, blast_params("blastn"))
+    # one sequence per qid, as stage 04 keys its rows (synthetic qids can repeat)
+    seq_of = {f"{r['transcript_id']}_{r['win_start']}_{r['win_end']}": r["window_seq"]
+              for r in read_rows(project / "outputs/design/ASO_candidates_top.tsv")}
+    assert set(got) == set(seq_of.values())
+    assert all(got[s] in counts[s] for s in got if s in counts)
+    cas = {r["window_seq"] for r in read_rows(project / "outputs/design/Cas13_guides_top.tsv")}
+    assert not cas & set(got)
+    # the filtered summary counts of stage 05 live under another key
+    assert entries(project / CACHE, blast_params("blastn", 90.0, 18)) == {}
+
+
+def test_merge_caches_filtered_counts_of_searched_sequences(tmp_path):
+    seqs = ["ACGTACGTACGTACGTAC", "TTTTGGGGCCCCAAAATT", "GATTACAGATTACAGATT"]
+    cands = tmp_path / "cands.tsv"
+    cands.write_text("type\ttranscript_id\twin_start\twin_end\twindow_seq\n"
+                     + "".join(f"ASO\tT{i}\t{i}\t{i + 17}\t{s}\n" for i, s in enumerate(seqs)))
+    summary = tmp_path / "summary.tsv"
+    summary.write_text("candidate_id\tofftargets_genome\nASO|T0|0|17\t4\n")
+    query = tmp_path / "query.fa"
+    query.write_text(f">a\n{seqs[0]}\n>b\n{seqs[1]}\n")  # seqs[2] was never searched
+    cache = tmp_path / "ot.sqlite"
+    run_stages(tmp_path, ("merge-offtargets", [str(cands), str(summary), str(tmp_path / "out.tsv"), "--cache", str(cache),
+                                               "--ref-build", "test", "--query", str(query)]))
+    assert [r["offtargets_genome"] for r in read_rows(tmp_path / "out.tsv")] == ["4", "0", "0"]
+    assert entries(cache, blast_params("blastn", 90.0, 18)) == {seqs[0]: 4, seqs[1]: 0}
+    assert entries(cache, blast_params("blastn")) == {}
@@ -0,0 +1,82 @@
+"""Stage keys of the incremental runner."""
+import pytest
+
+from aso_cas13.pipeline import STAGES, Runner, dependencies, select, stage_inputs
+
+GENOME_STAGE = next(s for s in STAGES if s.name == "04_parse_blast_genome")
+
+
+@pytest.mark.parametrize("args,declared", [
+    ([], False),
+    (["--engine", "kmer"], True),
+    (["--engine=kmer", "--ref", "alt.fa"], True),
+    (["--cache", "ot.sqlite"], True),
+    (["--cache", "ot.sqlite", "--ref-build", "GRCh38.p14"], False),
+])
+def test_reference_is_a_stage_input_when_read(tmp_path, monkeypatch, args, declared):
+    monkeypatch.chdir(tmp_path)
+    ref = "alt.fa" if "alt.fa" in args else "inputs/reference/GRCh38.fa"
+    assert (ref in stage_inputs(GENOME_STAGE, args)) is declared
+    (tmp_path / ref).parent.mkdir(parents=True, exist_ok=True)
+    (tmp_path / ref).write_text(">chr1\nACGT\n")
+    runner = Runner([GENOME_STAGE], {GENOME_STAGE.name: args}, state_path=tmp_path / "state.json")
+    before = runner.key(GENOME_STAGE)
+    (tmp_path / ref).write_text(">chr1\nACGA\n")
+    runner = Runner([GENOME_STAGE], {GENOME_STAGE.name: args}, state_path=tmp_path / "state.json")
+    assert (runner.key(GENOME_STAGE) != before) is declared
+
+
+def _stage(name):
+    return next(s for s in STAGES if s.name == name)
+
+
+@pytest.mark.parametrize("name,args,path", [
+    ("01_locus_windows", [], "inputs/reference/chr19.fa"),
+    ("01_locus_windows", ["--ref", "alt.fa"], "alt.fa"),
+    ("01_locus_windows", ["--gtf", "alt.gtf"], "alt.gtf"),
+    ("01_locus_windows", ["--bed", "alt.bed"], "alt.bed"),
+    ("04_parse_blast_genome", ["--blast-cmd", "blastn", "--aso-query", "q/ASO.*.fa"], "q/ASO.000.fa"),
+    ("04_parse_blast_genome", ["--aso-map", "ASO.ids.tsv"], "ASO.ids.tsv"),
+    ("07_rnafold_energy", [], "outputs/results/ASO_rnafold.txt"),
+    ("07_rnafold_energy", ["--rnafold-cmd", "RNAfold"], "outputs/results/ASO_candidates.fa"),
+    ("09_accessibility_proxy", ["--engine", "plfold"], "outputs/results/01_target_regions.tsv"),
+    ("10_isoform_conservation", ["--engine", "index", "--gtf", "alt.gtf"], "alt.gtf"),
+    ("10_isoform_conservation", ["--engine", "windows", "--windows", "w"], "w/01_target_windows.npy"),
+])
+def test_argument_inputs_are_hashed(tmp_path, monkeypatch, name, args, path):
+    monkeypatch.chdir(tmp_path)
+    stage = _stage(name)
+    (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+    (tmp_path / path).write_text("A\n")
+    before = Runner([stage], {name: args}, state_path=tmp_path / "state.json").key(stage)
+    (tmp_path / path).write_text("C\n")
+    assert Runner([stage], {name: args}, state_path=tmp_path / "state.json").key(stage) != before
+
+
+@pytest.mark.parametrize("name,args,upstream", [
+    ("09_accessibility_proxy", ["--engine", "plfold"], "01_locus_windows"),
+    ("10_isoform_conservation", ["--engine", "windows"], "01_locus_windows"),
+    ("07_rnafold_energy", ["--rnafold-cmd", "RNAfold"], "03_export_candidates_fasta:Cas13"),
+    ("04_parse_blast_genome", ["--blast-cmd", "blastn", "--aso-query", "outputs/results/ASO_candidates.*.fa",
+                               "--aso-map", "outputs/results/ASO_candidates.fa.ids.tsv"], "03_export_candidates_fasta:ASO"),
+])
+def test_argument_inputs_are_dag_edges(name, args, upstream):
+    extra = {name: args, "03_export_candidates_fasta:ASO": ["--dedup", "--shards", "4"]}
+    assert upstream in dependencies(STAGES, extra)[name]
+    assert upstream not in dependencies(STAGES)[name]
+    assert upstream in {s.name for s in select(STAGES, [name], extra=extra)}
+
+
+def test_stage_reruns_when_argument_input_changes(project, monkeypatch):
+    monkeypatch.chdir(project)
+    stage = _stage("10_isoform_conservation")
+    extra = {stage.name: ["--engine", "windows"]}
+    run = lambda: Runner([stage], extra, state_path=project / "state.json").run(report=lambda _: None)[stage.name]
+    assert run() == "ran"
+    assert run() == "skipped"
+    regions = project / "outputs/results/01_target_regions.tsv"
+    header, first, *rest = regions.read_text().splitlines(keepends=True)
+    seq = first.rstrip("\n").split("\t")[-1]
+    first = first.replace(seq, ("G" if seq[0] != "G" else "C") + seq[1:])
+    regions.write_text("".join([header, first, *rest]))
+    assert run() == "ran"
@@ -0,0 +1,70 @@
+"""Single-pass repeat scanner against the str.count filters it replaced."""
+import random
+
+import pytest
+
+from aso_cas13.repeats import DI, TRI, RepeatScanner
+from aso_cas13.scoring import score_row, top_by_type, write_top
+from aso_cas13.tables import read_rows
+from aso_cas13.windows import WindowTable, write_compact
+from conftest import PREFIX, run_stages
+
+
+def has_homopolymer(seq, k=5):
+    return any(n*k in seq for n in "ATGC")
+
+
+def repeat_score(seq):
+    # stage 08 before the scanner
+    di = sum(seq.count(d*3) for d in DI)
+    tri = sum(seq.count(t*2) for t in TRI)
+    return di + tri
+
+
+@pytest.mark.parametrize("alphabet", ["ACGT", "AT", "CAG", "ACGTN"])
+def test_scan_region_matches_str_count(alphabet):
+    rng = random.Random(len(alphabet))
+    scanner = RepeatScanner()
+    for _ in range(20):
+        seq = "".join(rng.choice(alphabet) for _ in range(rng.randint(10, 200)))
+        for w in (5, 18, 23, 30):
+            offsets = list(range(max(0, len(seq) - w + 1)))
+            res = scanner.scan_region(seq, offsets, w)
+            for i, off in enumerate(offsets):
+                win = seq[off:off + w]
+                assert res["simple_repeat_score"][i] == repeat_score(win), win
+                assert res["has_homopolymer"][i] == has_homopolymer(win), win
+
+
+def test_stages_match_str_count(project):
+    for p in PREFIX.values():
+        rows = read_rows(project / f"outputs/design/{p}_with_repeats.tsv")
+        assert rows
+        for r in rows:
+            assert r["has_homopolymer_5+"] == ("yes" if has_homopolymer(r["window_seq"]) else "no")
+            assert r["simple_repeat_score"] == str(repeat_score(r["window_seq"]))
+
+
+@pytest.mark.parametrize("args,max_score,homopolymer", [
+    (["--max-repeat-score", "1"], 1, True),
+    (["--no-homopolymer"], None, False),
+    (["--max-repeat-score", "0", "--no-homopolymer"], 0, False),
+])
+def test_filter_candidates_matches_str_count(tmp_path, args, max_score, homopolymer):
+    # regions rich in repeats and homopolymers; 02 drops windows before the top-50 cut
+    # as dropping rows by the old checks would
+    rng = random.Random(0)
+    targets = [{"transcript_id": f"T{i}", "chr": "19", "strand": "+", "start": 1000 * i + 1, "end": 1000 * i + 150,
+                "sequence": "".join(rng.choice(alphabet) for _ in range(150))}
+               for i, alphabet in enumerate(["ACGT", "CAG", "AT", "AAACGT"])]
+    write_compact(tmp_path / "outputs/results", targets)
+    run_stages(tmp_path, ("filter-candidates", args))
+    table = WindowTable(tmp_path / "outputs/results")
+    rows = [score_row(r) for r in table.rows()
+            if (max_score is None or repeat_score(r["window_seq"]) <= max_score)
+            and (homopolymer or not has_homopolymer(r["window_seq"]))]
+    assert 0 < len(rows) < len(table)
+    for typ, top in zip(PREFIX, top_by_type(rows)):
+        write_top(tmp_path / f"{typ}_legacy.tsv", top)
+        assert (tmp_path / f"{typ}_legacy.tsv").read_bytes() == \
+            (tmp_path / f"outputs/design/{PREFIX[typ]}_top.tsv").read_bytes()
@@ -0,0 +1,37 @@
+"""Bounded top-k against the full sort of formatted scores."""
+import numpy as np
+
+from aso_cas13.scoring import TopK, rounded_cents
+
+
+def reference(scores, k):
+    keys = [float(f"{x:.2f}") for x in scores]
+    return sorted(range(len(scores)), key=lambda j: (-keys[j], j))[:k]
+
+
+def test_rounded_cents_matches_format():
+    rng = np.random.default_rng(0)
+    x = np.concatenate([rng.uniform(-100, 100, 10000), np.arange(-5, 5, 0.005), [0.125, 2.675, 1.005, -0.125]])
+    assert rounded_cents(x).tolist() == [round(float(f"{v:.2f}") * 100) for v in x.tolist()]
+
+
+def test_ties_keep_memory_bounded_and_order_exact():
+    rng = np.random.default_rng(1)
+    # few distinct values, as the base score of one window width
+    scores = rng.choice(np.array([51.33, 50.0, 49.995, 48.2, 47.0]), 200000)
+    top = TopK(50)
+    for c0 in range(0, len(scores), 10000):
+        top.push(scores[c0:c0 + 10000], np.arange(c0, c0 + 10000, dtype=np.int64))
+        assert len(top.idx) <= 50
+    assert top.result() == reference(scores.tolist(), 50)
+
+
+def test_random_chunks_match_full_sort():
+    rng = np.random.default_rng(2)
+    scores = np.round(rng.normal(40, 5, 50000), 3)
+    top = TopK(37)
+    order = rng.permutation(len(scores))  # chunks arrive out of window order
+    for c0 in range(0, len(order), 999):
+        sel = order[c0:c0 + 999]
+        top.push(scores[sel], sel.astype(np.int64))
+    assert top.result() == reference(scores.tolist(), 37)
@@ -0,0 +1,64 @@
+"""Streaming screen (01 --screen) against the per-locus 01+02 designs it replaces."""
+import pytest
+
+from aso_cas13 import synthetic
+from aso_cas13.scoring import score_row, top_by_type, write_top
+from aso_cas13.windows import WindowTable, write_compact
+from conftest import PREFIX, run_stages
+
+GENES = ["DMPK", "SYN00001", "SYN00002", "SYN00003"]
+
+
+@pytest.fixture(scope="module")
+def loci(tmp_path_factory):
+    """Four synthetic genes with their --batch designs, and DMPK's single-locus design."""
+    root = tmp_path_factory.mktemp("screen")
+    synthetic.generate_inputs(root, n_loci=len(GENES), windows=300)
+    run_stages(root, ("locus-windows", ["--batch", "--genes", ",".join(GENES), "--workers", "1"]),
+               ("locus-windows",), ("filter-candidates",))
+    return root
+
+
+def _lines(path):
+    return path.read_text().splitlines()
+
+
+def _screened(root, out, typ, gene=None):
+    # screen rows without the leading gene column, optionally of one gene
+    rows = [l.split("\t", 1) for l in _lines(root / out / "19" / f"{PREFIX[typ]}_top.tsv")]
+    assert rows[0][0] == "gene"
+    return [rows[0][1]] + [r[1] for r in rows[1:] if gene is None or r[0] == gene]
+
+
+@pytest.mark.parametrize("chunk_bases,workers", [(None, 1), (500, 1), (500, 2), (15000, 2)])
+def test_gene_rank_matches_batch(loci, chunk_bases, workers):
+    out = f"outputs/design/screen_gene_{chunk_bases}_{workers}"
+    args = ["--screen", "--screen-dir", out, "--workers", str(workers)]
+    run_stages(loci, ("locus-windows", args + (["--chunk-bases", str(chunk_bases)] if chunk_bases else [])))
+    manifest = _lines(loci / out / "manifest.tsv")
+    assert manifest[1].split("\t")[:2] == ["19", str(len(GENES))]
+    for typ, p in PREFIX.items():
+        for gene in GENES:
+            want = _lines(loci / "outputs/design/loci" / gene / f"{p}_top.tsv")
+            assert len(want) > 1
+            assert _screened(loci, out, typ, gene) == want, (typ, gene)
+        # the single-locus run of DMPK (its BED line) designs the same windows
+        assert _screened(loci, out, typ, "DMPK") == _lines(loci / f"outputs/design/{p}_top.tsv")
+
+
+@pytest.mark.parametrize("chunk_bases,workers,k", [(None, 1, 50), (500, 2, 50), (15000, 1, 7)])
+def test_global_rank_matches_one_table(loci, tmp_path, chunk_bases, workers, k):
+    # baseline: every gene's regions in one window table, all rows scored and sorted
+    targets = [r for gene in GENES for r in WindowTable(loci / "outputs/results/loci" / gene).regions]
+    write_compact(tmp_path, targets)
+    table = WindowTable(tmp_path)
+    want = {}
+    for typ, top in zip(PREFIX, top_by_type([score_row(r) for r in table.rows()], k)):
+        write_top(tmp_path / f"{typ}.tsv", top)
+        want[typ] = _lines(tmp_path / f"{typ}.tsv")
+    out = f"outputs/design/screen_global_{chunk_bases}_{workers}_{k}"
+    args = ["--screen", "--rank", "global", "--top-k", str(k), "--screen-dir", out, "--workers", str(workers)]
+    run_stages(loci, ("locus-windows", args + (["--chunk-bases", str(chunk_bases)] if chunk_bases else [])))
+    for typ in PREFIX:
+        assert len(want[typ]) == k + 1
+        assert _screened(loci, out, typ) == want[typ], typ
@@ -0,0 +1,86 @@
+"""Unique-sequence index of the window table against a scan of its rows."""
+import random
+
+import numpy as np
+import pytest
+
+from aso_cas13.seqindex import INDEX_NAME, open_sequence_index
+from aso_cas13.tables import read_rows
+from aso_cas13.windows import WindowTable, write_compact
+from conftest import PREFIX, run_stages
+
+
+def _targets():
+    # shared and repeated region sequences, N and soft-masked bases
+    rng = random.Random(0)
+    core = "".join(rng.choice("ACGT") for _ in range(120))
+    seqs = [core, core[10:] + "ACGTACGTAC", core[:60] + "N" + core[61:], core[:40] + core[40:80].lower() + core[80:],
+            "CAG" * 40, core]
+    return [{"transcript_id": f"T{i % 4}", "chr": "19", "strand": "+", "start": 1000 * i + 1,
+             "end": 1000 * i + len(s), "sequence": s} for i, s in enumerate(seqs)]
+
+
+def _scan(table):
+    # first-appearance ids and transcripts per window_seq, one row at a time
+    ids, first, transcripts = [], {}, {}
+    for i, r in enumerate(table.rows()):
+        s = r["window_seq"]
+        first.setdefault(s, (len(first), i))
+        ids.append(first[s][0])
+        transcripts.setdefault(s, set()).add(r["transcript_id"])
+    return ids, first, transcripts
+
+
+@pytest.fixture(params=["project", "crafted"])
+def results(request, project, tmp_path):
+    if request.param == "project":
+        return project / "outputs/results"
+    write_compact(tmp_path / "outputs/results", _targets())
+    return tmp_path / "outputs/results"
+
+
+def test_index_matches_row_scan(results):
+    table = WindowTable(results)
+    ids, first, transcripts = _scan(table)
+    assert len(first) < len(ids)
+    for index in (open_sequence_index(results), open_sequence_index(results)):  # built, then loaded
+        assert index.seq_id.tolist() == ids
+        assert len(index) == len(first)
+        assert index.first.tolist() == [i for _, i in first.values()]
+        assert index.transcript_counts().tolist() == [len(transcripts[s]) for s in first]
+        assert [index.transcripts_of(sid) for sid in range(len(index))] == [sorted(transcripts[s]) for s in first]
+        assert index.lookup(list(first)).tolist() == list(range(len(first)))
+        assert index.lookup(["ACGT", "x" * 18, list(first)[0].lower() + "A"]).tolist() == [-1, -1, -1]
+
+
+def test_index_rebuilt_when_table_changes(tmp_path):
+    results = tmp_path / "outputs/results"
+    targets = _targets()
+    write_compact(results, targets)
+    before = open_sequence_index(results)
+    write_compact(results, targets[:2])
+    after = open_sequence_index(results)
+    assert (results / INDEX_NAME).exists()
+    assert after.seq_id.tolist() == _scan(WindowTable(results))[0]
+    assert len(after.seq_id) < len(before.seq_id)
+
+
+@pytest.mark.parametrize("args", [[], ["--max-repeat-score", "1", "--no-homopolymer"], ["--thermo", "--min-tm-nn", "40"]])
+def test_dedup_top_tables_match(tmp_path, args):
+    write_compact(tmp_path / "outputs/results", _targets())
+    run_stages(tmp_path, ("filter-candidates", args))
+    plain = {p: (tmp_path / f"outputs/design/{p}_top.tsv").read_bytes() for p in PREFIX.values()}
+    run_stages(tmp_path, ("filter-candidates", args + ["--dedup"]))
+    for p, data in plain.items():
+        assert (tmp_path / f"outputs/design/{p}_top.tsv").read_bytes() == data
+        assert data.count(b"\n") > 1
+
+
+def test_windows_engine_matches_row_scan(project):
+    run_stages(project, ("isoform-conservation", ["--engine", "windows"]))
+    _, _, transcripts = _scan(WindowTable(project / "outputs/results"))
+    for p in PREFIX.values():
+        rows = read_rows(project / f"outputs/design/{p}_with_conservation.tsv")
+        got = np.array([int(r["isoform_conservation"]) for r in rows])
+        assert got.tolist() == [len(transcripts.get(r["window_seq"].strip(), "x")) for r in rows]
+        assert got.max() > 1
@@ -0,0 +1,129 @@
+"""Sharded and deduplicated FASTA exports against the single-file export.
+
+BLAST and RNAfold are the synthetic stand-ins, run once per FASTA file; the
+parse stages then fan in the per-shard outputs (a glob, plus the sidecar map
+for a --dedup export) and must write what they write for the one-file run.
+"""
+import pytest
+
+from aso_cas13 import synthetic
+from aso_cas13.shards import load_map
+from aso_cas13.tables import read_rows
+from conftest import PREFIX, run_stages
+
+QID = "{type}_{transcript_id}_{win_start}_{win_end}"
+SHARD = "[0-9][0-9][0-9]"
+
+
+def _tool(fastas, out, run):
+    # one output per FASTA file; a single file keeps the plain name
+    outs = [out] if len(fastas) == 1 else [out.with_name(f"{out.stem}.{i:03d}{out.suffix}") for i in range(len(fastas))]
+    for fa, o in zip(fastas, outs):
+        with open(o, "w") as f:
+            run(fa, f)
+    return str(out) if len(fastas) == 1 else str(out.with_name(f"{out.stem}.{SHARD}{out.suffix}"))
+
+
+def _blast(fa, out):
+    synthetic.stub_blastn(fa, out)
+
+
+def _rnafold(fa, out):
+    with open(fa) as f:
+        synthetic.stub_rnafold(f, out)
+
+
+def _export(root, table, out, args):
+    run_stages(root, ("export-candidates-fasta", ["--input", table, "--out", str(out), "--idfmt", QID] + args))
+    fastas = sorted(out.parent.glob(f"{out.stem}.{SHARD}{out.suffix}")) or [out]
+    return fastas, (str(out) + ".ids.tsv") if "--dedup" in args else None
+
+
+def run_sharded(root, tag, args):
+    """Outputs of 03_parse_blast, 04_parse_blast_genome, 04_summarize_offtargets and 07 text
+    for FASTAs exported with `args`; {relative path: bytes}."""
+    d = root / "outputs/results" / tag
+    d.mkdir(parents=True)
+    blast, genome, fold = [], [], []
+    for typ, p in PREFIX.items():
+        fastas, map_file = _export(root, f"outputs/design/{p}_top.tsv", d / f"{p}.fa", args)
+        hits = _tool(fastas, d / f"{typ}_offtargets.txt", _blast)
+        maps = [f"--{typ[:3].lower()}-map", map_file] if map_file else []
+        blast += [f"--{typ[:3].lower()}-hits", hits] + maps
+        genome += [f"--{typ[:3].lower()}-hits", hits] + maps
+        run_stages(root, ("summarize-offtargets", [hits, str(d / f"{typ}_summary.tsv")] + (["--map", map_file] if map_file else [])))
+    run_stages(root, ("parse-blast", blast), ("parse-blast-genome", genome))
+    for typ, p in PREFIX.items():
+        fastas, map_file = _export(root, f"outputs/design/{p}_final_grch38.tsv", d / f"{p}_final.fa", args)
+        rnafold = _tool(fastas, d / f"{typ}_rnafold.txt", _rnafold)
+        fold += [f"--{typ[:3].lower()}-rnafold", rnafold] + ([f"--{typ[:3].lower()}-map", map_file] if map_file else [])
+    run_stages(root, ("rnafold-energy", fold))
+    out = {f"{t}_summary.tsv": (d / f"{t}_summary.tsv").read_bytes() for t in PREFIX}
+    for p in PREFIX.values():
+        for name in ("final", "final_grch38", "with_dG"):
+            path = f"outputs/design/{p}_{name}.tsv"
+            out[path] = (root / path).read_bytes()
+    return out
+
+
+def _rows(data):
+    lines = data.decode().splitlines()
+    cols = lines[0].split("\t")
+    return [dict(zip(cols, line.split("\t"))) for line in lines[1:]]
+
+
+def _unique_qid_values(data, col, unique):
+    return {(QID.format(**r), r["window_seq"]): r[col] for r in _rows(data) if QID.format(**r) in unique}
+
+
+def _unique_qids(root, p):
+    qids = [QID.format(**r) for r in read_rows(root / f"outputs/design/{p}_top.tsv")]
+    return {q for q in qids if qids.count(q) == 1}
+
+
+def _outputs_equal(got, want, by_qid=()):
+    # a shard's hits are counted together, so per-candidate lines may come in another order
+    for path in want:
+        if path in by_qid:
+            assert _unique_qid_values(got[path], by_qid[path][0], by_qid[path][1]) == \
+                _unique_qid_values(want[path], by_qid[path][0], by_qid[path][1]) != {}, path
+        elif path.endswith("_summary.tsv"):
+            g, w = got[path].splitlines(), want[path].splitlines()
+            assert g[0] == w[0] and sorted(g[1:]) == sorted(w[1:]) and len(w) > 1, path
+        else:
+            assert got[path] == want[path], path
+
+
+@pytest.mark.parametrize("args", [["--seqs-per-shard", "7"], ["--shards", "3"], ["--bases-per-shard", "200"]])
+def test_shards_match_single_file(project, args):
+    want = run_sharded(project, "single", [])
+    assert sorted((project / "outputs/results/single").glob(f"*.{SHARD}.*")) == []
+    got = run_sharded(project, "sharded", args)
+    assert len(list((project / "outputs/results/sharded").glob(f"ASO_candidates.{SHARD}.fa"))) > 1
+    by_qid = {}
+    if "--shards" in args:
+        # RNAfold records of a repeated qid land in different round-robin shards, so which
+        # one is parsed last (and kept) differs; such rows are ambiguous without --dedup anyway
+        by_qid = {f"outputs/design/{p}_with_dG.tsv": ("rnafold_dG", _unique_qids(project, p)) for p in PREFIX.values()}
+    _outputs_equal(got, want, by_qid)
+
+
+@pytest.mark.parametrize("args", [["--shards", "3"], ["--seqs-per-shard", "5"], ["--bases-per-shard", "150"]])
+def test_dedup_shards_match_dedup_single_file(project, args):
+    want = run_sharded(project, "single", ["--dedup"])
+    got = run_sharded(project, "sharded", ["--dedup"] + args)
+    _outputs_equal(got, want)
+
+
+def test_dedup_matches_plain_export(project):
+    # a query per distinct sequence; rows whose qid is unique get the plain export's results
+    plain = run_sharded(project, "plain", [])
+    dedup = run_sharded(project, "dedup", ["--dedup", "--shards", "2"])
+    for p in PREFIX.values():
+        qmap = load_map(project / f"outputs/results/dedup/{p}.fa.ids.tsv")
+        top = read_rows(project / f"outputs/design/{p}_top.tsv")
+        assert len(qmap) == len({r["window_seq"] for r in top}) < len(top)
+        unique = _unique_qids(project, p)
+        for name, col in (("final", "offtargets_chr19"), ("final_grch38", "offtargets_genome"), ("with_dG", "rnafold_dG")):
+            path = f"outputs/design/{p}_{name}.tsv"
+            assert _unique_qid_values(dedup[path], col, unique) == _unique_qid_values(plain[path], col, unique) != {}, path
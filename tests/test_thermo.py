@@ -0,0 +1,31 @@
+"""Nearest-neighbor Tm against a reference value and the scalar path."""
+import numpy as np
+import pytest
+
+from aso_cas13.thermo import NearestNeighbor, duplex_thermo
+
+
+def test_santalucia_tm():
+    # SantaLucia (1998) unified parameters with the 0.368 * (N - 1) * ln[Na+]
+    # entropy correction, 50 mM Na+ and 25 nM of each strand: 60.32 °C
+    # (the Bio.SeqUtils.MeltingTemp.Tm_NN reference example)
+    tm, _ = duplex_thermo("CGTTCCAAAGATGTGGGCATGAGCTTAC", na_mM=50, oligo_nM=25)
+    assert tm == pytest.approx(60.32, abs=0.01)
+
+
+def test_strand_concentration():
+    # doubling each strand's concentration lowers R ln(C_T / 4) by R ln 2 only
+    lo, _ = duplex_thermo("GCTGCAGCATCCAGTCAGGC", oligo_nM=250)
+    hi, _ = duplex_thermo("GCTGCAGCATCCAGTCAGGC", oligo_nM=500)
+    assert 0 < hi - lo < 2
+
+
+def test_windows_match_single_duplexes():
+    rng = np.random.default_rng(3)
+    seqs = ["".join(rng.choice(list("ACGT"), n)) for n in (60, 45)] + ["ACGTNACGTACGTACGTACGTT"]
+    nn = NearestNeighbor([{"sequence": s} for s in seqs], "rna_dna")
+    rows = [(r, o, w) for r, s in enumerate(seqs) for w in (18, 20) for o in range(0, len(s) - w + 1, 3)]
+    tm, dg = nn.window_thermo(np.array(rows, dtype=[("region_id", "i8"), ("offset", "i8"), ("length", "i8")]))
+    for (r, o, w), t, g in zip(rows, tm, dg):
+        one = duplex_thermo(seqs[r][o:o + w], "rna_dna")
+        np.testing.assert_allclose([t, g], one, rtol=1e-9)
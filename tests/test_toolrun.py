@@ -0,0 +1,131 @@
+"""External blastn/RNAfold runs (--blast-cmd, --rnafold-cmd) against parsing their output files.
+
+The tools are the synthetic stand-ins of aso_cas13.synthetic: run once into
+files for the baseline, then by the stages over the exported FASTA shards.
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+from aso_cas13 import synthetic
+from aso_cas13.toolrun import ToolError, run_tool
+from conftest import PREFIX, run_stages
+
+D, R = "outputs/design", "outputs/results"
+QID = "{type}_{transcript_id}_{win_start}_{win_end}"
+BLASTN = f"{sys.executable} -m aso_cas13.synthetic blastn {{query}}"
+RNAFOLD = f"{sys.executable} -m aso_cas13.synthetic rnafold"
+# fails on its first run in a directory, then behaves like the RNAfold stand-in
+FLAKY = """import os, sys
+if not os.path.exists("flaky.seen"):
+    open("flaky.seen", "w").close()
+    sys.exit("first attempt fails")
+from aso_cas13.synthetic import stub_rnafold
+stub_rnafold()
+"""
+
+
+@pytest.fixture(autouse=True)
+def importable(monkeypatch):
+    monkeypatch.setenv("PYTHONPATH", str(Path(__file__).resolve().parents[1]))
+
+
+def _opt(typ, name):
+    return f"--{typ[:3].lower()}-{name}"
+
+
+def _export(root, table, tag, args):
+    """{typ: (query glob or path, map or None)}."""
+    out = {}
+    for typ, p in PREFIX.items():
+        fa = f"{R}/{tag}/{p}.fa"
+        run_stages(root, ("export-candidates-fasta", ["--input", f"{D}/{p}_{table}.tsv", "--out", fa, "--idfmt", QID] + args))
+        sharded = any(a.startswith(("--shards", "--seqs-per", "--bases-per")) for a in args)
+        out[typ] = (f"{R}/{tag}/{p}.[0-9][0-9][0-9].fa" if sharded else fa,
+                    f"{fa}.ids.tsv" if "--dedup" in args else None)
+    return out
+
+
+def _from_files(root, queries, name, run):
+    # the tool run by hand over the one-file export, its output parsed by the stage
+    args = []
+    for typ, (fa, map_file) in queries.items():
+        out = root / R / f"{typ}_{name}"
+        with open(out, "w") as f:
+            run(root / fa, f)
+        args += [_opt(typ, "hits" if name.endswith("grch38.txt") else "rnafold"), str(out)]
+        args += [_opt(typ, "map"), map_file] if map_file else []
+    return args
+
+
+def _blast(fa, out):
+    synthetic.stub_blastn(fa, out)
+
+
+def _rnafold(fa, out):
+    with open(fa) as f:
+        synthetic.stub_rnafold(f, out)
+
+
+def _via_cmd(queries, cmd_opt, cmd, extra):
+    args = [cmd_opt, cmd, "--concurrency", "2"] + extra
+    for typ, (fa, map_file) in queries.items():
+        args += [_opt(typ, "query"), fa] + ([_opt(typ, "map"), map_file] if map_file else [])
+    return args
+
+
+def _outputs(root, name):
+    return {p: (root / f"{D}/{p}_{name}.tsv").read_bytes() for p in PREFIX.values()}
+
+
+@pytest.mark.parametrize("args", [[], ["--dedup"], ["--dedup", "--shards", "3"], ["--seqs-per-shard", "9"]])
+def test_blast_cmd_matches_hit_files(project, args):
+    single = _export(project, "top", "single", [a for a in args if a == "--dedup"])
+    run_stages(project, ("parse-blast-genome", _from_files(project, single, "offtargets_grch38.txt", _blast)))
+    want = _outputs(project, "final_grch38")
+    queries = _export(project, "top", "cmd", args)
+    run_stages(project, ("parse-blast-genome", _via_cmd(queries, "--blast-cmd", BLASTN, [])))
+    assert _outputs(project, "final_grch38") == want
+    if "--dedup" not in args:
+        return  # hits of a repeated qid are summed over its sequences, which the cache keys apart
+    # the off-target cache stores what the tool found, and serves it on the next run
+    cache = ["--cache", "ot.sqlite", "--ref-build", "synthetic"]
+    run_stages(project, ("parse-blast-genome", _via_cmd(queries, "--blast-cmd", BLASTN, cache)))
+    assert _outputs(project, "final_grch38") == want
+    run_stages(project, ("parse-blast-genome", _via_cmd(queries, "--blast-cmd", "false", cache)))
+    assert _outputs(project, "final_grch38") == want
+
+
+@pytest.mark.parametrize("args", [[], ["--dedup"], ["--dedup", "--bases-per-shard", "300"], ["--seqs-per-shard", "9"]])
+def test_rnafold_cmd_matches_rnafold_text(project, args):
+    single = _export(project, "final_grch38", "single", [a for a in args if a == "--dedup"])
+    run_stages(project, ("rnafold-energy", _from_files(project, single, "rnafold.txt", _rnafold)))
+    want = _outputs(project, "with_dG")
+    queries = _export(project, "final_grch38", "cmd", args)
+    run_stages(project, ("rnafold-energy", _via_cmd(queries, "--rnafold-cmd", RNAFOLD, [])))
+    assert _outputs(project, "with_dG") == want
+
+
+def test_failing_shard_is_retried(project, monkeypatch):
+    queries = _export(project, "final_grch38", "cmd", ["--dedup"])
+    run_stages(project, ("rnafold-energy", _via_cmd(queries, "--rnafold-cmd", RNAFOLD, [])))
+    want = _outputs(project, "with_dG")
+    (project / "flaky.py").write_text(FLAKY)
+    run_stages(project, ("rnafold-energy", _via_cmd(queries, "--rnafold-cmd", f"{sys.executable} flaky.py", ["--retries", "1"])))
+    assert _outputs(project, "with_dG") == want
+    (project / "flaky.seen").unlink()
+    # the failed stage's metrics would be written at exit, relative to the cwd of that moment
+    monkeypatch.setenv("ASO_CAS13_METRICS", "0")
+    with pytest.raises(ToolError, match="first attempt fails"):
+        run_stages(project, ("rnafold-energy", _via_cmd(queries, "--rnafold-cmd", f"{sys.executable} flaky.py", ["--retries", "0"])))
+
+
+def test_timeout_and_missing_tool(tmp_path):
+    fa = tmp_path / "q.fa"
+    fa.write_text(">q0\nACGT\n")
+    with pytest.raises(ToolError, match="timed out"):
+        run_tool(f"{sys.executable} -c 'import time; time.sleep(5)'", [fa], lambda: None, retries=0, timeout=0.2,
+                 report=lambda msg: None)
+    with pytest.raises(ToolError, match="no-such-tool"):
+        run_tool("no-such-tool {query}", [fa], lambda: None, report=lambda msg: None)
@@ -0,0 +1,23 @@
+"""Compact window table against the one-row-per-window CSV it replaced."""
+import csv
+
+from aso_cas13.scoring import score_row, top_by_type, write_top
+from aso_cas13.windows import WindowTable
+from conftest import PREFIX, run_stages
+
+
+def test_table_rows_match_csv(project):
+    run_stages(project, ("locus-windows", ["--csv"]))
+    with (project / "outputs/results/01_target_windows.csv").open() as f:
+        legacy = list(csv.DictReader(f))
+    table = WindowTable(project / "outputs/results")
+    assert len(table) == len(legacy) > 0
+    for row, old in zip(table.rows(), legacy):
+        assert {k: str(v) for k, v in row.items()} == {k: v for k, v in old.items() if k != "sequence"}
+
+    # stage 02 before the table: score every CSV row, sort, keep the top 50 of each type
+    aso_top, cas_top = top_by_type([score_row(r) for r in legacy])
+    for typ, rows in (("ASO", aso_top), ("Cas13", cas_top)):
+        write_top(project / f"{typ}_legacy.tsv", rows)
+        assert (project / f"{typ}_legacy.tsv").read_bytes() == \
+            (project / f"outputs/design/{PREFIX[typ]}_top.tsv").read_bytes()